@@ -0,0 +1,158 @@
+"""
+并行连接基准测试
+验证 SessionManager 的连接建立不再被全局锁串行化
+
+使用方法：
+    # 模拟握手延迟（无需真实主机）
+    python scripts/bench_parallel_connect.py --latency 0.5 --counts 1,5,10,20
+
+    # 连接真实主机：相同的主机、端口、用户和凭证会被去重为一次握手，
+    # 因此每个并行连接需要不同的端口/用户组合（N 不超过组合数）
+    python scripts/bench_parallel_connect.py --host 192.168.1.10 --password xxx \
+        --users bench1,bench2,bench3 --ports 22,2222 --counts 1,2,4,6
+"""
+
+import argparse
+import asyncio
+import itertools
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ssh_mcp.connection_config import ConnectionConfig
+from ssh_mcp.session_manager import SessionManager, SSHSession
+
+
+class _SimulatedClient:
+    """模拟的 SSH 客户端，只用于替代真实握手"""
+
+    def get_transport(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def patch_simulated_handshake(latency: float) -> None:
+    """用固定延迟替代 TCP 握手、密钥交换和认证"""
+
+    def _connect_sync(self: SSHSession) -> None:
+        time.sleep(latency)
+        self.client = _SimulatedClient()
+
+    SSHSession._connect_sync = _connect_sync
+
+
+def _split(value: str) -> list:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def real_targets(args) -> list:
+    """
+    真实主机模式下可用的 (端口, 用户, 密码) 组合
+
+    --users 中的每一项可以是 "用户" 或 "用户:密码"，未写密码时使用 --password。
+    """
+    ports = [int(port) for port in _split(args.ports)] if args.ports else [args.port]
+    users = []
+    for item in _split(args.users) if args.users else [args.username]:
+        username, sep, password = item.partition(":")
+        users.append((username, password if sep else args.password))
+    return [(port, username, password) for port, (username, password) in itertools.product(ports, users)]
+
+
+def build_configs(args, count: int) -> list:
+    """构建 count 个互不相同的连接配置（避免被去重合并）"""
+    configs = []
+    if args.host:
+        targets = real_targets(args)
+        if count > len(targets):
+            raise ValueError(
+                f"{count} parallel connects need {count} distinct port/user combinations, "
+                f"only {len(targets)} given (use --users / --ports)"
+            )
+        for port, username, password in targets[:count]:
+            configs.append(ConnectionConfig(
+                host=args.host,
+                port=port,
+                username=username,
+                password=password or None,
+                keepalive_interval=3600,
+            ))
+        return configs
+
+    for i in range(count):
+        configs.append(ConnectionConfig(
+            host=f"10.0.0.{i + 1}",
+            port=args.port,
+            username="bench",
+            password=f"bench-{i}",
+            keepalive_interval=3600,
+        ))
+    return configs
+
+
+async def run_round(args, count: int) -> float:
+    """并行建立 count 个连接，返回耗时（秒）"""
+    manager = SessionManager(max_parallel_connects=max(count, 1))
+    configs = build_configs(args, count)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(manager.create_session(config) for config in configs))
+    elapsed = time.perf_counter() - start
+
+    await manager.close_all_sessions()
+    return elapsed
+
+
+async def run_dedupe(args) -> tuple:
+    """同一配置的并发请求应共享一次握手"""
+    manager = SessionManager()
+    config = build_configs(args, 1)[0]
+    infos = await asyncio.gather(*(manager.create_session(config) for _ in range(10)))
+    await manager.close_all_sessions()
+    return len({info.session_id for info in infos}), len(infos)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="SessionManager parallel connect benchmark")
+    parser.add_argument("--host", help="真实主机地址（不提供则模拟握手）")
+    parser.add_argument("--port", type=int, default=22)
+    parser.add_argument("--username", default="root")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--users", default="", help="真实主机模式：逗号分隔的用户列表（用户 或 用户:密码）")
+    parser.add_argument("--ports", default="", help="真实主机模式：逗号分隔的端口列表")
+    parser.add_argument("--latency", type=float, default=0.5, help="模拟握手延迟（秒）")
+    parser.add_argument("--counts", default="1,5,10,20", help="并行连接数列表")
+    args = parser.parse_args()
+
+    if not args.host:
+        patch_simulated_handshake(args.latency)
+        print(f"🧪 模拟握手延迟：{args.latency:.2f}s")
+
+    counts = [int(c) for c in args.counts.split(",") if c.strip()]
+    if args.host:
+        available = len(real_targets(args))
+        skipped = [count for count in counts if count > available]
+        counts = [count for count in counts if count <= available]
+        if skipped:
+            print(f"⚠️  跳过 N={','.join(map(str, skipped))}：只有 {available} 个不同的端口/用户组合")
+    baseline = None
+
+    print(f"{'N':>4} | {'耗时(s)':>8} | {'串行预期(s)':>10} | {'加速比':>6}")
+    print("-" * 40)
+    for count in counts:
+        elapsed = await run_round(args, count)
+        if baseline is None:
+            baseline = elapsed / max(count, 1)
+        serial = baseline * count
+        print(f"{count:>4} | {elapsed:>8.3f} | {serial:>10.3f} | {serial / elapsed:>6.1f}x")
+
+    distinct, total = await run_dedupe(args)
+    print(f"\n🔁 去重：{total} 个相同的连接请求 -> {distinct} 次握手")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+"""
+批量结果存储基准测试
+比较普通 dataclass 列表、__slots__ HostResult 列表和 HostResultStore 的每主机内存与统计耗时
+
+使用方法：
+    python scripts/bench_result_store.py --hosts 10000,50000 --variants 3
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ssh_mcp.batch_executor import HostResult, HostResultStore
+
+
+@dataclass
+class _PlainHostResult:
+    """改造前的 HostResult（无 __slots__），作为对照"""
+    host: str
+    port: int
+    username: str
+    success: bool
+    stdout: str = ""
+    stderr: str = ""
+    return_code: int = -1
+    error_message: str = ""
+    latency_ms: float = 0.0
+    timestamp: datetime = field(default_factory=datetime.now)
+
+
+OUTPUTS = [
+    'NAME="Ubuntu"\nVERSION_ID="22.04"\n',
+    'NAME="Ubuntu"\nVERSION_ID="20.04"\n',
+    'NAME="Debian GNU/Linux"\nVERSION_ID="12"\n',
+    'NAME="Rocky Linux"\nVERSION_ID="9.3"\n',
+]
+
+
+def make_results(cls, count: int, variants: int, seed: int = 0):
+    """生成 count 个结果；字符串逐个新建，模拟从网络读入的独立对象"""
+    rng = random.Random(seed)
+    for i in range(count):
+        ok = rng.random() > 0.02
+        yield cls(
+            host=f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}",
+            port=22,
+            username="".join(["de", "ploy"]),
+            success=ok,
+            stdout="".join(OUTPUTS[rng.randrange(variants)]) if ok else "",
+            stderr="" if ok else "".join(["Permission denied", ""]),
+            return_code=0 if ok else 1,
+            latency_ms=rng.uniform(5, 200),
+        )
+
+
+def measure(build):
+    """返回 (对象, 分配的字节数, 构建耗时)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size, elapsed
+
+
+def timed(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HostResult storage benchmark")
+    parser.add_argument("--hosts", default="10000,50000", help="主机数列表")
+    parser.add_argument("--variants", type=int, default=3, help="不同输出的种类数（1-4）")
+    args = parser.parse_args()
+    variants = max(1, min(args.variants, len(OUTPUTS)))
+
+    print(f"{'主机数':>8} | {'存储方式':<22} | {'字节/主机':>9} | {'构建(ms)':>9} | {'成功数(ms)':>10} | {'遍历(ms)':>9}")
+    print("-" * 84)
+    for count in (int(c) for c in args.hosts.split(",") if c.strip()):
+        cases = [
+            ("dataclass list", lambda: list(make_results(_PlainHostResult, count, variants))),
+            ("slots HostResult list", lambda: list(make_results(HostResult, count, variants))),
+            ("HostResultStore", lambda: HostResultStore(make_results(HostResult, count, variants))),
+        ]
+        for name, build in cases:
+            results, size, build_time = measure(build)
+            if isinstance(results, HostResultStore):
+                count_time = timed(lambda: results.success_count)
+            else:
+                count_time = timed(lambda: sum(1 for r in results if r.success))
+            iter_time = timed(lambda: sum(r.latency_ms for r in results), repeat=3)
+            print(
+                f"{count:>8} | {name:<22} | {size / count:>9.0f} | {build_time * 1000:>9.1f} | "
+                f"{count_time * 1000:>10.3f} | {iter_time * 1000:>9.1f}"
+            )
+            # 释放本轮结果，避免计入下一种存储方式的内存
+            results = None
+        print("-" * 84)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+
+ADAPTIVE_ENV = "SSH_ADAPTIVE_CONCURRENCY"
+
+# 结果分类：超时和连接中断视为过载信号，其余失败（认证失败、命令退出码非 0）不影响并发
+OUTCOME_OK = "ok"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_RESET = "reset"
+
+_TIMEOUT_MARKERS = ("timeout", "timed out")
+_RESET_MARKERS = (
+    "reset", "refused", "connection lost", "broken pipe", "disconnect",
+    "failed to create connection", "unreachable", "eof",
+)
+
+
+def adaptive_enabled() -> bool:
+    """环境变量 SSH_ADAPTIVE_CONCURRENCY 是否开启自适应并发"""
+    return os.getenv(ADAPTIVE_ENV, "false").lower() in ("1", "true", "yes", "on")
+
+
+def classify_error(error_message: str) -> str:
+    """按错误信息判断是否为过载信号（超时 / 连接中断）"""
+    message = (error_message or "").lower()
+    if any(marker in message for marker in _TIMEOUT_MARKERS):
+        return OUTCOME_TIMEOUT
+    if any(marker in message for marker in _RESET_MARKERS):
+        return OUTCOME_RESET
+    return OUTCOME_OK
+
+
+@dataclass
+class LimiterConfig:
+    """自适应并发配置"""
+    initial: int = 4
+    min_limit: int = 1
+    max_limit: int = 50
+    increase_step: int = 1
+    decrease_factor: float = 0.5
+    # 每个评估窗口至少的样本数（实际为 max(min_samples, 当前并发数)）
+    min_samples: int = 5
+    # 窗口内超时和连接中断的比例超过该值时降低并发
+    error_threshold: float = 0.1
+    # 窗口 p95 延迟超过基准 p95 的倍数时暂停增加并发
+    latency_tolerance: float = 1.5
+    history_size: int = 256
+
+
+@dataclass(slots=True)
+class LimitChange:
+    """一次并发上限评估"""
+    at_s: float
+    previous: int
+    limit: int
+    reason: str
+    p95_ms: float
+    error_rate: float
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制器
+
+    - 每完成一个窗口的请求评估一次：超时和连接中断的比例超过阈值时并发乘性减小，
+      p95 延迟相对基准（健康窗口的最小 p95）明显升高时保持不变，否则加性增大
+    - 并发始终在 [min_limit, max_limit] 之内
+    - 线程（acquire / slot）和协程（acquire_async / async_slot）都可以使用
+    - 每次评估记录在 history 中，可随批量结果返回
+    """
+
+    def __init__(self, config: Optional[LimiterConfig] = None):
+        self.config = config or LimiterConfig()
+        cfg = self.config
+        self._limit = max(cfg.min_limit, min(cfg.initial, cfg.max_limit))
+        self._active = 0
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._window: List[Tuple[float, str]] = []
+        self._baseline_p95: Optional[float] = None
+        # 降低并发后忽略此前已在执行的请求的结果，避免同一次过载被重复计入
+        self._skip_samples = 0
+        self._history: Deque[LimitChange] = deque(maxlen=cfg.history_size)
+        self._started = time.monotonic()
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def history(self) -> List[LimitChange]:
+        with self._lock:
+            return list(self._history)
+
+    def _try_acquire(self) -> bool:
+        """（需持有锁）"""
+        if self._active < self._limit:
+            self._active += 1
+            return True
+        return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """阻塞等待一个并发名额，超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(self._try_acquire, timeout)
+
+    async def acquire_async(self) -> None:
+        """等待一个并发名额（协程）"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._try_acquire():
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                waiter.cancel()
+                raise
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        """（需持有锁）唤醒等待者重新尝试获取"""
+        self._cond.notify_all()
+        while self._async_waiters:
+            loop, waiter = self._async_waiters.popleft()
+            if not waiter.done():
+                loop.call_soon_threadsafe(self._resolve, waiter)
+
+    @staticmethod
+    def _resolve(waiter: asyncio.Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self) -> AsyncIterator[None]:
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record(self, latency_ms: float, outcome: str = OUTCOME_OK) -> None:
+        """记录一个完成的请求；窗口满时评估并调整并发上限"""
+        with self._lock:
+            if self._skip_samples:
+                self._skip_samples -= 1
+                return
+            self._window.append((latency_ms, outcome))
+            if len(self._window) >= max(self.config.min_samples, self._limit):
+                self._evaluate()
+
+    def record_result(self, result) -> None:
+        """按 HostResult 记录（耗时和错误分类）"""
+        self.record(result.latency_ms, classify_error(result.error_message) if not result.success else OUTCOME_OK)
+
+    def _evaluate(self) -> None:
+        """（需持有锁）"""
+        cfg = self.config
+        window, self._window = self._window, []
+        latencies = sorted(latency for latency, _ in window)
+        p95 = latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)]
+        errors = sum(1 for _, outcome in window if outcome != OUTCOME_OK)
+        error_rate = errors / len(window)
+        previous = self._limit
+
+        if error_rate > cfg.error_threshold:
+            self._limit = max(cfg.min_limit, int(self._limit * cfg.decrease_factor))
+            # 调用方在 release 之前记录，当前请求自身不计入
+            self._skip_samples = max(0, self._active - 1)
+            reason = "decrease"
+        elif self._baseline_p95 is not None and p95 > self._baseline_p95 * cfg.latency_tolerance:
+            # 基准缓慢上移：延迟持续偏高（例如网络整体变慢）时，稍后仍会再次尝试增加
+            self._baseline_p95 *= 1.02
+            reason = "hold"
+        else:
+            self._baseline_p95 = p95 if self._baseline_p95 is None else min(self._baseline_p95, p95)
+            self._limit = min(cfg.max_limit, self._limit + cfg.increase_step)
+            reason = "increase"
+
+        self._history.append(LimitChange(
+            at_s=round(time.monotonic() - self._started, 3),
+            previous=previous,
+            limit=self._limit,
+            reason=reason,
+            p95_ms=round(p95, 1),
+            error_rate=round(error_rate, 3)
+        ))
+        if self._limit != previous:
+            self._logger.debug(
+                f"Concurrency {previous} -> {self._limit} ({reason}, p95={p95:.0f}ms, errors={error_rate:.0%})"
+            )
+        if self._limit > previous:
+            self._wake()
+
+    def snapshot(self) -> Dict[str, object]:
+        """当前并发、上下限和评估记录"""
+        with self._lock:
+            return {
+                "limit": self._limit,
+                "active": self._active,
+                "min_limit": self.config.min_limit,
+                "max_limit": self.config.max_limit,
+                "baseline_p95_ms": self._baseline_p95,
+                "history": list(self._history),
+            }
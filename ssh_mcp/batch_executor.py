@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import sys
 import time
 import concurrent.futures
-from typing import List, Dict, Any, Optional, Callable
+import logging
+from array import array
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, AsyncIterator, Union, overload
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
@@ -12,9 +15,16 @@ import uuid
 from .connection_config import ConnectionConfig
 from .clients.interface import ClientType, CommandResult
 from .clients.factory import SSHClientFactory
-from .connection_pool import ConnectionPool, PoolConfig, PooledSSHClient
+from .connection_pool import AsyncConnectionCache, ConnectionPool, PoolConfig, PooledSSHClient
 from .exceptions import ConnectionException, CommandExecutionException
-from .logging_config import get_logger
+from .adaptive_limiter import AdaptiveLimiter, LimitChange, LimiterConfig, adaptive_enabled
+from .single_flight import (
+    SyncSingleFlight,
+    can_coalesce,
+    coalescing_enabled,
+    command_key,
+    shared_sync_flight,
+)
 
 
 class BatchResultStatus(Enum):
@@ -24,7 +34,7 @@ class BatchResultStatus(Enum):
     FAILED = "failed"
 
 
-@dataclass
+@dataclass(slots=True)
 class HostResult:
     """单主机执行结果"""
     host: str
@@ -39,6 +49,171 @@ class HostResult:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+class HostResultView:
+    """
+    HostResultStore 中一条记录的只读视图，属性与 HostResult 相同
+
+    只保存存储和下标，字段在访问时从列中读取；需要独立对象时调用 to_host_result()。
+    """
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: "HostResultStore", index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def host(self) -> str:
+        return self._store._hosts[self._index]
+
+    @property
+    def port(self) -> int:
+        return self._store._ports[self._index]
+
+    @property
+    def username(self) -> str:
+        return self._store._usernames[self._index]
+
+    @property
+    def success(self) -> bool:
+        return bool(self._store._success[self._index])
+
+    @property
+    def stdout(self) -> str:
+        return self._store._stdout[self._index]
+
+    @property
+    def stderr(self) -> str:
+        return self._store._stderr[self._index]
+
+    @property
+    def return_code(self) -> int:
+        return self._store._return_codes[self._index]
+
+    @property
+    def error_message(self) -> str:
+        return self._store._errors[self._index]
+
+    @property
+    def latency_ms(self) -> float:
+        return self._store._latencies[self._index]
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self._store._timestamps[self._index])
+
+    def to_host_result(self) -> HostResult:
+        return HostResult(
+            host=self.host,
+            port=self.port,
+            username=self.username,
+            success=self.success,
+            stdout=self.stdout,
+            stderr=self.stderr,
+            return_code=self.return_code,
+            error_message=self.error_message,
+            latency_ms=self.latency_ms,
+            timestamp=self.timestamp
+        )
+
+    def __repr__(self) -> str:
+        return f"HostResultView(host={self.host!r}, port={self.port}, success={self.success}, return_code={self.return_code})"
+
+
+class HostResultStore:
+    """
+    紧凑的主机结果存储 - 按列保存，适合上万台主机的结果集
+
+    - 主机名和用户名驻留（sys.intern），相同的输出文本只保存一份
+    - 端口、退出码、耗时和时间戳存放在 array 列中，不为每台主机创建 datetime 和 HostResult 对象
+    - 成功 / 失败数在写入时累计，统计无需遍历
+
+    按序列使用：len()、迭代和下标访问返回只读的 HostResultView。
+    """
+
+    def __init__(self, results: Iterable[HostResult] = ()):
+        self._hosts: List[str] = []
+        self._usernames: List[str] = []
+        self._ports = array("H")
+        self._return_codes = array("i")
+        self._latencies = array("d")
+        self._timestamps = array("d")
+        self._success = bytearray()
+        self._stdout: List[str] = []
+        self._stderr: List[str] = []
+        self._errors: List[str] = []
+        self._texts: Dict[str, str] = {}
+        self._success_count = 0
+        self.extend(results)
+
+    def _share(self, text: str) -> str:
+        return self._texts.setdefault(text, text)
+
+    def append(self, result: HostResult) -> None:
+        self._hosts.append(sys.intern(result.host))
+        self._usernames.append(sys.intern(result.username))
+        self._ports.append(result.port)
+        self._return_codes.append(result.return_code)
+        self._latencies.append(result.latency_ms)
+        self._timestamps.append(result.timestamp.timestamp())
+        self._success.append(1 if result.success else 0)
+        self._stdout.append(self._share(result.stdout))
+        self._stderr.append(self._share(result.stderr))
+        self._errors.append(self._share(result.error_message))
+        if result.success:
+            self._success_count += 1
+
+    def extend(self, results: Iterable[HostResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    def __len__(self) -> int:
+        return len(self._hosts)
+
+    def __iter__(self) -> Iterator[HostResultView]:
+        for index in range(len(self._hosts)):
+            yield HostResultView(self, index)
+
+    @overload
+    def __getitem__(self, index: int) -> HostResultView: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[HostResultView]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [HostResultView(self, i) for i in range(*index.indices(len(self._hosts)))]
+        if index < 0:
+            index += len(self._hosts)
+        if not 0 <= index < len(self._hosts):
+            raise IndexError("HostResultStore index out of range")
+        return HostResultView(self, index)
+
+    def __bool__(self) -> bool:
+        return bool(self._hosts)
+
+    @property
+    def success_count(self) -> int:
+        return self._success_count
+
+    @property
+    def failed_count(self) -> int:
+        return len(self._hosts) - self._success_count
+
+    @property
+    def latencies(self) -> array:
+        """各主机耗时（毫秒）列，按写入顺序"""
+        return self._latencies
+
+    def failed(self) -> List[HostResultView]:
+        """失败的主机结果"""
+        return [HostResultView(self, i) for i, ok in enumerate(self._success) if not ok]
+
+    def distinct_outputs(self) -> int:
+        """保存的不同输出文本数"""
+        return len(self._texts)
+
+
 @dataclass
 class BatchExecutionResult:
     """批量执行结果"""
@@ -47,9 +222,83 @@ class BatchExecutionResult:
     total_hosts: int
     success_count: int = 0
     failed_count: int = 0
-    results: List[HostResult] = field(default_factory=list)
+    results: HostResultStore = field(default_factory=HostResultStore)
     total_time_ms: float = 0.0
     timestamp: datetime = field(default_factory=datetime.now)
+    # 自适应并发：结束时的并发上限和每次调整记录（未开启时为 None / 空）
+    concurrency_limit: Optional[int] = None
+    concurrency_history: List[LimitChange] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class BatchSummary:
+    """流式批量执行的汇总，作为 execute_stream 的最后一项产出（不含各主机结果）"""
+    batch_id: str
+    status: BatchResultStatus
+    total_hosts: int
+    success_count: int = 0
+    failed_count: int = 0
+    total_time_ms: float = 0.0
+    timestamp: datetime = field(default_factory=datetime.now)
+    concurrency_limit: Optional[int] = None
+    concurrency_history: List[LimitChange] = field(default_factory=list)
+
+
+def _make_limiter(
+    adaptive: Optional[bool],
+    limiter_config: Optional[LimiterConfig],
+    max_limit: int
+) -> Optional[AdaptiveLimiter]:
+    """开启自适应并发时为一次批量执行创建限制器，上限为执行器的固定并发数"""
+    if adaptive is None:
+        adaptive = adaptive_enabled()
+    if not adaptive:
+        return None
+    if limiter_config is None:
+        limiter_config = LimiterConfig(
+            initial=min(LimiterConfig.initial, max_limit),
+            max_limit=max_limit
+        )
+    return AdaptiveLimiter(limiter_config)
+
+
+def _batch_status(success_count: int, failed_count: int) -> BatchResultStatus:
+    if failed_count == 0:
+        return BatchResultStatus.SUCCESS
+    if success_count == 0:
+        return BatchResultStatus.FAILED
+    return BatchResultStatus.PARTIAL
+
+
+def _collect_results(
+    stream: Iterator[Union[HostResult, BatchSummary]],
+    total_hosts: int,
+    progress_callback: Optional[Callable[[int, int], None]]
+) -> tuple[HostResultStore, BatchSummary]:
+    results = HostResultStore()
+    summary: Optional[BatchSummary] = None
+    for item in stream:
+        if isinstance(item, BatchSummary):
+            summary = item
+            continue
+        results.append(item)
+        if progress_callback:
+            progress_callback(len(results), total_hosts)
+    return results, summary
+
+
+def _to_execution_result(results: HostResultStore, summary: BatchSummary) -> BatchExecutionResult:
+    return BatchExecutionResult(
+        batch_id=summary.batch_id,
+        status=summary.status,
+        total_hosts=summary.total_hosts,
+        success_count=summary.success_count,
+        failed_count=summary.failed_count,
+        results=results,
+        total_time_ms=summary.total_time_ms,
+        concurrency_limit=summary.concurrency_limit,
+        concurrency_history=summary.concurrency_history
+    )
 
 
 class BatchExecutor:
@@ -70,7 +319,10 @@ class BatchExecutor:
         client_type: Optional[ClientType] = None,
         pool_config: Optional[PoolConfig] = None,
         max_workers: int = 10,
-        timeout: int = 60
+        timeout: int = 60,
+        coalesce: Optional[bool] = None,
+        adaptive: Optional[bool] = None,
+        limiter_config: Optional[LimiterConfig] = None
     ):
         self._hosts = hosts
         self._client_type = client_type or ClientType.ASYNCSSH
@@ -78,7 +330,16 @@ class BatchExecutor:
         self._max_workers = max_workers
         self._timeout = timeout
         
-        self._logger = get_logger("BatchExecutor")
+        # 可选：AIMD 自适应并发，max_workers 作为上限（默认读取 SSH_ADAPTIVE_CONCURRENCY）
+        self._adaptive = adaptive
+        self._limiter_config = limiter_config
+        
+        # 可选：同一主机、用户的相同命令并发时只执行一次（默认读取 SSH_COALESCE_COMMANDS）
+        if coalesce is None:
+            coalesce = coalescing_enabled()
+        self._single_flight: Optional[SyncSingleFlight] = shared_sync_flight if coalesce else None
+        
+        self._logger = logging.getLogger(__name__)
         
         self._pools: Dict[str, ConnectionPool] = {}
     
@@ -97,10 +358,29 @@ class BatchExecutor:
         
         return self._pools[key]
     
+    @property
+    def coalesced_calls(self) -> int:
+        """被合并的调用次数（未开启合并时为 0）"""
+        return self._single_flight.coalesced_calls if self._single_flight else 0
+    
     def _execute_on_host(
         self, 
         host_config: ConnectionConfig, 
         command: str
+    ) -> HostResult:
+        """在单个主机上执行命令（开启合并时，并发的相同只读请求共享一次执行）"""
+        if self._single_flight is None or not can_coalesce(command):
+            return self._run_on_host(host_config, command)
+        return self._single_flight.do(
+            command_key(host_config.host, host_config.port, host_config.username, command),
+            lambda: self._run_on_host(host_config, command),
+            timeout=self._timeout + 10
+        )
+    
+    def _run_on_host(
+        self, 
+        host_config: ConnectionConfig, 
+        command: str
     ) -> HostResult:
         """在单个主机上执行命令"""
         start_time = time.time()
@@ -147,6 +427,26 @@ class BatchExecutor:
         Returns:
             BatchExecutionResult: 批量执行结果
         """
+        results, summary = _collect_results(
+            self.execute_stream(command), len(self._hosts), progress_callback
+        )
+        return _to_execution_result(results, summary)
+    
+    def execute_stream(
+        self,
+        command: str,
+        queue_size: int = 100
+    ) -> Iterator[Union[HostResult, BatchSummary]]:
+        """
+        流式批量执行：每个主机完成后立即产出其 HostResult，最后产出 BatchSummary
+        
+        同时提交的主机数不超过 max_workers + queue_size，调用方不取结果时
+        不会启动新的主机，内存占用与主机总数无关。提前结束迭代会取消尚未开始的主机。
+        
+        Args:
+            command: 要执行的命令
+            queue_size: 已完成但尚未被取走的结果上限
+        """
         batch_id = str(uuid.uuid4())
         start_time = time.time()
         
@@ -155,79 +455,49 @@ class BatchExecutor:
             f"hosts={len(self._hosts)}, command='{command}'"
         )
         
-        results: List[HostResult] = []
-        completed = 0
-        
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=min(self._max_workers, len(self._hosts))
-        ) as executor:
-            future_to_host = {
-                executor.submit(
-                    self._execute_on_host, 
-                    host_config, 
-                    command
-                ): host_config
-                for host_config in self._hosts
-            }
+        hosts = iter(self._hosts)
+        window = max(1, self._max_workers) + max(0, queue_size)
+        pending: Dict[concurrent.futures.Future, ConnectionConfig] = {}
+        success_count = 0
+        failed_count = 0
+        limiter = _make_limiter(self._adaptive, self._limiter_config, self._max_workers)
+        
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, min(self._max_workers, len(self._hosts)))
+        )
+        
+        def submit_next() -> bool:
+            host_config = next(hosts, None)
+            if host_config is None:
+                return False
+            if limiter is not None:
+                future = executor.submit(self._execute_limited, limiter, host_config, command)
+            else:
+                future = executor.submit(self._execute_on_host, host_config, command)
+            pending[future] = host_config
+            return True
+        
+        try:
+            while len(pending) < window and submit_next():
+                pass
             
-            for future in concurrent.futures.as_completed(future_to_host):
-                host_config = future_to_host[future]
-                
-                try:
-                    result = future.result(timeout=self._timeout + 10)
-                    results.append(result)
-                    
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    host_config = pending.pop(future)
+                    result = self._future_result(future, host_config)
                     if result.success:
-                        self._logger.debug(
-                            f"Host {host_config.host} succeeded "
-                            f"(latency: {result.latency_ms:.2f}ms)"
-                        )
+                        success_count += 1
                     else:
-                        self._logger.warning(
-                            f"Host {host_config.host} failed: {result.error_message}"
-                        )
-                        
-                except concurrent.futures.TimeoutError:
-                    error_result = HostResult(
-                        host=host_config.host,
-                        port=host_config.port,
-                        username=host_config.username,
-                        success=False,
-                        error_message=f"Command timeout after {self._timeout}s",
-                        return_code=-1
-                    )
-                    results.append(error_result)
-                    self._logger.error(
-                        f"Host {host_config.host} timeout"
-                    )
-                    
-                except Exception as e:
-                    error_result = HostResult(
-                        host=host_config.host,
-                        port=host_config.port,
-                        username=host_config.username,
-                        success=False,
-                        error_message=str(e),
-                        return_code=-1
-                    )
-                    results.append(error_result)
-                    self._logger.error(
-                        f"Host {host_config.host} error: {str(e)}"
-                    )
-                
-                completed += 1
-                if progress_callback:
-                    progress_callback(completed, len(self._hosts))
-        
-        success_count = sum(1 for r in results if r.success)
-        failed_count = len(results) - success_count
-        
-        if failed_count == 0:
-            status = BatchResultStatus.SUCCESS
-        elif success_count == 0:
-            status = BatchResultStatus.FAILED
-        else:
-            status = BatchResultStatus.PARTIAL
+                        failed_count += 1
+                    yield result
+                    submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
         
         total_time_ms = (time.time() - start_time) * 1000
         
@@ -237,16 +507,75 @@ class BatchExecutor:
             f"total_time={total_time_ms:.2f}ms"
         )
         
-        return BatchExecutionResult(
+        yield BatchSummary(
             batch_id=batch_id,
-            status=status,
+            status=_batch_status(success_count, failed_count),
             total_hosts=len(self._hosts),
             success_count=success_count,
             failed_count=failed_count,
-            results=results,
-            total_time_ms=total_time_ms
+            total_time_ms=total_time_ms,
+            concurrency_limit=limiter.limit if limiter else None,
+            concurrency_history=limiter.history if limiter else []
         )
     
+    def _execute_limited(
+        self,
+        limiter: AdaptiveLimiter,
+        host_config: ConnectionConfig,
+        command: str
+    ) -> HostResult:
+        """占用一个自适应并发名额执行，并把耗时和结果反馈给限制器"""
+        with limiter.slot():
+            result = self._execute_on_host(host_config, command)
+            limiter.record_result(result)
+        return result
+    
+    def _future_result(
+        self,
+        future: concurrent.futures.Future,
+        host_config: ConnectionConfig
+    ) -> HostResult:
+        """取出已完成任务的结果，异常转换为失败的 HostResult"""
+        try:
+            result = future.result()
+            
+            if result.success:
+                self._logger.debug(
+                    f"Host {host_config.host} succeeded "
+                    f"(latency: {result.latency_ms:.2f}ms)"
+                )
+            else:
+                self._logger.warning(
+                    f"Host {host_config.host} failed: {result.error_message}"
+                )
+            return result
+                
+        except concurrent.futures.TimeoutError:
+            self._logger.error(
+                f"Host {host_config.host} timeout"
+            )
+            return HostResult(
+                host=host_config.host,
+                port=host_config.port,
+                username=host_config.username,
+                success=False,
+                error_message=f"Command timeout after {self._timeout}s",
+                return_code=-1
+            )
+            
+        except Exception as e:
+            self._logger.error(
+                f"Host {host_config.host} error: {str(e)}"
+            )
+            return HostResult(
+                host=host_config.host,
+                port=host_config.port,
+                username=host_config.username,
+                success=False,
+                error_message=str(e),
+                return_code=-1
+            )
+    
     async def execute_async(
         self, 
         command: str,
@@ -289,6 +618,7 @@ class AsyncBatchExecutor:
     - 原生异步支持
     - 高并发性能
     - 事件循环管理
+    - 连接跨多次执行复用（AsyncConnectionCache），重复的批量命令只需打开通道
     """
     
     def __init__(
@@ -296,65 +626,71 @@ class AsyncBatchExecutor:
         hosts: List[ConnectionConfig],
         client_type: Optional[ClientType] = None,
         max_concurrent: int = 50,
-        timeout: int = 60
+        timeout: int = 60,
+        connection_cache: Optional[AsyncConnectionCache] = None,
+        adaptive: Optional[bool] = None,
+        limiter_config: Optional[LimiterConfig] = None
     ):
         self._hosts = hosts
         self._client_type = client_type or ClientType.ASYNCSSH
         self._max_concurrent = max_concurrent
         self._timeout = timeout
         
-        self._logger = get_logger("AsyncBatchExecutor")
+        # 可选：AIMD 自适应并发，max_concurrent 作为上限（默认读取 SSH_ADAPTIVE_CONCURRENCY）
+        self._adaptive = adaptive
+        self._limiter_config = limiter_config
+        
+        # 传入的缓存由调用方负责关闭，可在多个执行器之间共享
+        self._owns_connections = connection_cache is None
+        self._connections = connection_cache or AsyncConnectionCache()
+        
+        self._logger = logging.getLogger(__name__)
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """连接缓存统计信息"""
+        return self._connections.get_stats()
+    
+    async def close(self) -> None:
+        """关闭执行器自己创建的连接缓存"""
+        if self._owns_connections:
+            await self._connections.close()
+        
+        self._logger.info("AsyncBatchExecutor closed")
     
     async def _execute_single(
         self, 
         host_config: ConnectionConfig, 
-        command: str,
-        semaphore: asyncio.Semaphore
+        command: str
     ) -> HostResult:
         """异步执行单个主机命令"""
-        async with semaphore:
-            start_time = time.time()
-            
-            result = HostResult(
-                host=host_config.host,
-                port=host_config.port,
-                username=host_config.username,
-                success=False
-            )
+        start_time = time.time()
+        
+        result = HostResult(
+            host=host_config.host,
+            port=host_config.port,
+            username=host_config.username,
+            success=False
+        )
+        
+        try:
+            result_obj = await self._connections.run(host_config, command, timeout=self._timeout)
             
-            try:
-                import asyncssh
-                
-                async with asyncssh.connect(
-                    host=host_config.host,
-                    port=host_config.port,
-                    username=host_config.username,
-                    password=host_config.password,
-                    client_keys=(
-                        [str(host_config.private_key_path)] 
-                        if host_config.private_key_path else None
-                    ),
-                    passphrase=host_config.passphrase,
-                    timeout=self._timeout
-                ) as conn:
-                    result_obj = await conn.run(command, timeout=self._timeout)
-                    
-                    result.stdout = result_obj.stdout
-                    result.stderr = result_obj.stderr
-                    result.return_code = result_obj.exit_status
-                    result.success = result_obj.exit_status == 0
-                    
-            except asyncio.TimeoutError:
-                result.success = False
-                result.error_message = f"Command timeout after {self._timeout}s"
-                
-            except Exception as e:
-                result.success = False
-                result.error_message = str(e)
+            result.stdout = result_obj.stdout or ""
+            result.stderr = result_obj.stderr or ""
+            result.return_code = result_obj.exit_status if result_obj.exit_status is not None else -1
+            result.success = result_obj.exit_status == 0
             
-            result.latency_ms = (time.time() - start_time) * 1000
+        except asyncio.TimeoutError:
+            result.success = False
+            result.error_message = f"Command timeout after {self._timeout}s"
             
-            return result
+        except Exception as e:
+            result.success = False
+            result.error_message = str(e)
+        
+        result.latency_ms = (time.time() - start_time) * 1000
+        
+        return result
     
     async def execute(
         self, 
@@ -371,6 +707,36 @@ class AsyncBatchExecutor:
         Returns:
             BatchExecutionResult: 批量执行结果
         """
+        results = HostResultStore()
+        summary: Optional[BatchSummary] = None
+        
+        async for item in self.execute_stream(command):
+            if isinstance(item, BatchSummary):
+                summary = item
+                continue
+            results.append(item)
+            
+            if progress_callback:
+                progress_callback(len(results), len(self._hosts))
+        
+        return _to_execution_result(results, summary)
+    
+    async def execute_stream(
+        self,
+        command: str,
+        queue_size: int = 100
+    ) -> AsyncIterator[Union[HostResult, BatchSummary]]:
+        """
+        流式异步批量执行：每个主机完成后立即产出其 HostResult，最后产出 BatchSummary
+        
+        max_concurrent 个工作协程依次从主机列表取主机执行，结果放入有界队列；
+        队列满时工作协程暂停，不再连接新主机，内存占用与主机总数无关。
+        提前结束迭代时请关闭生成器（例如 contextlib.aclosing），以取消其余主机。
+        
+        Args:
+            command: 要执行的命令
+            queue_size: 已完成但尚未被取走的结果上限
+        """
         batch_id = str(uuid.uuid4())
         start_time = time.time()
         
@@ -379,31 +745,54 @@ class AsyncBatchExecutor:
             f"hosts={len(self._hosts)}, command='{command}'"
         )
         
-        semaphore = asyncio.Semaphore(self._max_concurrent)
-        
-        tasks = [
-            self._execute_single(host_config, command, semaphore)
-            for host_config in self._hosts
+        hosts = iter(self._hosts)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        finished = object()
+        limiter = _make_limiter(self._adaptive, self._limiter_config, self._max_concurrent)
+        
+        async def worker() -> None:
+            while True:
+                if limiter is not None:
+                    # 先取得名额再取主机，等待期间不占用主机
+                    async with limiter.async_slot():
+                        host_config = next(hosts, None)
+                        if host_config is None:
+                            return
+                        result = await self._execute_single(host_config, command)
+                        limiter.record_result(result)
+                else:
+                    host_config = next(hosts, None)
+                    if host_config is None:
+                        return
+                    result = await self._execute_single(host_config, command)
+                await queue.put(result)
+        
+        async def close_queue(workers: List[asyncio.Task]) -> None:
+            await asyncio.gather(*workers, return_exceptions=True)
+            await queue.put(finished)
+        
+        workers = [
+            asyncio.create_task(worker())
+            for _ in range(max(1, min(self._max_concurrent, len(self._hosts))))
         ]
+        closer = asyncio.create_task(close_queue(workers))
         
-        results: List[HostResult] = []
-        
-        for i, coro in enumerate(asyncio.as_completed(tasks)):
-            result = await coro
-            results.append(result)
-            
-            if progress_callback:
-                progress_callback(i + 1, len(self._hosts))
-        
-        success_count = sum(1 for r in results if r.success)
-        failed_count = len(results) - success_count
-        
-        if failed_count == 0:
-            status = BatchResultStatus.SUCCESS
-        elif success_count == 0:
-            status = BatchResultStatus.FAILED
-        else:
-            status = BatchResultStatus.PARTIAL
+        success_count = 0
+        failed_count = 0
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                if item.success:
+                    success_count += 1
+                else:
+                    failed_count += 1
+                yield item
+        finally:
+            for task in workers:
+                task.cancel()
+            closer.cancel()
         
         total_time_ms = (time.time() - start_time) * 1000
         
@@ -413,12 +802,13 @@ class AsyncBatchExecutor:
             f"total_time={total_time_ms:.2f}ms"
         )
         
-        return BatchExecutionResult(
+        yield BatchSummary(
             batch_id=batch_id,
-            status=status,
+            status=_batch_status(success_count, failed_count),
             total_hosts=len(self._hosts),
             success_count=success_count,
             failed_count=failed_count,
-            results=results,
-            total_time_ms=total_time_ms
+            total_time_ms=total_time_ms,
+            concurrency_limit=limiter.limit if limiter else None,
+            concurrency_history=limiter.history if limiter else []
         )
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+import concurrent.futures
+import functools
+import select
+import socket
+import threading
+import time
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, Iterator, Optional, Tuple
+
+import paramiko
+
+from .clients.interface import StreamChunk
+
+
+DEFAULT_CHUNK_SIZE = 32768
+DEFAULT_MAX_QUEUED_CHUNKS = 16
+
+
+class _Cancelled(Exception):
+    """消费方已停止读取"""
+
+
+def iter_channel(
+    channel: paramiko.Channel,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    idle_timeout: Optional[float] = None,
+    stop: Optional[threading.Event] = None,
+    max_duration: Optional[float] = None
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    同步读取通道的 stdout / stderr，直到两者结束且退出码已到达
+
+    Args:
+        channel: 已调用 exec_command 的通道
+        chunk_size: 单次读取的最大字节数
+        idle_timeout: 无输出超过该秒数时抛出 socket.timeout
+        stop: 置位后停止读取
+        max_duration: 总读取时间超过该秒数时抛出 socket.timeout（持续输出的命令不会触发 idle_timeout）
+
+    Yields:
+        Tuple[str, bytes]: ("stdout" | "stderr", 数据)
+    """
+    started = last_data = time.monotonic()
+    while stop is None or not stop.is_set():
+        if max_duration is not None and time.monotonic() - started > max_duration:
+            raise socket.timeout(f"Command still running after {max_duration}s")
+        if channel.recv_ready():
+            last_data = time.monotonic()
+            yield "stdout", channel.recv(chunk_size)
+        elif channel.recv_stderr_ready():
+            last_data = time.monotonic()
+            yield "stderr", channel.recv_stderr(chunk_size)
+        elif channel.closed or (channel.eof_received and channel.exit_status_ready()):
+            # Drain whatever arrived between the readiness checks and the exit status
+            if channel.recv_ready() or channel.recv_stderr_ready():
+                continue
+            return
+        else:
+            if idle_timeout is not None and time.monotonic() - last_data > idle_timeout:
+                raise socket.timeout(f"No output for {idle_timeout}s")
+            if channel.eof_received:
+                # After EOF the poll pipe stays readable; wait for the exit status instead
+                channel.status_event.wait(0.5)
+            else:
+                select.select([channel], [], [], 0.5)
+
+
+class ChunkEmitter:
+    """把字节块按流增量解码为 StreamChunk（多字节字符可跨块）并交给 put"""
+
+    def __init__(self, put: Callable[[StreamChunk], None]):
+        self._put = put
+        self._decoders = {
+            "stdout": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            "stderr": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+
+    def emit(self, stream: str, data: bytes, final: bool = False) -> None:
+        text = self._decoders[stream].decode(data, final)
+        if text:
+            self._put(StreamChunk(stream=stream, data=text))
+
+    def finish(self, exit_code: int) -> None:
+        """输出剩余的不完整字符，最后交付 exit 块"""
+        self.emit("stdout", b"", final=True)
+        self.emit("stderr", b"", final=True)
+        self._put(StreamChunk(stream="exit", exit_code=exit_code))
+
+
+Producer = Callable[[Callable[[StreamChunk], None], threading.Event], None]
+
+
+def _run_producer(
+    produce: Producer,
+    loop: asyncio.AbstractEventLoop,
+    queue: asyncio.Queue,
+    stop: threading.Event
+) -> None:
+    """
+    读取线程：运行 produce，把交付的块放入有界队列
+
+    队列满时 put 阻塞，produce 随之停止读取（背压）；消费方停止后 put 抛出 _Cancelled。
+    """
+    def put(chunk: Optional[StreamChunk]) -> None:
+        future = asyncio.run_coroutine_threadsafe(queue.put(chunk), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    raise _Cancelled()
+
+    try:
+        produce(put, stop)
+    except _Cancelled:
+        pass
+    except Exception as e:
+        try:
+            put(StreamChunk(stream="stderr", data=f"Stream error: {e}"))
+            put(StreamChunk(stream="exit", exit_code=-1))
+        except _Cancelled:
+            pass
+    finally:
+        try:
+            put(None)
+        except _Cancelled:
+            pass
+
+
+async def stream_blocking(
+    produce: Producer,
+    max_queued_chunks: int = DEFAULT_MAX_QUEUED_CHUNKS,
+    executor: Optional[Executor] = None,
+    close: Optional[Callable[[], None]] = None
+) -> AsyncIterator[StreamChunk]:
+    """
+    在执行器线程中运行阻塞的读取函数，以异步方式产出数据块
+
+    produce(put, stop) 在线程中逐块调用 put（队列满时阻塞），stop 置位后应尽快返回；
+    produce 抛出的异常转为 stderr 块和 exit_code=-1 的 exit 块。
+    迭代结束（包括 break / 取消）时调用 close，用于解除 produce 中阻塞的读取。
+
+    Args:
+        produce: 阻塞的读取函数
+        max_queued_chunks: 队列中最多缓存的块数
+        executor: 运行读取线程的执行器
+        close: 迭代结束时调用
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued_chunks)
+    stop = threading.Event()
+    worker = loop.run_in_executor(executor, _run_producer, produce, loop, queue, stop)
+
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        if close is not None:
+            close()
+        await asyncio.shield(worker)
+
+
+def _read_channel(
+    channel: paramiko.Channel,
+    chunk_size: int,
+    put: Callable[[StreamChunk], None],
+    stop: threading.Event
+) -> None:
+    """
+    把通道输出分块交给 put
+
+    put 阻塞时不再从通道读取；paramiko 只在读取后才调整窗口，
+    远程进程因此在窗口耗尽后暂停输出（背压）。
+    """
+    emitter = ChunkEmitter(put)
+    for stream, data in iter_channel(channel, chunk_size, stop=stop):
+        emitter.emit(stream, data)
+    if not stop.is_set():
+        emitter.finish(channel.recv_exit_status())
+
+
+def _close_channel(channel: paramiko.Channel) -> None:
+    try:
+        channel.close()
+    except (EOFError, OSError, paramiko.SSHException):
+        # Transport already gone; nothing left to release
+        pass
+
+
+async def stream_channel(
+    channel: paramiko.Channel,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_queued_chunks: int = DEFAULT_MAX_QUEUED_CHUNKS,
+    executor: Optional[Executor] = None
+) -> AsyncIterator[StreamChunk]:
+    """
+    以异步方式流式读取已执行命令的通道
+
+    内存占用上限约为 通道窗口 + max_queued_chunks * chunk_size，
+    与命令输出总量无关。最后一个块的 stream 为 "exit"，携带退出码。
+    迭代提前结束（break / 取消）时关闭通道，远程进程随之收到 SIGPIPE/EOF。
+
+    Args:
+        channel: 已调用 exec_command 的通道
+        chunk_size: 单次读取的最大字节数
+        max_queued_chunks: 队列中最多缓存的块数
+        executor: 运行读取线程的执行器
+
+    Yields:
+        StreamChunk: stdout / stderr 数据块，最后是 exit
+    """
+    chunks = stream_blocking(
+        functools.partial(_read_channel, channel, chunk_size),
+        max_queued_chunks,
+        executor,
+        close=functools.partial(_close_channel, channel)
+    )
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
@@ -16,6 +16,7 @@ from .interface import (
     FileListResult,
     ConnectionResult,
     FileTransferResult,
+    StreamChunk,
 )
 from .factory import (
     SSHClientFactory,
@@ -28,6 +29,7 @@ __all__ = [
     "ClientType",
     "CommandResult",
     "FileListResult",
+    "StreamChunk",
     "ConnectionResult",
     "FileTransferResult",
     "SSHClientFactory",
@@ -1,25 +1,107 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
+import logging
 import sys
-from typing import AsyncIterator
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Optional, TypeVar
 from pathlib import Path
 
 from ..connection_config import ConnectionConfig
-from .interface import SSHClientInterface, ClientType, CommandResult, FileListResult
+from .interface import SSHClientInterface, ClientType, CommandResult, ConnectionResult, FileListResult, StreamChunk
 
 
-def _run_async(coro):
-    """在 Windows 上使用 ProactorEventLoop 运行异步代码"""
-    if sys.platform == 'win32':
-        loop = asyncio.ProactorEventLoop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(coro)
-        finally:
-            pass
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _BackgroundLoop:
+    """
+    共享的后台事件循环线程
+
+    所有 asyncssh 连接都创建并运行在这个长期存在的循环上，
+    同步方法通过 run_coroutine_threadsafe 提交协程，
+    避免每次调用都创建/销毁事件循环，也让连接可以被跨调用复用。
+    （Windows 上 new_event_loop 默认即为 ProactorEventLoop）
+    """
+
+    _instance: Optional["_BackgroundLoop"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="asyncssh-loop", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @classmethod
+    def get(cls) -> "_BackgroundLoop":
+        """获取（必要时启动）共享循环"""
+        with cls._instance_lock:
+            if sys.is_finalizing():
+                raise RuntimeError("Interpreter is shutting down")
+            if cls._instance is None or not cls._instance._thread.is_alive():
+                cls._instance = cls()
+            return cls._instance
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+
+def _run_async(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """在共享后台循环上运行协程并等待结果（同步调用方使用）"""
+    try:
+        background = _BackgroundLoop.get()
+        if background.in_loop_thread():
+            raise RuntimeError("Synchronous AsyncSSHClient call made from the background loop; use the *_async method")
+    except RuntimeError:
+        coro.close()
+        raise
+    return asyncio.run_coroutine_threadsafe(coro, background.loop).result(timeout)
+
+
+async def _await_in_loop(coro: Awaitable[T]) -> T:
+    """在共享后台循环上运行协程，并在调用方的事件循环中等待结果"""
+    background = _BackgroundLoop.get()
+    if background.in_loop_thread():
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, background.loop))
+
+
+def asyncssh_connect_kwargs(config: ConnectionConfig) -> dict:
+    """根据连接配置构建 asyncssh.connect 参数"""
+    connect_kwargs = {
+        'host': config.host,
+        'port': config.port,
+        'username': config.username,
+        'known_hosts': None,
+        'server_host_key_algs': ['ssh-rsa', 'rsa-sha2-256', 'rsa-sha2-512', 'ssh-ed25519'],
+        'encryption_algs': (
+            'aes256-ctr,aes192-ctr,aes128-ctr,'
+            'aes256-gcm@openssh.com,aes128-gcm@openssh.com,'
+            'aes256-cbc,aes192-cbc,aes128-cbc,3des-cbc'
+        ),
+    }
+    
+    if config.auth_method == "password" and config.password:
+        connect_kwargs['password'] = config.password
+    elif config.auth_method == "private_key" and config.private_key_path:
+        connect_kwargs['client_keys'] = [str(config.private_key_path)]
+        if config.passphrase:
+            connect_kwargs['passphrase'] = config.passphrase
     else:
-        return asyncio.run(coro)
+        if config.password:
+            connect_kwargs['password'] = config.password
+    
+    return connect_kwargs
 
 
 class FabricClient(SSHClientInterface):
@@ -95,14 +177,25 @@ class FabricClient(SSHClientInterface):
                 return_code=1
             )
     
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
-        """流式执行命令"""
+    async def execute_command_stream(self, command: str) -> AsyncIterator[StreamChunk]:
+        """流式执行命令
+        
+        Connection.run 会在内存中保留全部输出，这里直接在 Fabric 底层的
+        paramiko 传输上打开通道，按块读取（有界队列，背压同 ParamikoClient）。
+        """
+        # channel_stream imports the clients package, so import it lazily
+        from ..channel_stream import stream_channel
+        
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        result = self._connection.run(command, hide=False, pty=True)
-        for line in result.stdout.splitlines():
-            yield line + "\n"
+        channel = self._connection.client.get_transport().open_session(
+            window_size=self.config.stream_window_size
+        )
+        channel.exec_command(command)
+        
+        async for chunk in stream_channel(channel):
+            yield chunk
     
     def upload_file(self, local_path: str, remote_path: str) -> dict:
         """上传文件"""
@@ -146,7 +239,11 @@ class FabricClient(SSHClientInterface):
 
 
 class AsyncSSHClient(SSHClientInterface):
-    """基于 AsyncSSH 的异步 SSH 客户端"""
+    """基于 AsyncSSH 的异步 SSH 客户端
+    
+    连接由共享的后台事件循环持有：同步方法和 *_async 方法
+    都把协程提交到该循环，因此连接可以被连接池等同步调用方长期复用。
+    """
     
     def __init__(self, config: ConnectionConfig):
         self.config = config
@@ -158,75 +255,53 @@ class AsyncSSHClient(SSHClientInterface):
     
     @property
     def is_connected(self) -> bool:
-        return self._connection is not None
+        return self._connection is not None and not self._connection.is_closed()
     
-    def connect(self, timeout: int = 30) -> None:
-        """同步连接（异步版本）"""
+    async def _connect(self, timeout: int) -> ConnectionResult:
+        """在后台循环上建立连接"""
         try:
             import asyncssh
-            import sys
-            
-            connect_kwargs = {
-                'host': self.config.host,
-                'port': self.config.port,
-                'username': self.config.username,
-                'known_hosts': None,
-                'server_host_key_algs': ['ssh-rsa', 'rsa-sha2-256', 'rsa-sha2-512', 'ssh-ed25519'],
-                'encryption_algs': (
-                    'aes256-ctr,aes192-ctr,aes128-ctr,'
-                    'aes256-gcm@openssh.com,aes128-gcm@openssh.com,'
-                    'aes256-cbc,aes192-cbc,aes128-cbc,3des-cbc'
-                ),
-            }
-            
-            if self.config.auth_method == "password" and self.config.password:
-                connect_kwargs['password'] = self.config.password
-            elif self.config.auth_method == "private_key" and self.config.private_key_path:
-                connect_kwargs['client_keys'] = [str(self.config.private_key_path)]
-                if self.config.passphrase:
-                    connect_kwargs['passphrase'] = self.config.passphrase
-            else:
-                if self.config.password:
-                    connect_kwargs['password'] = self.config.password
-            
-            if sys.platform == 'win32':
-                import asyncio
-                loop = asyncio.ProactorEventLoop()
-                asyncio.set_event_loop(loop)
-                try:
-                    self._connection = loop.run_until_complete(asyncssh.connect(**connect_kwargs))
-                finally:
-                    pass
-            else:
-                async def do_connect():
-                    return await asyncssh.connect(**connect_kwargs)
-                self._connection = _run_async(do_connect())
         except ImportError:
             raise ImportError("AsyncSSH is not installed. Install with: pip install asyncssh")
+        
+        if self.is_connected:
+            return ConnectionResult(success=True, message="Already connected")
+        
+        start_time = time.time()
+        try:
+            self._connection = await asyncio.wait_for(
+                asyncssh.connect(**asyncssh_connect_kwargs(self.config)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            return ConnectionResult(
+                success=False,
+                message=f"Connection to {self.config.host}:{self.config.port} timed out after {timeout}s"
+            )
+        except (OSError, asyncssh.Error) as e:
+            return ConnectionResult(success=False, message=f"Connection failed: {str(e)}")
+        
+        return ConnectionResult(
+            success=True,
+            message=f"Connected to {self.config.host}:{self.config.port}",
+            latency_ms=(time.time() - start_time) * 1000
+        )
     
-    async def connect_async(self, timeout: int = 30) -> None:
+    def connect(self, timeout: int = 30) -> ConnectionResult:
+        """同步连接"""
+        return _run_async(self._connect(timeout))
+    
+    async def connect_async(self, timeout: int = 30) -> ConnectionResult:
         """异步连接"""
-        try:
-            import asyncssh
-            
-            connect_kwargs = {
-                'host': self.config.host,
-                'port': self.config.port,
-                'username': self.config.username,
-                'client_keys': None,
-                'known_hosts': None,
-            }
-            
-            if self.config.auth_method == "password" and self.config.password:
-                connect_kwargs['password'] = self.config.password
-            elif self.config.auth_method == "private_key" and self.config.private_key_path:
-                connect_kwargs['client_keys'] = [str(self.config.private_key_path)]
-                if self.config.passphrase:
-                    connect_kwargs['passphrase'] = self.config.passphrase
-            
-            self._connection = await asyncssh.connect(**connect_kwargs)
-        except ImportError:
-            raise ImportError("AsyncSSH is not installed. Install with: pip install asyncssh")
+        return await _await_in_loop(self._connect(timeout))
+    
+    async def _run(self, command: str, timeout: int) -> CommandResult:
+        result = await self._connection.run(command, timeout=timeout, check=False)
+        return CommandResult(
+            stdout=result.stdout or "",
+            stderr=result.stderr or "",
+            return_code=result.exit_status if result.exit_status is not None else -1
+        )
     
     def execute_command(self, command: str, timeout: int = 30, background: bool = False) -> CommandResult:
         """执行命令
@@ -239,67 +314,99 @@ class AsyncSSHClient(SSHClientInterface):
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        import sys
         if background:
             # AsyncSSH: run in background
-            bg_command = f"nohup {command} > /dev/null 2>&1 &"
-            if sys.platform == 'win32':
-                import asyncio
-                loop = asyncio.ProactorEventLoop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(self._connection.run(bg_command, timeout=timeout))
-            else:
-                _run_async(self._connection.run(bg_command, timeout=timeout))
+            _run_async(self._run(f"nohup {command} > /dev/null 2>&1 &", timeout))
             return CommandResult(
                 stdout="Command started in background",
                 stderr="",
                 return_code=0
             )
         
-        if sys.platform == 'win32':
-            import asyncio
-            loop = asyncio.ProactorEventLoop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(self._connection.run(command, timeout=timeout))
-        else:
-            result = _run_async(self._connection.run(command, timeout=timeout))
-        return CommandResult(
-            stdout=result.stdout,
-            stderr=result.stderr,
-            return_code=result.exit_code
-        )
+        return _run_async(self._run(command, timeout))
     
     async def execute_command_async(self, command: str, timeout: int = 30) -> CommandResult:
         """异步执行命令"""
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        result = await self._connection.run(command, timeout=timeout)
-        return CommandResult(
-            stdout=result.stdout,
-            stderr=result.stderr,
-            return_code=result.exit_code
-        )
+        return await _await_in_loop(self._run(command, timeout))
     
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
-        """流式执行命令"""
+    def execute_command_stream(
+        self,
+        command: str,
+        chunk_size: int = 32768,
+        max_queued_chunks: int = 16
+    ) -> AsyncIterator[StreamChunk]:
+        """流式执行命令
+        
+        进程运行在后台循环上，stdout / stderr 数据块经有界队列转交到调用方的事件循环；
+        队列满时停止读取，asyncssh 的流控随之暂停通道窗口（背压）。
+        提前停止迭代会终止远程进程。
+        """
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
+        connection = self._connection
+        
         async def stream():
-            async with self._connection.create_process(command) as process:
-                async for line in process.stdout:
-                    yield line
+            caller_loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued_chunks)
+            
+            async def relay(chunk: Optional[StreamChunk]) -> None:
+                await asyncio.wrap_future(
+                    asyncio.run_coroutine_threadsafe(queue.put(chunk), caller_loop)
+                )
+            
+            async def pump(reader, name: str) -> None:
+                while True:
+                    data = await reader.read(chunk_size)
+                    if not data:
+                        return
+                    await relay(StreamChunk(stream=name, data=data))
+            
+            async def produce():
+                try:
+                    async with connection.create_process(command, errors="replace") as process:
+                        await asyncio.gather(
+                            pump(process.stdout, "stdout"),
+                            pump(process.stderr, "stderr")
+                        )
+                        await process.wait(check=False)
+                        await relay(StreamChunk(
+                            stream="exit",
+                            exit_code=process.exit_status if process.exit_status is not None else -1
+                        ))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    await relay(StreamChunk(stream="stderr", data=f"Stream error: {e}"))
+                    await relay(StreamChunk(stream="exit", exit_code=-1))
+                await relay(None)
+            
+            producer = asyncio.run_coroutine_threadsafe(produce(), _BackgroundLoop.get().loop)
+            try:
+                while True:
+                    chunk = await queue.get()
+                    if chunk is None:
+                        break
+                    yield chunk
+            finally:
+                producer.cancel()
         
         return stream()
     
+    async def _scp(self, source, destination) -> None:
+        import asyncssh
+        await asyncssh.scp(source, destination)
+    
     def upload_file(self, local_path: str, remote_path: str) -> dict:
         """上传文件"""
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
         try:
-            _run_async(self._connection.scp(local_path, remote_path))
+            _run_async(self._scp(local_path, (self._connection, remote_path)))
             return {"success": True, "message": f"File uploaded: {local_path} -> {remote_path}"}
         except Exception as e:
             return {"success": False, "message": f"Upload failed: {str(e)}"}
@@ -310,7 +417,7 @@ class AsyncSSHClient(SSHClientInterface):
             raise ConnectionError("Not connected to SSH server")
         
         try:
-            await self._connection.scp(local_path, remote_path)
+            await _await_in_loop(self._scp(local_path, (self._connection, remote_path)))
             return {"success": True, "message": f"File uploaded: {local_path} -> {remote_path}"}
         except Exception as e:
             return {"success": False, "message": f"Upload failed: {str(e)}"}
@@ -321,7 +428,7 @@ class AsyncSSHClient(SSHClientInterface):
             raise ConnectionError("Not connected to SSH server")
         
         try:
-            _run_async(self._connection.scp(remote_path, local_path))
+            _run_async(self._scp((self._connection, remote_path), local_path))
             return {"success": True, "message": f"File downloaded: {remote_path} -> {local_path}"}
         except Exception as e:
             return {"success": False, "message": f"Download failed: {str(e)}"}
@@ -332,7 +439,7 @@ class AsyncSSHClient(SSHClientInterface):
             raise ConnectionError("Not connected to SSH server")
         
         try:
-            await self._connection.scp(remote_path, local_path)
+            await _await_in_loop(self._scp((self._connection, remote_path), local_path))
             return {"success": True, "message": f"File downloaded: {remote_path} -> {local_path}"}
         except Exception as e:
             return {"success": False, "message": f"Download failed: {str(e)}"}
@@ -343,23 +450,35 @@ class AsyncSSHClient(SSHClientInterface):
             raise ConnectionError("Not connected to SSH server")
         
         try:
-            result = _run_async(self._connection.run(f"ls -la {remote_path}"))
+            result = _run_async(self._run(f"ls -la {remote_path}", 30))
             files = [line.split()[-1] for line in result.stdout.splitlines() if line.strip()]
             return FileListResult(files=files, path=remote_path)
         except Exception:
             return FileListResult(files=[], path=remote_path)
     
+    async def _close(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+            await connection.wait_closed()
+    
     def close(self) -> None:
         """关闭连接"""
         if self._connection:
-            _run_async(self._connection.close())
-            self._connection = None
+            try:
+                _run_async(self._close(), timeout=10)
+            except RuntimeError:
+                # 解释器退出时后台循环已停止，直接丢弃连接
+                self._connection = None
+            except concurrent.futures.TimeoutError:
+                # 断开较慢时不再等待，关闭在后台循环上继续完成
+                logger.debug(f"Timed out waiting for asyncssh connection to {self.config.host} to close")
+                self._connection = None
     
     async def close_async(self) -> None:
         """异步关闭连接"""
         if self._connection:
-            await self._connection.close()
-            self._connection = None
+            await _await_in_loop(self._close())
 
     def disconnect(self) -> None:
         """断开 SSH 连接"""
@@ -375,7 +494,7 @@ class AsyncSSHClient(SSHClientInterface):
             "host": self.config.host,
             "port": self.config.port,
             "client_type": "asyncssh",
-            "remote_version": "unknown",
+            "remote_version": self._connection.get_extra_info("server_version", "unknown"),
             "cipher": "unknown",
             "kex": "unknown",
         }
@@ -477,24 +596,64 @@ class SystemSSHClient(SSHClientInterface):
                 return_code=1
             )
     
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
-        """流式执行命令"""
+    async def execute_command_stream(
+        self,
+        command: str,
+        chunk_size: int = 32768,
+        max_queued_chunks: int = 16
+    ) -> AsyncIterator[StreamChunk]:
+        """流式执行命令
+        
+        ssh 子进程的 stdout / stderr 同时读取，数据块经有界队列交给调用方；
+        队列满时停止读取管道，ssh 进程随之阻塞（背压）。提前停止迭代会终止子进程。
+        """
+        import codecs
         import subprocess
         
         ssh_cmd = self._build_ssh_command(command)
-        
-        process = subprocess.Popen(
-            ssh_cmd,
+        process = await asyncio.create_subprocess_exec(
+            *ssh_cmd,
+            stdin=subprocess.DEVNULL,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            stderr=subprocess.PIPE
         )
-        
-        for line in process.stdout:
-            yield line
-        
-        process.wait()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued_chunks)
+        
+        async def pump(reader: asyncio.StreamReader, name: str) -> None:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                data = await reader.read(chunk_size)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    await queue.put(StreamChunk(stream=name, data=text))
+                if not data:
+                    return
+        
+        async def produce():
+            try:
+                await asyncio.gather(pump(process.stdout, "stdout"), pump(process.stderr, "stderr"))
+                await queue.put(StreamChunk(stream="exit", exit_code=await process.wait()))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await queue.put(StreamChunk(stream="stderr", data=f"Stream error: {e}"))
+                await queue.put(StreamChunk(stream="exit", exit_code=-1))
+            await queue.put(None)
+        
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            producer.cancel()
+            if process.returncode is None:
+                process.kill()
+            await asyncio.gather(producer, return_exceptions=True)
+            # Read what is left in the pipes so they close and the transport can finish
+            await process.communicate()
     
     def upload_file(self, local_path: str, remote_path: str) -> dict:
         """上传文件（使用 scp，带路径验证）"""
@@ -678,16 +837,44 @@ class SSH2Client(SSHClientInterface):
                 return_code=1
             )
     
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
-        """流式执行命令"""
+    async def execute_command_stream(self, command: str) -> AsyncIterator[StreamChunk]:
+        """流式执行命令
+        
+        ssh2 的读取是阻塞的，在线程池中进行，数据块经有界队列交给调用方；
+        队列满时停止读取（背压）。ssh2 会话不是线程安全的，通道只在读取线程中关闭，
+        提前停止迭代时读取线程在下一块数据到达后退出。
+        """
+        # channel_stream imports the clients package, so import it lazily
+        from ..channel_stream import ChunkEmitter, stream_blocking
+        
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        stdin, stdout, stderr = self._session.command(command)
-        
-        for line in stdout:
-            yield line.decode('utf-8', errors='replace')
-    
+        session = self._session
+        
+        def produce(put, stop) -> None:
+            emitter = ChunkEmitter(put)
+            stdin, stdout, stderr = session.command(command)
+            channel = stdout.channel
+            try:
+                for stream, reader in (("stdout", stdout), ("stderr", stderr)):
+                    for data in reader:
+                        if stop.is_set():
+                            return
+                        emitter.emit(stream, data)
+            finally:
+                # 退出码在通道关闭后才可靠
+                channel.close()
+                channel.wait_closed()
+            emitter.finish(channel.get_exit_status())
+        
+        chunks = stream_blocking(produce)
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
     def upload_file(self, local_path: str, remote_path: str) -> dict:
         """上传文件"""
         if not self.is_connected:
@@ -22,6 +22,18 @@ class CommandResult:
     return_code: int
 
 
+@dataclass
+class StreamChunk:
+    """流式输出数据块
+
+    stream 为 "stdout" / "stderr" 时 data 为输出文本；
+    最后一个块的 stream 为 "exit"，exit_code 为命令退出码。
+    """
+    stream: str
+    data: str = ""
+    exit_code: Optional[int] = None
+
+
 @dataclass
 class FileListResult:
     """目录列表结果"""
@@ -45,6 +57,10 @@ class FileTransferResult:
     message: str = ""
     bytes_transferred: int = 0
     duration_ms: float = 0.0
+    throughput_mb_per_sec: float = 0.0
+    resumed_from: int = 0
+    files_transferred: int = 0
+    transfer_mode: str = ""
 
 
 class SSHClientInterface(ABC):
@@ -98,14 +114,14 @@ class SSHClientInterface(ABC):
         pass
     
     @abstractmethod
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
+    def execute_command_stream(self, command: str) -> AsyncIterator[StreamChunk]:
         """流式执行命令（用于大输出）
         
         Args:
             command: 要执行的命令
             
         Yields:
-            str: 命令输出的每一行
+            StreamChunk: stdout / stderr 数据块，最后一个块携带退出码
         """
         pass
     
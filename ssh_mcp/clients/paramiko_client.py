@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import os
 import time
 from typing import AsyncIterator
-from pathlib import Path
 
 import paramiko
 from paramiko import SSHClient, AutoAddPolicy
@@ -10,13 +10,17 @@ from paramiko import SSHClient, AutoAddPolicy
 from ..connection_config import ConnectionConfig
 from ..exceptions import ConnectionException, CommandExecutionException, FileTransferException
 from ..logging_config import get_logger
+from ..sftp_manager import SFTPChannelCache
+from ..transfer_engine import SFTPTransferEngine
+from ..tar_stream import DirectoryTransfer, TarStreamer, is_remote_directory
 from .interface import (
     SSHClientInterface, 
     ClientType, 
     CommandResult, 
     FileListResult,
     ConnectionResult,
-    FileTransferResult
+    FileTransferResult,
+    StreamChunk
 )
 
 
@@ -35,6 +39,18 @@ class ParamikoClient(SSHClientInterface):
         self.config = config
         self.client: SSHClient | None = None
         self._logger = get_logger(f"ParamikoClient.{config.host}")
+        self._sftp = SFTPChannelCache(lambda: self.client, name=config.host)
+        self._transfer = SFTPTransferEngine(
+            self._sftp,
+            lambda: self.client.open_sftp(),
+            command_runner=self._run_transfer_command,
+            identity=f"{config.username}@{config.host}:{config.port}"
+        )
+        self._directories = DirectoryTransfer(
+            self._transfer,
+            TarStreamer(lambda: self.client.get_transport().open_session()),
+            self._run_transfer_command
+        )
     
     @property
     def client_type(self) -> ClientType:
@@ -168,10 +184,10 @@ class ParamikoClient(SSHClientInterface):
                     return_code=0
                 )
             
-            # 前台执行：等待命令完成
-            return_code = stdout.channel.recv_exit_status()
+            # 前台执行：先读完输出再取退出码，避免输出超过窗口大小时阻塞
             stdout_data = stdout.read().decode('utf-8', errors='replace')
             stderr_data = stderr.read().decode('utf-8', errors='replace')
+            return_code = stdout.channel.recv_exit_status()
             
             return CommandResult(
                 stdout=stdout_data,
@@ -187,32 +203,51 @@ class ParamikoClient(SSHClientInterface):
                 original_error=e
             )
     
-    def execute_command_stream(self, command: str) -> AsyncIterator[str]:
+    async def execute_command_stream(self, command: str) -> AsyncIterator[StreamChunk]:
         """流式执行命令（用于大输出）
         
+        输出按块到达即返回，内存占用受通道窗口和队列上限约束；
+        提前停止迭代会关闭通道。
+        
         Args:
             command: 要执行的命令
             
         Yields:
-            str: 命令输出的每一行
+            StreamChunk: stdout / stderr 数据块，最后一个块携带退出码
         """
+        # channel_stream imports the clients package, so import it lazily
+        from ..channel_stream import stream_channel
+        
         if not self.is_connected:
             raise CommandExecutionException(
                 "Not connected to SSH server",
                 command=command
             )
         
-        stdin, stdout, stderr = self.client.exec_command(command)
+        channel = self.client.get_transport().open_session(
+            window_size=self.config.stream_window_size
+        )
+        channel.exec_command(command)
         
-        for line in stdout:
-            yield line.decode('utf-8', errors='replace')
+        async for chunk in stream_channel(channel):
+            yield chunk
     
-    def upload_file(self, local_path: str, remote_path: str) -> FileTransferResult:
-        """上传文件
+    def upload_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> FileTransferResult:
+        """上传文件或目录
         
         Args:
-            local_path: 本地文件路径
+            local_path: 本地文件路径（目录时整体传输）
             remote_path: 远程目标路径
+            resume: 远程已有部分文件时是否断点续传（仅单个文件）
+            mode: 目录传输方式 auto / sftp / tar（auto 按文件数选择）
+            compression: tar 流压缩方式 none / gzip / zstd
             
         Returns:
             FileTransferResult: 传输结果
@@ -223,27 +258,24 @@ class ParamikoClient(SSHClientInterface):
                 message="Not connected to SSH server"
             )
         
-        start_time = time.time()
-        
         try:
-            sftp = self.client.open_sftp()
-            sftp.put(local_path, remote_path)
-            sftp.close()
-            
-            local_file = Path(local_path)
-            bytes_transferred = local_file.stat().st_size if local_file.exists() else 0
-            duration_ms = (time.time() - start_time) * 1000
-            
-            self._logger.info(
-                f"Uploaded {local_path} -> {remote_path} "
-                f"({bytes_transferred} bytes, {duration_ms:.2f}ms)"
-            )
+            if os.path.isdir(local_path):
+                used_mode, stats = self._directories.upload(local_path, remote_path, mode=mode, compression=compression)
+                message = f"Directory uploaded ({used_mode}): {local_path} -> {remote_path}"
+            else:
+                used_mode = "sftp"
+                stats = self._transfer.upload(local_path, remote_path, resume=resume)
+                message = f"File uploaded: {local_path} -> {remote_path}"
             
             return FileTransferResult(
                 success=True,
-                message=f"File uploaded: {local_path} -> {remote_path}",
-                bytes_transferred=bytes_transferred,
-                duration_ms=duration_ms
+                message=message,
+                bytes_transferred=stats.bytes_transferred,
+                duration_ms=stats.duration_ms,
+                throughput_mb_per_sec=stats.throughput_mb_per_sec,
+                resumed_from=stats.resumed_from,
+                files_transferred=stats.files,
+                transfer_mode=used_mode
             )
             
         except Exception as e:
@@ -253,12 +285,22 @@ class ParamikoClient(SSHClientInterface):
                 message=f"Upload failed: {str(e)}"
             )
     
-    def download_file(self, remote_path: str, local_path: str) -> FileTransferResult:
-        """下载文件
+    def download_file(
+        self,
+        remote_path: str,
+        local_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> FileTransferResult:
+        """下载文件或目录
         
         Args:
-            remote_path: 远程文件路径
+            remote_path: 远程文件路径（目录时整体传输）
             local_path: 本地目标路径
+            resume: 本地已有部分文件时是否断点续传（仅单个文件）
+            mode: 目录传输方式 auto / sftp / tar（auto 按文件数选择）
+            compression: tar 流压缩方式 none / gzip / zstd
             
         Returns:
             FileTransferResult: 传输结果
@@ -269,27 +311,24 @@ class ParamikoClient(SSHClientInterface):
                 message="Not connected to SSH server"
             )
         
-        start_time = time.time()
-        
         try:
-            sftp = self.client.open_sftp()
-            sftp.get(remote_path, local_path)
-            sftp.close()
-            
-            local_file = Path(local_path)
-            bytes_transferred = local_file.stat().st_size if local_file.exists() else 0
-            duration_ms = (time.time() - start_time) * 1000
-            
-            self._logger.info(
-                f"Downloaded {remote_path} -> {local_path} "
-                f"({bytes_transferred} bytes, {duration_ms:.2f}ms)"
-            )
+            if self._sftp.run(lambda sftp: is_remote_directory(sftp, remote_path)):
+                used_mode, stats = self._directories.download(remote_path, local_path, mode=mode, compression=compression)
+                message = f"Directory downloaded ({used_mode}): {remote_path} -> {local_path}"
+            else:
+                used_mode = "sftp"
+                stats = self._transfer.download(remote_path, local_path, resume=resume)
+                message = f"File downloaded: {remote_path} -> {local_path}"
             
             return FileTransferResult(
                 success=True,
-                message=f"File downloaded: {remote_path} -> {local_path}",
-                bytes_transferred=bytes_transferred,
-                duration_ms=duration_ms
+                message=message,
+                bytes_transferred=stats.bytes_transferred,
+                duration_ms=stats.duration_ms,
+                throughput_mb_per_sec=stats.throughput_mb_per_sec,
+                resumed_from=stats.resumed_from,
+                files_transferred=stats.files,
+                transfer_mode=used_mode
             )
             
         except Exception as e:
@@ -299,6 +338,17 @@ class ParamikoClient(SSHClientInterface):
                 message=f"Download failed: {str(e)}"
             )
     
+    def _run_transfer_command(self, command: str, timeout: int) -> str:
+        """执行传输辅助命令（如远程校验和），失败时抛出异常"""
+        result = self.execute_command(command, timeout=timeout)
+        if result.return_code != 0:
+            raise CommandExecutionException(
+                f"Transfer helper command failed: {result.stderr.strip()}",
+                command=command,
+                return_code=result.return_code
+            )
+        return result.stdout
+    
     def list_directory(self, remote_path: str = ".") -> FileListResult:
         """列出目录内容
         
@@ -315,9 +365,7 @@ class ParamikoClient(SSHClientInterface):
             )
         
         try:
-            sftp = self.client.open_sftp()
-            files = sftp.listdir(remote_path)
-            sftp.close()
+            files = self._sftp.run(lambda sftp: sftp.listdir(remote_path))
             return FileListResult(
                 files=files,
                 path=remote_path
@@ -343,7 +391,8 @@ class ParamikoClient(SSHClientInterface):
                 "server_key_type": None,
                 "remote_version": None,
                 "local_version": None,
-                "keepalive_interval": self.config.keepalive_interval
+                "keepalive_interval": self.config.keepalive_interval,
+                "sftp_open_count": self._sftp.open_count
             }
         
         transport = self.client.get_transport()
@@ -357,6 +406,7 @@ class ParamikoClient(SSHClientInterface):
             "local_version": transport.local_version if transport else None,
             "keepalive_interval": self.config.keepalive_interval,
             "session_timeout": self.config.session_timeout,
+            "sftp_open_count": self._sftp.open_count,
             "socket": {
                 "timeout": self.config.timeout,
                 "compress": self.config.compress
@@ -365,6 +415,7 @@ class ParamikoClient(SSHClientInterface):
     
     def close(self) -> None:
         """关闭连接"""
+        self._sftp.close()
         if self.client:
             try:
                 self.client.close()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import re
+import shlex
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+@dataclass
+class FramedResult:
+    """分帧脚本中单条命令的结果"""
+    index: int
+    command: str
+    stdout: str
+    stderr: str
+    exit_code: int
+    cwd: Optional[str] = None
+
+
+def new_marker() -> str:
+    """生成不会出现在正常输出中的分隔标记"""
+    return f"__MCP_{uuid.uuid4().hex}__"
+
+
+def frame_command(command: str, marker: str, index: int = 0) -> str:
+    """
+    把一条命令包装为带起止标记的脚本片段
+
+    - 命令通过 eval 执行，语法错误只影响本命令，结束标记仍会输出
+    - 标准输入重定向到 /dev/null，命令不会读走后续脚本
+    - stdout 的结束标记携带退出码和当前目录，stderr 单独输出结束标记
+    - 结束标记前总是先输出一个换行，解析时去掉，保证输出与原样一致
+    """
+    start = shlex.quote(f"{marker}:{index}:start")
+    end = shlex.quote(f"{marker}:{index}:end")
+    return (
+        f"printf '%s\\n' {start}; printf '%s\\n' {start} >&2\n"
+        f"eval {shlex.quote(command)} </dev/null\n"
+        f"__mcp_rc=$?\n"
+        f"printf '\\n%s %d %s\\n' {end} \"$__mcp_rc\" \"$PWD\"; printf '\\n%s\\n' {end} >&2\n"
+    )
+
+
+def frame_script(commands: List[str], marker: str, stop_on_error: bool = False) -> str:
+    """
+    把多条命令包装为一个分帧脚本，在同一个 shell 中依次执行
+
+    Args:
+        commands: 命令列表
+        marker: 分隔标记
+        stop_on_error: 某条命令失败后跳过其余命令
+    """
+    parts = []
+    for index, command in enumerate(commands):
+        parts.append(frame_command(command, marker, index))
+        if stop_on_error:
+            parts.append('[ "$__mcp_rc" -eq 0 ] || exit "$__mcp_rc"\n')
+    return "".join(parts)
+
+
+def end_seen(stdout: bytes, stderr: bytes, marker: str, index: int = 0, window: int = 8192) -> bool:
+    """
+    两个输出流是否都已出现指定命令的结束标记（结束行须完整）
+
+    结束行是命令写出的最后内容，只在末尾 window 字节内查找，
+    避免输出增长时反复扫描整个缓冲区。
+    """
+    end = f"\n{marker}:{index}:end".encode()
+    tail = stdout[-(len(end) + window):]
+    position = tail.rfind(end + b" ")
+    if position < 0 or tail.find(b"\n", position + len(end)) < 0:
+        return False
+    return stderr[-(len(end) + window):].rfind(end + b"\n") >= 0
+
+
+def _split_stream(data: str, marker: str, with_status: bool) -> Dict[int, Tuple[str, Optional[int], Optional[str]]]:
+    """按标记切分一个输出流，返回 {index: (输出, 退出码, 目录)}"""
+    sections: Dict[int, Tuple[str, Optional[int], Optional[str]]] = {}
+    start_pattern = re.compile(rf"{re.escape(marker)}:(\d+):start\n")
+    for match in start_pattern.finditer(data):
+        index = int(match.group(1))
+        body_start = match.end()
+        end_token = f"\n{marker}:{index}:end"
+        end_position = data.find(end_token, body_start)
+        if end_position < 0:
+            # 结束标记缺失（命令未完成或 shell 已退出）：保留已有输出
+            sections[index] = (data[body_start:], None, None)
+            continue
+        output = data[body_start:end_position]
+        exit_code: Optional[int] = None
+        cwd: Optional[str] = None
+        if with_status:
+            line_end = data.find("\n", end_position + len(end_token))
+            status = data[end_position + len(end_token):line_end if line_end >= 0 else None].strip(" ")
+            code, _, cwd = status.partition(" ")
+            try:
+                exit_code = int(code)
+            except ValueError:
+                exit_code = None
+        sections[index] = (output, exit_code, cwd or None)
+    return sections
+
+
+def parse_frames(stdout: str, stderr: str, marker: str, commands: List[str]) -> List[FramedResult]:
+    """
+    解析分帧脚本的输出
+
+    没有输出起始标记的命令（未执行）不出现在结果中；
+    有起始标记但缺少结束标记的命令 exit_code 为 -1。
+    """
+    out_sections = _split_stream(stdout, marker, with_status=True)
+    err_sections = _split_stream(stderr, marker, with_status=False)
+    results = []
+    for index, command in enumerate(commands):
+        if index not in out_sections:
+            continue
+        out, exit_code, cwd = out_sections[index]
+        err = err_sections.get(index, ("", None, None))[0]
+        results.append(FramedResult(
+            index=index,
+            command=command,
+            stdout=out,
+            stderr=err,
+            exit_code=exit_code if exit_code is not None else -1,
+            cwd=cwd
+        ))
+    return results
+
+
+_MARKER_LINE = re.compile(r":(\d+):(start|end)(.*)$")
+
+
+class FrameSplitter:
+    """
+    增量切分一个输出流中的分帧输出
+
+    每条命令的输出交给 new_sink(index) 创建的接收者（需提供 feed(bytes)），
+    不在内存中保留整个流，输出预算由接收者控制（例如 OutputCapture）。
+    结束标记前由分帧脚本补上的换行不会交给接收者；标记之外的输出被丢弃。
+    """
+
+    def __init__(self, marker: str, new_sink: Callable[[int], Any], with_status: bool = False):
+        self._marker = marker.encode()
+        self._new_sink = new_sink
+        self._with_status = with_status
+        self._pending = bytearray()
+        self._current: Optional[int] = None
+        # 已开始的命令 -> 接收者；已结束的命令 -> (退出码, 目录)
+        self.sinks: Dict[int, Any] = {}
+        self.ended: Dict[int, Tuple[Optional[int], Optional[str]]] = {}
+
+    def feed(self, data: bytes) -> None:
+        """追加一段输出"""
+        self._pending += data
+        while True:
+            position = self._pending.find(self._marker)
+            if position < 0:
+                # 末尾可能是被拆开的标记（连同其前面的换行），留到下次
+                self._consume(len(self._pending) - len(self._marker))
+                return
+            line_end = self._pending.find(b"\n", position)
+            if line_end < 0:
+                self._consume(position - 1)
+                return
+            line = bytes(self._pending[position + len(self._marker):line_end]).decode("utf-8", errors="replace")
+            self._on_marker(position, line_end, line)
+            del self._pending[:line_end + 1]
+
+    def close(self) -> None:
+        """流结束：剩余输出归入未结束的命令"""
+        self._consume(len(self._pending))
+
+    def _emit(self, end: int) -> None:
+        if end > 0 and self._current is not None:
+            self.sinks[self._current].feed(bytes(self._pending[:end]))
+
+    def _consume(self, end: int) -> None:
+        if end > 0:
+            self._emit(end)
+            del self._pending[:end]
+
+    def _on_marker(self, position: int, line_end: int, line: str) -> None:
+        match = _MARKER_LINE.match(line)
+        if match is None:
+            # 不是完整的标记行：按普通输出处理
+            self._emit(line_end + 1)
+            return
+        index, kind, status = int(match.group(1)), match.group(2), match.group(3)
+        if kind == "start":
+            self._emit(position)
+            self._current = index
+            self.sinks[index] = self._new_sink(index)
+            return
+
+        self._emit(position - 1 if position > 0 and self._pending[position - 1] == 0x0A else position)
+        self._current = None
+        exit_code: Optional[int] = None
+        cwd: Optional[str] = None
+        if self._with_status:
+            code, _, cwd = status.strip(" ").partition(" ")
+            try:
+                exit_code = int(code)
+            except ValueError:
+                exit_code = None
+        self.ended[index] = (exit_code, cwd or None)
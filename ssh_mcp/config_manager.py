@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict
 from pydantic import BaseModel
 
 
@@ -24,10 +24,13 @@ class SSHHost(BaseModel):
     keepalive_interval: int = 30
     session_timeout: int = 7200
     banner_timeout: int = 60
+    tags: List[str] = []
 
 
 class ServerConfig(BaseModel):
     ssh_hosts: List[SSHHost] = []
+    # 主机组：组名 -> 成员列表（主机名、"tag:标签" 或 "group:其他组名"）
+    host_groups: Dict[str, List[str]] = {}
 
 
 class ConfigManager:
@@ -84,7 +87,10 @@ class ConfigManager:
                 with open(server_config_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                 if "ssh_hosts" in data:
-                    return ServerConfig(ssh_hosts=[SSHHost(**h) for h in data["ssh_hosts"]])
+                    return ServerConfig(
+                        ssh_hosts=[SSHHost(**h) for h in data["ssh_hosts"]],
+                        host_groups=data.get("host_groups", {})
+                    )
             except Exception:
                 pass
         
@@ -95,7 +101,10 @@ class ConfigManager:
                 with open(hosts_config_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
                 if "ssh_hosts" in data:
-                    return ServerConfig(ssh_hosts=[SSHHost(**h) for h in data["ssh_hosts"]])
+                    return ServerConfig(
+                        ssh_hosts=[SSHHost(**h) for h in data["ssh_hosts"]],
+                        host_groups=data.get("host_groups", {})
+                    )
             except Exception:
                 pass
         
@@ -116,6 +125,64 @@ class ConfigManager:
             return []
         return server_config.ssh_hosts
     
+    def list_groups(self) -> Dict[str, List[str]]:
+        server_config = self.load_server_config()
+        if not server_config:
+            return {}
+        return server_config.host_groups
+    
+    def resolve_hosts(
+        self,
+        names: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        groups: Optional[List[str]] = None
+    ) -> List[SSHHost]:
+        """
+        按主机名、标签和主机组选出主机（去重，保持配置文件中的顺序）
+        
+        组成员可以是主机名、"tag:标签" 或 "group:其他组名"；
+        未定义的 "all" 组表示全部主机。
+        
+        Raises:
+            ValueError: 主机名或组名不存在
+        """
+        server_config = self.load_server_config() or ServerConfig()
+        by_name = {host.name: host for host in server_config.ssh_hosts}
+        selected: set = set()
+        
+        def select_name(name: str) -> None:
+            if name not in by_name:
+                raise ValueError(f"Unknown host: {name}")
+            selected.add(name)
+        
+        def select_tag(tag: str) -> None:
+            selected.update(host.name for host in server_config.ssh_hosts if tag in host.tags)
+        
+        def select_group(group: str, seen: tuple = ()) -> None:
+            if group in seen:
+                raise ValueError(f"Host group cycle: {' -> '.join(seen + (group,))}")
+            if group not in server_config.host_groups:
+                if group == "all":
+                    selected.update(by_name)
+                    return
+                raise ValueError(f"Unknown host group: {group}")
+            for member in server_config.host_groups[group]:
+                if member.startswith("tag:"):
+                    select_tag(member[4:])
+                elif member.startswith("group:"):
+                    select_group(member[6:], seen + (group,))
+                else:
+                    select_name(member)
+        
+        for name in names or []:
+            select_name(name)
+        for tag in tags or []:
+            select_tag(tag)
+        for group in groups or []:
+            select_group(group)
+        
+        return [host for host in server_config.ssh_hosts if host.name in selected]
+    
     def add_host(self, host: SSHHost) -> None:
         """Add a new SSH host to config/hosts.json"""
         config_path = self.DEFAULT_HOSTS_CONFIG_PATH
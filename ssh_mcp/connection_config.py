@@ -34,6 +34,16 @@ class ConnectionConfig(BaseModel):
     session_timeout: int = Field(default=7200, description="Session timeout in seconds (default: 2 hours)")
     client_type: ClientType = Field(default="asyncssh", description="SSH client implementation to use")
     banner_timeout: int = Field(default=60, description="Banner timeout in seconds")
+    multiplex_channels: bool = Field(default=True, description="Run concurrent commands on separate channels of one transport")
+    max_channels: int = Field(default=10, description="Max open channels per session, counting commands, streams, SFTP, tar transfers and the persistent shell (keep at or below the server's MaxSessions)")
+    stream_window_size: int = Field(default=1024 * 1024, description="SSH channel window for streamed commands; bounds how much output the server can send ahead of the reader")
+    output_head_bytes: int = Field(default=256 * 1024, description="Bytes kept from the start of each command output stream")
+    output_tail_bytes: int = Field(default=256 * 1024, description="Bytes kept from the end of each command output stream; the middle is dropped")
+    spill_output: bool = Field(default=True, description="Write the full output of over-budget commands to a local temp file that can be paged later")
+    spill_max_bytes: int = Field(default=256 * 1024 * 1024, description="Max bytes saved to the spill file of one output stream; the saved copy stops there")
+    max_command_seconds: Optional[int] = Field(default=3600, description="Wall-clock limit for a foreground exec command, including ones that never stop producing output (None disables)")
+    shell_max_output_bytes: int = Field(default=16 * 1024 * 1024, description="Max output of one command in shell mode; larger outputs reset the shell")
+    helper_max_output_bytes: int = Field(default=64 * 1024 * 1024, description="Max output of a transfer helper command (checksums, listings); larger outputs fail the transfer step")
     
     retry_config: Optional[RetryConfig] = Field(
         default=None, 
@@ -59,6 +69,20 @@ class ConnectionConfig(BaseModel):
             raise ValueError("Timeout must be at least 1 second")
         return v
     
+    @field_validator("max_channels")
+    @classmethod
+    def validate_max_channels(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError("max_channels must be at least 1")
+        return v
+    
+    @field_validator("output_head_bytes", "output_tail_bytes")
+    @classmethod
+    def validate_output_budget(cls, v: int) -> int:
+        if v < 0:
+            raise ValueError("Output budget must not be negative")
+        return v
+    
     @field_validator("session_timeout")
     @classmethod
     def validate_session_timeout(cls, v: int) -> int:
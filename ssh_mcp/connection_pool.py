@@ -1,20 +1,21 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import time
 import threading
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, Deque, AsyncIterator, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from queue import Queue, Empty
 import uuid
 
 from .connection_config import ConnectionConfig
-from .clients.interface import SSHClientInterface, ClientType
+from .clients.interface import SSHClientInterface, ClientType, CommandResult
 from .clients.factory import SSHClientFactory
-from .exceptions import ConnectionException, PoolExhaustedException
-from .logging_config import get_logger
+from .exceptions import ConnectionException, CommandExecutionException, PoolExhaustedException
 
 
 class PooledConnectionState(Enum):
@@ -64,6 +65,13 @@ class PooledConnection:
         return True
 
 
+@dataclass
+class _Waiter:
+    """等待获取连接的调用方（FIFO 排队）"""
+    connection: Optional[PooledConnection] = None
+    may_create: bool = False
+
+
 @dataclass
 class PoolConfig:
     """连接池配置"""
@@ -86,6 +94,7 @@ class ConnectionPool:
     - 连接健康检查与自动回收
     - 线程安全
     - 支持连接预热
+    - 事件驱动获取：池未满时立即扩容，释放的连接按 FIFO 直接交给最早的等待者
     """
     
     def __init__(
@@ -98,15 +107,23 @@ class ConnectionPool:
         self._pool_config = pool_config or PoolConfig()
         self._client_type = client_type or ClientType.ASYNCSSH
         
-        self._logger = get_logger(f"ConnectionPool.{config.host}")
+        self._logger = logging.getLogger(__name__)
         
         self._pool: Dict[str, PooledConnection] = {}
-        self._available: Queue = Queue()
+        self._idle: Deque[PooledConnection] = deque()
+        self._waiters: Deque[_Waiter] = deque()
         self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
+        self._pending_creates = 0
         
         self._closed = False
         self._init_count = 0
         
+        self._acquire_count = 0
+        self._wait_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        
         self._validation_task: Optional[threading.Thread] = None
         if self._pool_config.enable_auto_recycle:
             self._start_validation()
@@ -114,8 +131,8 @@ class ConnectionPool:
     def _create_client(self) -> SSHClientInterface:
         """创建新的SSH客户端"""
         return SSHClientFactory.create(
-            self._client_type,
-            self._config
+            self._config,
+            self._client_type
         )
     
     def _create_and_connect(self) -> PooledConnection:
@@ -170,7 +187,7 @@ class ConnectionPool:
                 try:
                     pooled = self._create_and_connect()
                     self._pool[pooled.connection_id] = pooled
-                    self._available.put(pooled)
+                    self._idle.append(pooled)
                     self._init_count += 1
                 except Exception as e:
                     self._logger.error(f"Failed to create initial connection: {e}")
@@ -179,10 +196,52 @@ class ConnectionPool:
                 f"Connection pool initialized: {self._init_count} connections"
             )
     
+    def _has_capacity(self) -> bool:
+        """是否还能新建连接（需持有锁）"""
+        return len(self._pool) + self._pending_creates < self._pool_config.max_size
+    
+    def _pop_idle(self, unhealthy: List[PooledConnection]) -> Optional[PooledConnection]:
+        """取出一个健康的空闲连接（需持有锁），不健康的连接放入 unhealthy 待关闭"""
+        while self._idle:
+            pooled = self._idle.popleft()
+            if pooled.is_healthy(max_error_count=self._pool_config.max_error_count):
+                return pooled
+            self._pool.pop(pooled.connection_id, None)
+            unhealthy.append(pooled)
+        return None
+    
+    def _dispatch(self, unhealthy: List[PooledConnection]) -> None:
+        """按 FIFO 顺序把空闲连接或扩容名额分配给等待者（需持有锁）"""
+        dispatched = False
+        while self._waiters:
+            pooled = self._pop_idle(unhealthy)
+            if pooled is not None:
+                self._waiters.popleft().connection = pooled
+            elif self._has_capacity():
+                self._pending_creates += 1
+                self._waiters.popleft().may_create = True
+            else:
+                break
+            dispatched = True
+        
+        if dispatched:
+            self._available.notify_all()
+    
+    def _record_wait(self, waited: float, queued: bool) -> None:
+        """记录获取等待时间（需持有锁）"""
+        self._acquire_count += 1
+        if queued:
+            self._wait_count += 1
+            self._total_wait_time += waited
+            self._max_wait_time = max(self._max_wait_time, waited)
+    
     def acquire(self, timeout: Optional[int] = None) -> PooledConnection:
         """
         获取一个连接
         
+        优先复用空闲连接；池未满时立即新建连接；否则进入 FIFO 等待队列，
+        由 release 直接把连接交给最早的等待者。
+        
         Args:
             timeout: 获取超时时间（秒），默认使用池配置
             
@@ -197,46 +256,75 @@ class ConnectionPool:
             raise ConnectionException("Connection pool is closed")
         
         timeout = timeout or self._pool_config.acquire_timeout
-        start_time = time.time()
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        unhealthy: List[PooledConnection] = []
+        pooled: Optional[PooledConnection] = None
+        may_create = False
+        queued = False
         
-        while True:
-            try:
-                pooled = self._available.get(timeout=1)
-                
-                if not pooled.is_healthy(max_error_count=self._pool_config.max_error_count):
-                    self._remove_connection(pooled.connection_id)
-                    continue
-                
-                pooled.mark_used()
-                self._logger.debug(
-                    f"Acquired connection: {pooled.connection_id} "
-                    f"(total: {len(self._pool)}, available: {self._available.qsize()})"
-                )
-                return pooled
-                
-            except Empty:
-                with self._lock:
-                    if len(self._pool) < self._pool_config.max_size:
-                        pooled = self._create_and_connect()
-                        self._pool[pooled.connection_id] = pooled
-                        pooled.mark_used()
-                        return pooled
+        try:
+            with self._available:
+                if not self._waiters:
+                    pooled = self._pop_idle(unhealthy)
+                    if pooled is None and self._has_capacity():
+                        self._pending_creates += 1
+                        may_create = True
                 
-                elapsed = time.time() - start_time
-                if elapsed >= timeout:
-                    raise PoolExhaustedException(
-                        f"Connection pool exhausted, timeout after {timeout}s"
-                    )
+                if pooled is None and not may_create:
+                    waiter = _Waiter()
+                    self._waiters.append(waiter)
+                    queued = True
+                    
+                    while waiter.connection is None and not waiter.may_create:
+                        remaining = deadline - time.monotonic()
+                        if self._closed or remaining <= 0:
+                            self._waiters.remove(waiter)
+                            if self._closed:
+                                raise ConnectionException("Connection pool is closed")
+                            self._logger.warning(
+                                f"Connection pool exhausted after {timeout}s, "
+                                f"pool size: {len(self._pool)}, waiters: {len(self._waiters)}"
+                            )
+                            raise PoolExhaustedException(
+                                f"Connection pool exhausted, timeout after {timeout}s"
+                            )
+                        self._available.wait(remaining)
+                    
+                    pooled = waiter.connection
+                    may_create = waiter.may_create
                 
-                self._logger.warning(
-                    f"Waiting for available connection, "
-                    f"elapsed: {elapsed:.1f}s, pool size: {len(self._pool)}"
-                )
+                self._record_wait(time.monotonic() - start_time, queued)
+        finally:
+            for bad in unhealthy:
+                self._close_connection(bad)
+        
+        if may_create:
+            try:
+                pooled = self._create_and_connect()
+            except Exception:
+                with self._available:
+                    self._pending_creates -= 1
+                    self._dispatch(unhealthy)
+                raise
+            
+            with self._available:
+                self._pending_creates -= 1
+                self._pool[pooled.connection_id] = pooled
+        
+        pooled.mark_used()
+        self._logger.debug(
+            f"Acquired connection: {pooled.connection_id} "
+            f"(total: {len(self._pool)}, available: {len(self._idle)})"
+        )
+        return pooled
     
     def release(self, pooled: PooledConnection, force_close: bool = False) -> None:
         """
         释放连接回连接池
         
+        若有等待者，连接直接交给最早的等待者。
+        
         Args:
             pooled: 池化连接
             force_close: 是否强制关闭连接
@@ -260,20 +348,33 @@ class ConnectionPool:
             self._remove_connection(pooled.connection_id)
             return
         
-        pooled.mark_idle()
-        self._available.put(pooled)
+        unhealthy: List[PooledConnection] = []
+        with self._available:
+            pooled.mark_idle()
+            self._idle.append(pooled)
+            self._dispatch(unhealthy)
+        
+        for bad in unhealthy:
+            self._close_connection(bad)
         
         self._logger.debug(
             f"Released connection: {pooled.connection_id} "
-            f"(total: {len(self._pool)}, available: {self._available.qsize()})"
+            f"(total: {len(self._pool)}, available: {len(self._idle)})"
         )
     
     def _remove_connection(self, connection_id: str) -> None:
-        """移除连接"""
-        with self._lock:
+        """移除连接，腾出的名额交给等待者"""
+        unhealthy: List[PooledConnection] = []
+        with self._available:
             pooled = self._pool.pop(connection_id, None)
-            if pooled:
-                self._close_connection(pooled)
+            if pooled and pooled in self._idle:
+                self._idle.remove(pooled)
+            self._dispatch(unhealthy)
+        
+        if pooled:
+            self._close_connection(pooled)
+        for bad in unhealthy:
+            self._close_connection(bad)
     
     def _close_connection(self, pooled: PooledConnection) -> None:
         """关闭连接"""
@@ -330,13 +431,25 @@ class ConnectionPool:
         """获取连接池统计信息"""
         with self._lock:
             total = len(self._pool)
-            available = self._available.qsize()
+            available = len(self._idle)
             in_use = total - available
             
             return {
                 "total": total,
                 "available": available,
                 "in_use": in_use,
+                "pending_creates": self._pending_creates,
+                "waiting": len(self._waiters),
+                "wait": {
+                    "acquire_count": self._acquire_count,
+                    "wait_count": self._wait_count,
+                    "total_wait_ms": self._total_wait_time * 1000,
+                    "avg_wait_ms": (
+                        self._total_wait_time * 1000 / self._wait_count
+                        if self._wait_count else 0.0
+                    ),
+                    "max_wait_ms": self._max_wait_time * 1000
+                },
                 "config": {
                     "min_size": self._pool_config.min_size,
                     "max_size": self._pool_config.max_size,
@@ -347,18 +460,15 @@ class ConnectionPool:
     
     def close(self) -> None:
         """关闭连接池"""
-        self._closed = True
-        
-        with self._lock:
-            for pooled in list(self._pool.values()):
-                self._close_connection(pooled)
-            
+        with self._available:
+            self._closed = True
+            connections = list(self._pool.values())
             self._pool.clear()
-            while not self._available.empty():
-                try:
-                    self._available.get_nowait()
-                except Empty:
-                    break
+            self._idle.clear()
+            self._available.notify_all()
+        
+        for pooled in connections:
+            self._close_connection(pooled)
         
         self._logger.info("Connection pool closed")
 
@@ -429,3 +539,706 @@ class PooledSSHClient:
             self._pool.release(self._pooled_connection)
             self._pooled_connection = None
             self._closed = True
+
+
+@dataclass
+class AsyncPooledConnection:
+    """异步池化连接（持有 asyncssh.SSHClientConnection）"""
+    connection_id: str
+    connection: Any
+    config: ConnectionConfig
+    created_at: datetime = field(default_factory=datetime.now)
+    last_used: datetime = field(default_factory=datetime.now)
+    use_count: int = 0
+    state: PooledConnectionState = PooledConnectionState.IDLE
+    error_count: int = 0
+    
+    def mark_used(self) -> None:
+        """标记为已使用"""
+        self.last_used = datetime.now()
+        self.use_count += 1
+        self.state = PooledConnectionState.IN_USE
+    
+    def mark_idle(self) -> None:
+        """标记为空闲"""
+        self.state = PooledConnectionState.IDLE
+    
+    def mark_error(self) -> None:
+        """标记为错误"""
+        self.error_count += 1
+        self.state = PooledConnectionState.ERROR
+    
+    @property
+    def is_connected(self) -> bool:
+        """底层 asyncssh 连接是否仍然存活"""
+        return self.connection is not None and not self.connection.is_closed()
+    
+    def is_healthy(self, max_error_count: int = 3) -> bool:
+        """检查连接是否健康"""
+        if self.state == PooledConnectionState.CLOSED:
+            return False
+        if self.error_count >= max_error_count:
+            return False
+        if not self.is_connected:
+            return False
+        return True
+
+
+class AsyncConnectionPool:
+    """
+    异步 SSH 连接池 - 基于 asyncssh 的原生 asyncio 实现
+    
+    特性：
+    - 连接与调用方共用同一个事件循环，无线程切换、无临时事件循环
+    - FIFO 等待队列，释放的连接直接交给最早的等待者
+    - 连接验证作为事件循环任务运行
+    - 支持 async with 管理连接池与单个连接
+    
+    用法:
+        async with AsyncConnectionPool(config) as pool:
+            result = await pool.execute_command("uptime")
+            
+            async with pool.connection() as pooled:
+                await pooled.connection.run("ls -la")
+    """
+    
+    def __init__(
+        self,
+        config: ConnectionConfig,
+        pool_config: Optional[PoolConfig] = None
+    ):
+        self._config = config
+        self._pool_config = pool_config or PoolConfig()
+        
+        self._logger = logging.getLogger(__name__)
+        
+        self._pool: Dict[str, AsyncPooledConnection] = {}
+        self._idle: Deque[AsyncPooledConnection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._pending_creates = 0
+        
+        self._closed = False
+        self._initialized = False
+        
+        self._acquire_count = 0
+        self._wait_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+        
+        self._validation_task: Optional[asyncio.Task] = None
+    
+    async def __aenter__(self) -> "AsyncConnectionPool":
+        await self.initialize()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+    
+    async def _create_and_connect(self, deadline: Optional[float] = None) -> AsyncPooledConnection:
+        """
+        创建并连接 asyncssh 连接
+        
+        Args:
+            deadline: 事件循环时间上的截止时刻（例如 acquire 的超时），
+                每次尝试和重试间隔都不会超过它
+        """
+        import asyncssh
+        from .clients.additional_clients import asyncssh_connect_kwargs
+        
+        connect_kwargs = asyncssh_connect_kwargs(self._config)
+        loop = asyncio.get_running_loop()
+        
+        max_retries = 3
+        last_error = None
+        attempts = 0
+        
+        for attempt in range(max_retries):
+            attempt_timeout = self._config.timeout
+            if deadline is not None:
+                attempt_timeout = min(attempt_timeout, deadline - loop.time())
+                if attempt_timeout <= 0:
+                    break
+            attempts += 1
+            try:
+                connection = await asyncio.wait_for(
+                    asyncssh.connect(**connect_kwargs),
+                    timeout=attempt_timeout
+                )
+                pooled = AsyncPooledConnection(
+                    connection_id=str(uuid.uuid4()),
+                    connection=connection,
+                    config=self._config
+                )
+                self._logger.info(
+                    f"Created new connection: {pooled.connection_id} "
+                    f"(attempt {attempt + 1}/{max_retries})"
+                )
+                return pooled
+            except Exception as e:
+                last_error = str(e) or type(e).__name__
+                self._logger.warning(
+                    f"Connection attempt {attempt + 1} failed: {last_error}"
+                )
+                if attempt + 1 == max_retries:
+                    break
+                backoff = 0.5 * (attempt + 1)
+                if deadline is not None:
+                    backoff = min(backoff, max(0.0, deadline - loop.time()))
+                await asyncio.sleep(backoff)
+        
+        if deadline is not None and loop.time() >= deadline:
+            raise ConnectionException(
+                f"Failed to create connection within the acquire timeout after "
+                f"{attempts} attempt(s): {last_error}"
+            )
+        raise ConnectionException(
+            f"Failed to create connection after {max_retries} attempts: {last_error}"
+        )
+    
+    async def initialize(self) -> None:
+        """初始化连接池，创建最小连接数并启动验证任务"""
+        if self._initialized:
+            return
+        self._initialized = True
+        
+        self._logger.info(
+            f"Initializing connection pool with {self._pool_config.min_size} connections"
+        )
+        
+        results = await asyncio.gather(
+            *(self._create_and_connect() for _ in range(self._pool_config.min_size)),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self._logger.error(f"Failed to create initial connection: {result}")
+                continue
+            self._pool[result.connection_id] = result
+            self._idle.append(result)
+        
+        if self._pool_config.enable_auto_recycle:
+            self._validation_task = asyncio.create_task(self._validation_loop())
+        
+        self._logger.info(f"Connection pool initialized: {len(self._pool)} connections")
+    
+    def _has_capacity(self) -> bool:
+        """是否还能新建连接"""
+        return len(self._pool) + self._pending_creates < self._pool_config.max_size
+    
+    @property
+    def is_idle(self) -> bool:
+        """没有在用的连接、正在创建的连接或等待者"""
+        return (
+            len(self._pool) == len(self._idle)
+            and not self._pending_creates
+            and not any(not waiter.done() for waiter in self._waiters)
+        )
+    
+    def _pop_idle(self) -> Optional[AsyncPooledConnection]:
+        """取出一个健康的空闲连接，不健康的连接直接关闭"""
+        while self._idle:
+            pooled = self._idle.popleft()
+            if pooled.is_healthy(max_error_count=self._pool_config.max_error_count):
+                return pooled
+            self._pool.pop(pooled.connection_id, None)
+            self._close_connection(pooled)
+        return None
+    
+    def _dispatch(self) -> None:
+        """按 FIFO 顺序把空闲连接或扩容名额分配给等待者
+
+        等待者 Future 的结果为连接对象，或 None 表示获得了新建连接的名额。
+        """
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            
+            pooled = self._pop_idle()
+            if pooled is not None:
+                self._waiters.popleft().set_result(pooled)
+            elif self._has_capacity():
+                self._pending_creates += 1
+                self._waiters.popleft().set_result(None)
+            else:
+                break
+    
+    def _give_back(self, granted: Optional[AsyncPooledConnection]) -> None:
+        """归还已分配但调用方放弃的连接或扩容名额"""
+        if granted is None:
+            self._pending_creates -= 1
+        else:
+            self._idle.appendleft(granted)
+        self._dispatch()
+    
+    def _record_wait(self, waited: float, queued: bool) -> None:
+        """记录获取等待时间"""
+        self._acquire_count += 1
+        if queued:
+            self._wait_count += 1
+            self._total_wait_time += waited
+            self._max_wait_time = max(self._max_wait_time, waited)
+    
+    async def acquire(self, timeout: Optional[int] = None) -> AsyncPooledConnection:
+        """
+        获取一个连接
+        
+        Args:
+            timeout: 获取超时时间（秒），默认使用池配置
+            
+        Returns:
+            AsyncPooledConnection: 池化连接
+            
+        Raises:
+            PoolExhaustedException: 连接池耗尽
+            ConnectionException: 获取连接失败
+        """
+        if self._closed:
+            raise ConnectionException("Connection pool is closed")
+        
+        timeout = timeout or self._pool_config.acquire_timeout
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        pooled: Optional[AsyncPooledConnection] = None
+        may_create = False
+        queued = False
+        
+        if not self._waiters:
+            pooled = self._pop_idle()
+            if pooled is None and self._has_capacity():
+                self._pending_creates += 1
+                may_create = True
+        
+        if pooled is None and not may_create:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            queued = True
+            
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._give_back(waiter.result())
+                waiter.cancel()
+                raise
+            
+            if not waiter.done():
+                waiter.cancel()
+                if self._closed:
+                    raise ConnectionException("Connection pool is closed")
+                self._logger.warning(
+                    f"Connection pool exhausted after {timeout}s, "
+                    f"pool size: {len(self._pool)}, waiters: {len(self._waiters)}"
+                )
+                raise PoolExhaustedException(
+                    f"Connection pool exhausted, timeout after {timeout}s"
+                )
+            if waiter.cancelled():
+                raise ConnectionException("Connection pool is closed")
+            
+            pooled = waiter.result()
+            may_create = pooled is None
+        
+        self._record_wait(loop.time() - start_time, queued)
+        
+        if may_create:
+            try:
+                pooled = await self._create_and_connect(deadline=start_time + timeout)
+            except BaseException:
+                self._pending_creates -= 1
+                self._dispatch()
+                raise
+            self._pending_creates -= 1
+            self._pool[pooled.connection_id] = pooled
+        
+        pooled.mark_used()
+        self._logger.debug(
+            f"Acquired connection: {pooled.connection_id} "
+            f"(total: {len(self._pool)}, available: {len(self._idle)})"
+        )
+        return pooled
+    
+    async def release(self, pooled: AsyncPooledConnection, force_close: bool = False) -> None:
+        """
+        释放连接回连接池
+        
+        Args:
+            pooled: 池化连接
+            force_close: 是否强制关闭连接
+        """
+        if self._closed:
+            self._close_connection(pooled)
+            return
+        
+        if force_close or not pooled.is_healthy(max_error_count=self._pool_config.max_error_count):
+            self._remove_connection(pooled.connection_id)
+            return
+        
+        if pooled.use_count >= self._pool_config.max_use_count:
+            self._logger.info(
+                f"Connection {pooled.connection_id} exceeded max use count, closing"
+            )
+            self._remove_connection(pooled.connection_id)
+            return
+        
+        pooled.mark_idle()
+        self._idle.append(pooled)
+        self._dispatch()
+        
+        self._logger.debug(
+            f"Released connection: {pooled.connection_id} "
+            f"(total: {len(self._pool)}, available: {len(self._idle)})"
+        )
+    
+    @asynccontextmanager
+    async def connection(self, timeout: Optional[int] = None) -> AsyncIterator[AsyncPooledConnection]:
+        """以 async with 方式获取连接，退出时自动释放"""
+        pooled = await self.acquire(timeout)
+        try:
+            yield pooled
+        except BaseException:
+            if not pooled.is_connected:
+                pooled.mark_error()
+            raise
+        finally:
+            await self.release(pooled)
+    
+    async def execute_command(self, command: str, timeout: int = 30) -> CommandResult:
+        """使用池中连接执行命令
+        
+        Args:
+            command: 要执行的命令
+            timeout: 命令执行超时时间（秒）
+            
+        Returns:
+            CommandResult: 命令执行结果
+            
+        Raises:
+            CommandExecutionException: 命令执行失败
+        """
+        async with self.connection() as pooled:
+            try:
+                result = await pooled.connection.run(command, timeout=timeout, check=False)
+            except Exception as e:
+                pooled.mark_error()
+                self._logger.error(f"Command execution failed: {str(e)}")
+                raise CommandExecutionException(
+                    f"Failed to execute command: {str(e)}",
+                    command=command,
+                    original_error=e
+                )
+            
+            return CommandResult(
+                stdout=result.stdout or "",
+                stderr=result.stderr or "",
+                return_code=result.exit_status if result.exit_status is not None else -1
+            )
+    
+    def _remove_connection(self, connection_id: str) -> None:
+        """移除连接，腾出的名额交给等待者"""
+        pooled = self._pool.pop(connection_id, None)
+        if pooled:
+            if pooled in self._idle:
+                self._idle.remove(pooled)
+            self._close_connection(pooled)
+        self._dispatch()
+    
+    def _close_connection(self, pooled: AsyncPooledConnection) -> None:
+        """关闭连接"""
+        try:
+            pooled.connection.close()
+            pooled.state = PooledConnectionState.CLOSED
+            self._logger.debug(f"Closed connection: {pooled.connection_id}")
+        except Exception as e:
+            self._logger.warning(f"Error closing connection: {e}")
+    
+    async def _validation_loop(self) -> None:
+        """连接验证循环（事件循环任务）"""
+        while not self._closed:
+            await asyncio.sleep(self._pool_config.validation_interval)
+            
+            if self._closed:
+                break
+            
+            self._validate_connections()
+    
+    def _validate_connections(self) -> None:
+        """回收超时空闲或已断开的连接"""
+        now = datetime.now()
+        connections_to_close = [
+            pooled.connection_id
+            for pooled in self._idle
+            if (now - pooled.last_used).total_seconds() > self._pool_config.max_idle_time
+            or not pooled.is_connected
+        ]
+        
+        for connection_id in connections_to_close:
+            self._remove_connection(connection_id)
+            self._logger.info(
+                f"Closed idle connection: {connection_id}, "
+                f"pool size: {len(self._pool)}"
+            )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接池统计信息"""
+        total = len(self._pool)
+        available = len(self._idle)
+        
+        return {
+            "total": total,
+            "available": available,
+            "in_use": total - available,
+            "pending_creates": self._pending_creates,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.done()),
+            "wait": {
+                "acquire_count": self._acquire_count,
+                "wait_count": self._wait_count,
+                "total_wait_ms": self._total_wait_time * 1000,
+                "avg_wait_ms": (
+                    self._total_wait_time * 1000 / self._wait_count
+                    if self._wait_count else 0.0
+                ),
+                "max_wait_ms": self._max_wait_time * 1000
+            },
+            "config": {
+                "min_size": self._pool_config.min_size,
+                "max_size": self._pool_config.max_size,
+                "max_idle_time": self._pool_config.max_idle_time,
+                "max_use_count": self._pool_config.max_use_count
+            }
+        }
+    
+    async def close(self) -> None:
+        """关闭连接池"""
+        self._closed = True
+        
+        if self._validation_task:
+            self._validation_task.cancel()
+            self._validation_task = None
+        
+        while self._waiters:
+            self._waiters.popleft().cancel()
+        
+        connections = list(self._pool.values())
+        self._pool.clear()
+        self._idle.clear()
+        
+        for pooled in connections:
+            self._close_connection(pooled)
+        await asyncio.gather(
+            *(pooled.connection.wait_closed() for pooled in connections),
+            return_exceptions=True
+        )
+        
+        self._logger.info("Connection pool closed")
+
+
+class AsyncConnectionCache:
+    """
+    异步连接缓存 - 按目标主机保存 AsyncConnectionPool，在多次批量执行之间复用连接
+    
+    特性：
+    - 键为主机、端口、用户和认证信息，同一目标共用一个连接池
+    - 主机数超过 max_hosts 时按 LRU 关闭没有在用连接的主机连接池
+    - 清扫任务关闭空闲超过 idle_timeout 的主机连接池
+    - 取出连接时检查存活（由连接池负责），复用的连接执行失败时换新连接重试一次
+    
+    用法:
+        cache = AsyncConnectionCache()
+        result = await cache.run(config, "uptime", timeout=30)
+        await cache.close()
+    """
+    
+    def __init__(
+        self,
+        pool_config: Optional[PoolConfig] = None,
+        max_hosts: int = 256,
+        idle_timeout: int = 300,
+        sweep_interval: int = 60
+    ):
+        # 按需建立连接：不预热，空闲连接由各连接池按 max_idle_time 回收
+        self._pool_config = pool_config or PoolConfig(
+            min_size=0,
+            max_size=4,
+            max_idle_time=idle_timeout,
+            validation_interval=sweep_interval
+        )
+        self._max_hosts = max_hosts
+        self._idle_timeout = idle_timeout
+        self._sweep_interval = sweep_interval
+        
+        self._pools: "OrderedDict[Tuple, AsyncConnectionPool]" = OrderedDict()
+        self._last_used: Dict[Tuple, float] = {}
+        self._starting: Dict[Tuple, asyncio.Future] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._closed = False
+        
+        self._stats = {"pools_created": 0, "pool_hits": 0, "evictions": 0, "expired": 0, "reconnects": 0}
+        
+        self._logger = logging.getLogger(__name__)
+    
+    @staticmethod
+    def _key(config: ConnectionConfig) -> Tuple:
+        """连接目标：主机、端口、用户和认证信息"""
+        return (
+            config.host,
+            config.port,
+            config.username,
+            config.auth_method,
+            config.password,
+            str(config.private_key_path or ""),
+        )
+    
+    async def get_pool(self, config: ConnectionConfig) -> AsyncConnectionPool:
+        """获取目标主机的连接池，不存在时创建"""
+        if self._closed:
+            raise ConnectionException("Connection cache is closed")
+        
+        key = self._key(config)
+        self._last_used[key] = time.monotonic()
+        pool = self._pools.get(key)
+        if pool is not None:
+            self._pools.move_to_end(key)
+            self._stats["pool_hits"] += 1
+            starting = self._starting.get(key)
+            if starting is not None:
+                # 其他调用方正在初始化该连接池，等待同一次初始化
+                await asyncio.shield(starting)
+            return pool
+        
+        # 先登记连接池和初始化任务再 await，并发调用方复用同一个连接池
+        pool = AsyncConnectionPool(config, self._pool_config)
+        self._pools[key] = pool
+        self._stats["pools_created"] += 1
+        starting = asyncio.ensure_future(pool.initialize())
+        self._starting[key] = starting
+        starting.add_done_callback(lambda task: self._on_started(key, pool, task))
+        
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+        
+        await asyncio.shield(starting)
+        await self._evict()
+        return pool
+    
+    def _on_started(self, key: Tuple, pool: AsyncConnectionPool, task: asyncio.Future) -> None:
+        """初始化结束：失败时移除连接池，下次调用重新创建"""
+        self._starting.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            return
+        if self._pools.get(key) is pool:
+            del self._pools[key]
+            self._last_used.pop(key, None)
+        asyncio.ensure_future(pool.close())
+    
+    async def _evict(self) -> None:
+        """主机数超限时关闭最久未使用的空闲主机连接池"""
+        excess = len(self._pools) - self._max_hosts
+        if excess <= 0:
+            return
+        
+        victims = []
+        for key, pool in self._pools.items():
+            if len(victims) >= excess:
+                break
+            if pool.is_idle and key not in self._starting:
+                victims.append(key)
+        
+        for key in victims:
+            await self._drop(key)
+            self._stats["evictions"] += 1
+    
+    async def _drop(self, key: Tuple) -> None:
+        pool = self._pools.pop(key, None)
+        self._last_used.pop(key, None)
+        if pool is not None:
+            await pool.close()
+    
+    async def run(self, config: ConnectionConfig, command: str, timeout: int = 30) -> Any:
+        """
+        在目标主机上执行命令（复用缓存的连接）
+        
+        复用的连接在执行时断开（服务端关闭、网络中断）时，丢弃该连接并在新连接上重试一次。
+        
+        Returns:
+            asyncssh.SSHCompletedProcess: 执行结果
+        """
+        import asyncssh
+        
+        pool = await self.get_pool(config)
+        for attempt in range(2):
+            pooled = await pool.acquire()
+            # 新建的连接失败说明问题不在连接复用上，不再重试
+            reused = pooled.use_count > 1
+            try:
+                result = await pooled.connection.run(command, timeout=timeout, check=False)
+            except (asyncio.TimeoutError, asyncssh.TimeoutError):
+                await pool.release(pooled)
+                raise
+            except Exception as e:
+                pooled.mark_error()
+                await pool.release(pooled, force_close=True)
+                if reused and attempt == 0:
+                    self._stats["reconnects"] += 1
+                    self._logger.info(
+                        f"Cached connection to {config.host}:{config.port} failed ({e}), reconnecting"
+                    )
+                    continue
+                raise
+            await pool.release(pooled)
+            return result
+    
+    async def _sweep_loop(self) -> None:
+        """定期关闭空闲超时的主机连接池"""
+        while not self._closed:
+            await asyncio.sleep(self._sweep_interval)
+            await self.sweep()
+    
+    async def sweep(self) -> int:
+        """关闭空闲超过 idle_timeout 的主机连接池，返回关闭数量"""
+        deadline = time.monotonic() - self._idle_timeout
+        expired = [
+            key for key, pool in self._pools.items()
+            if self._last_used.get(key, 0) < deadline and pool.is_idle
+            and key not in self._starting
+        ]
+        for key in expired:
+            await self._drop(key)
+        if expired:
+            self._stats["expired"] += len(expired)
+            self._logger.debug(f"Closed {len(expired)} idle host connection pools")
+        return len(expired)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计信息"""
+        connections = 0
+        in_use = 0
+        for pool in self._pools.values():
+            stats = pool.get_stats()
+            connections += stats["total"]
+            in_use += stats["in_use"]
+        return {
+            **self._stats,
+            "hosts": len(self._pools),
+            "connections": connections,
+            "in_use": in_use,
+            "max_hosts": self._max_hosts,
+            "idle_timeout": self._idle_timeout
+        }
+    
+    async def close(self) -> None:
+        """关闭所有主机的连接池"""
+        self._closed = True
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+        
+        for starting in self._starting.values():
+            starting.cancel()
+        pools = list(self._pools.values())
+        self._pools.clear()
+        self._last_used.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), return_exceptions=True)
+        
+        self._logger.info("Connection cache closed")
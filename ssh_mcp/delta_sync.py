@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import logging
+import mmap
+import os
+import posixpath
+import shlex
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from paramiko import SFTPClient
+
+from .sftp_manager import SFTPChannelCache
+from .transfer_engine import CommandRunner, SFTPTransferEngine
+
+
+@dataclass
+class FileEntry:
+    """清单中的单个文件"""
+    path: str
+    size: int
+    mtime: int
+    sha256: str = ""
+
+
+@dataclass
+class SyncResult:
+    """目录同步结果"""
+    success: bool
+    message: str = ""
+    files_total: int = 0
+    files_unchanged: int = 0
+    files_copied: List[str] = field(default_factory=list)
+    files_patched: List[str] = field(default_factory=list)
+    files_deleted: List[str] = field(default_factory=list)
+    bytes_total: int = 0
+    bytes_sent: int = 0
+    duration_ms: float = 0.0
+    dry_run: bool = False
+
+    @property
+    def bytes_saved(self) -> int:
+        """相比完整复制节省的字节数"""
+        return self.bytes_total - self.bytes_sent
+
+
+class DeltaSync:
+    """
+    增量目录同步（类 rsync）
+
+    流程：
+    1. 遍历本地目录，一条远程命令获取远程清单（大小、修改时间、可选 sha256）
+    2. 大小和修改时间一致（或 checksum 模式下哈希一致）的文件跳过
+    3. 远程已存在的大文件按固定大小分块比较哈希，只写入变化的块
+    4. 其余文件通过传输引擎完整上传
+    5. 可选删除本地不存在的远程文件
+
+    分块比较使用对齐的块（远程 split --filter=sha256sum 计算），
+    能识别原地修改和追加，但不能识别插入导致的偏移——
+    滚动校验和需要在远程端部署辅助程序。
+    """
+
+    def __init__(
+        self,
+        sftp_cache: SFTPChannelCache,
+        transfer_engine: SFTPTransferEngine,
+        command_runner: CommandRunner,
+        block_size: int = 128 * 1024,
+        delta_threshold: int = 1024 * 1024,
+        command_timeout: int = 600
+    ):
+        self._sftp_cache = sftp_cache
+        self._transfer = transfer_engine
+        self._run = command_runner
+        self._block_size = block_size
+        self._delta_threshold = delta_threshold
+        self._command_timeout = command_timeout
+        self._logger = logging.getLogger(__name__)
+
+    def sync(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        delete: bool = False,
+        checksum: bool = False,
+        exclude: Optional[List[str]] = None,
+        dry_run: bool = False
+    ) -> SyncResult:
+        """
+        同步本地目录到远程目录
+
+        Args:
+            local_dir: 本地源目录
+            remote_dir: 远程目标目录
+            delete: 是否删除本地不存在的远程文件
+            checksum: 按 sha256 比较文件（忽略修改时间）
+            exclude: 排除的相对路径模式（fnmatch）
+            dry_run: 只计算差异，不传输
+
+        Returns:
+            SyncResult: 同步结果
+        """
+        start_time = time.monotonic()
+        if not os.path.isdir(local_dir):
+            return SyncResult(success=False, message=f"Local directory not found: {local_dir}")
+
+        local = self._local_manifest(local_dir, exclude or [], checksum)
+        remote = self._remote_manifest(remote_dir, checksum)
+        if exclude:
+            remote = {p: e for p, e in remote.items() if not self._excluded(p, exclude)}
+
+        result = SyncResult(
+            success=True,
+            files_total=len(local),
+            bytes_total=sum(entry.size for entry in local.values()),
+            dry_run=dry_run
+        )
+
+        to_copy: List[FileEntry] = []
+        to_patch: List[FileEntry] = []
+        for path, entry in sorted(local.items()):
+            existing = remote.get(path)
+            if existing is not None and self._unchanged(entry, existing, checksum):
+                result.files_unchanged += 1
+            elif (
+                existing is not None
+                and entry.size >= self._delta_threshold
+                and existing.size >= self._delta_threshold
+            ):
+                to_patch.append(entry)
+            else:
+                to_copy.append(entry)
+
+        deletions = sorted(set(remote) - set(local)) if delete else []
+
+        if dry_run:
+            result.files_copied = [entry.path for entry in to_copy]
+            result.files_patched = [entry.path for entry in to_patch]
+            result.files_deleted = deletions
+            result.bytes_sent = sum(entry.size for entry in to_copy + to_patch)
+            result.message = "Dry run: no files transferred"
+            result.duration_ms = (time.monotonic() - start_time) * 1000
+            return result
+
+        self._make_dirs(remote_dir, [entry.path for entry in to_copy])
+
+        block_digests = self._remote_block_digests(remote_dir, [entry.path for entry in to_patch])
+        for entry, digests in zip(to_patch, block_digests):
+            local_path = os.path.join(local_dir, *entry.path.split("/"))
+            remote_path = posixpath.join(remote_dir, entry.path)
+            if digests is None:
+                to_copy.append(entry)
+                continue
+            result.bytes_sent += self._patch_file(local_path, remote_path, entry, digests)
+            result.files_patched.append(entry.path)
+
+        for entry in to_copy:
+            local_path = os.path.join(local_dir, *entry.path.split("/"))
+            remote_path = posixpath.join(remote_dir, entry.path)
+            stats = self._transfer.upload(local_path, remote_path, resume=False)
+            self._sftp_cache.run(lambda sftp: sftp.utime(remote_path, (entry.mtime, entry.mtime)))
+            result.bytes_sent += stats.bytes_transferred
+            result.files_copied.append(entry.path)
+
+        if deletions:
+            self._delete(remote_dir, deletions)
+            result.files_deleted = deletions
+
+        result.duration_ms = (time.monotonic() - start_time) * 1000
+        result.message = (
+            f"Synced {local_dir} -> {remote_dir}: "
+            f"{len(result.files_copied)} copied, {len(result.files_patched)} patched, "
+            f"{result.files_unchanged} unchanged, {len(result.files_deleted)} deleted"
+        )
+        self._logger.info(f"{result.message} ({result.bytes_sent}/{result.bytes_total} bytes sent)")
+        return result
+
+    @staticmethod
+    def _excluded(path: str, patterns: List[str]) -> bool:
+        name = posixpath.basename(path)
+        return any(fnmatch.fnmatch(path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+    @staticmethod
+    def _unchanged(local: FileEntry, remote: FileEntry, checksum: bool) -> bool:
+        if local.size != remote.size:
+            return False
+        if checksum:
+            return local.sha256 == remote.sha256
+        return local.mtime == remote.mtime
+
+    def _local_manifest(self, local_dir: str, exclude: List[str], checksum: bool) -> Dict[str, FileEntry]:
+        """遍历本地目录"""
+        manifest: Dict[str, FileEntry] = {}
+        for root, _dirs, files in os.walk(local_dir):
+            for name in files:
+                full_path = os.path.join(root, name)
+                if not os.path.isfile(full_path):
+                    continue
+                rel_path = os.path.relpath(full_path, local_dir).replace(os.sep, "/")
+                if self._excluded(rel_path, exclude):
+                    continue
+                stat = os.stat(full_path)
+                manifest[rel_path] = FileEntry(
+                    path=rel_path,
+                    size=stat.st_size,
+                    mtime=int(stat.st_mtime),
+                    sha256=self._file_digest(full_path) if checksum else ""
+                )
+        return manifest
+
+    @staticmethod
+    def _file_digest(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _remote_manifest(self, remote_dir: str, checksum: bool) -> Dict[str, FileEntry]:
+        """
+        一条命令获取远程清单
+
+        输出格式：每个文件一条 "size mtime path\\0" 记录；
+        checksum 模式下再追加一个空记录和 sha256sum 的输出。
+        """
+        script = (
+            f"cd -- {shlex.quote(remote_dir)} 2>/dev/null || exit 0; "
+            "find . -type f -printf '%s %T@ %P\\0'"
+        )
+        if checksum:
+            script += "; printf '\\0'; find . -type f -exec sha256sum -- {} +"
+        output = self._run(script, self._command_timeout)
+
+        records, _, hash_output = output.partition("\0\0")
+
+        manifest: Dict[str, FileEntry] = {}
+        for record in records.split("\0"):
+            if not record:
+                continue
+            size, mtime, path = record.split(" ", 2)
+            manifest[path] = FileEntry(path=path, size=int(size), mtime=int(float(mtime)))
+
+        for line in hash_output.splitlines():
+            digest, path = self._parse_sha256_line(line)
+            if path in manifest:
+                manifest[path].sha256 = digest
+        return manifest
+
+    @staticmethod
+    def _parse_sha256_line(line: str) -> Tuple[str, str]:
+        """解析 sha256sum 输出行（含转义的文件名以反斜杠开头）"""
+        escaped = line.startswith("\\")
+        if escaped:
+            line = line[1:]
+        digest, _, path = line.partition("  ")
+        if escaped:
+            path = path.replace("\\n", "\n").replace("\\\\", "\\")
+        if path.startswith("./"):
+            path = path[2:]
+        return digest, path
+
+    def _remote_block_digests(self, remote_dir: str, paths: List[str]) -> List[Optional[List[str]]]:
+        """一条命令计算多个远程文件的分块 sha256；某个文件失败时对应位置为 None"""
+        if not paths:
+            return []
+
+        parts = [f"cd -- {shlex.quote(remote_dir)} || exit 1"]
+        for index, path in enumerate(paths):
+            parts.append(
+                f"echo '#{index}'; "
+                f"split -b {self._block_size} --filter=sha256sum -- {shlex.quote(path)} || echo '!'"
+            )
+        try:
+            output = self._run("; ".join(parts), self._command_timeout)
+        except Exception as e:
+            self._logger.warning(f"Remote block checksums failed, falling back to full copies: {e}")
+            return [None] * len(paths)
+
+        digests: List[Optional[List[str]]] = [None] * len(paths)
+        current: Optional[int] = None
+        for line in output.splitlines():
+            if line.startswith("#"):
+                current = int(line[1:])
+                digests[current] = []
+            elif line == "!" and current is not None:
+                digests[current] = None
+            elif line.strip() and current is not None and digests[current] is not None:
+                digests[current].append(line.split()[0])
+        return digests
+
+    def _patch_file(self, local_path: str, remote_path: str, entry: FileEntry, remote_digests: List[str]) -> int:
+        """只写入与远程分块哈希不一致的块，返回发送的字节数"""
+        block_size = self._block_size
+        sent = 0
+        with open(local_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            view = memoryview(source)
+            try:
+                changed = [
+                    offset for index, offset in enumerate(range(0, entry.size, block_size))
+                    if index >= len(remote_digests)
+                    or hashlib.sha256(view[offset:offset + block_size]).hexdigest() != remote_digests[index]
+                ]
+
+                def write_blocks(sftp: SFTPClient) -> None:
+                    with sftp.open(remote_path, "r+b") as remote_file:
+                        remote_file.set_pipelined(True)
+                        for offset in changed:
+                            remote_file.seek(offset)
+                            remote_file.write(view[offset:offset + block_size])
+                        remote_file.truncate(entry.size)
+                    sftp.utime(remote_path, (entry.mtime, entry.mtime))
+
+                self._sftp_cache.run(write_blocks)
+                sent = sum(min(block_size, entry.size - offset) for offset in changed)
+            finally:
+                view.release()
+
+        self._logger.debug(f"Patched {remote_path}: {len(changed)} changed blocks, {sent} bytes")
+        return sent
+
+    def _make_dirs(self, remote_dir: str, paths: List[str]) -> None:
+        """一条命令创建所需的远程目录"""
+        dirs = sorted({posixpath.dirname(posixpath.join(remote_dir, p)) for p in paths} | {remote_dir})
+        self._run("mkdir -p -- " + " ".join(shlex.quote(d) for d in dirs), self._command_timeout)
+
+    def _delete(self, remote_dir: str, paths: List[str]) -> None:
+        """一条命令删除多余的远程文件"""
+        self._run(
+            f"cd -- {shlex.quote(remote_dir)} && rm -f -- " + " ".join(shlex.quote(p) for p in paths),
+            self._command_timeout
+        )
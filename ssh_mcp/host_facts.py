@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+
+FACTS_ENV = "SSH_GATHER_FACTS"
+FACTS_TTL_ENV = "SSH_FACTS_TTL"
+
+# 采集命令：在同一个分帧脚本中依次执行，某条失败不影响其余命令
+FACT_COMMANDS: List[Tuple[str, str]] = [
+    ("os_release", "cat /etc/os-release 2>/dev/null || cat /usr/lib/os-release"),
+    ("uname", "uname -s -r -m"),
+    ("hostname", "hostname 2>/dev/null || uname -n"),
+    ("cpu_count", "nproc 2>/dev/null || getconf _NPROCESSORS_ONLN"),
+    ("meminfo", "grep -E '^(MemTotal|MemAvailable):' /proc/meminfo"),
+    ("disks", "df -P -k -x tmpfs -x devtmpfs -x overlay 2>/dev/null || df -P -k"),
+    ("docker", "docker version --format '{{.Server.Version}}' 2>/dev/null || docker --version"),
+    ("ports", "ss -Htln 2>/dev/null || netstat -tln"),
+]
+
+
+def gathering_enabled() -> bool:
+    """环境变量 SSH_GATHER_FACTS 是否在创建会话时采集主机信息（默认开启）"""
+    return os.getenv(FACTS_ENV, "true").lower() in ("1", "true", "yes", "on")
+
+
+def default_ttl() -> float:
+    """主机信息的有效期（秒），环境变量 SSH_FACTS_TTL，默认 3600"""
+    try:
+        return float(os.getenv(FACTS_TTL_ENV, "3600"))
+    except ValueError:
+        return 3600.0
+
+
+@dataclass
+class DiskInfo:
+    """一个已挂载的文件系统"""
+    filesystem: str
+    mount: str
+    total_bytes: int
+    used_bytes: int
+    available_bytes: int
+
+    @property
+    def use_percent(self) -> float:
+        return round(self.used_bytes * 100 / self.total_bytes, 1) if self.total_bytes else 0.0
+
+
+@dataclass
+class ListeningPort:
+    """一个处于监听状态的 TCP 地址"""
+    address: str
+    port: int
+
+
+@dataclass
+class HostFacts:
+    """
+    远程主机的基本信息
+
+    采集失败的项保持为 None（或空列表），对应的错误记录在 errors 中。
+    """
+    host: str
+    port: int
+    hostname: Optional[str] = None
+    os_name: Optional[str] = None
+    os_version: Optional[str] = None
+    os_id: Optional[str] = None
+    kernel: Optional[str] = None
+    system: Optional[str] = None
+    arch: Optional[str] = None
+    cpu_count: Optional[int] = None
+    memory_total_bytes: Optional[int] = None
+    memory_available_bytes: Optional[int] = None
+    disks: List[DiskInfo] = field(default_factory=list)
+    docker_version: Optional[str] = None
+    listening_ports: List[ListeningPort] = field(default_factory=list)
+    gathered_at: float = field(default_factory=time.time)
+    gather_ms: float = 0.0
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def age(self) -> float:
+        """距采集时的秒数"""
+        return max(0.0, time.time() - self.gathered_at)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HostFacts":
+        data = dict(data)
+        data["disks"] = [DiskInfo(**disk) for disk in data.get("disks", [])]
+        data["listening_ports"] = [ListeningPort(**port) for port in data.get("listening_ports", [])]
+        known = cls.__dataclass_fields__
+        return cls(**{key: value for key, value in data.items() if key in known})
+
+
+def _parse_os_release(text: str) -> Dict[str, str]:
+    values = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition("=")
+        if sep and key.strip():
+            values[key.strip()] = value.strip().strip("\"'")
+    return values
+
+
+def _parse_meminfo(text: str) -> Dict[str, int]:
+    values = {}
+    for line in text.splitlines():
+        match = re.match(r"^(\w+):\s+(\d+)\s*kB", line)
+        if match:
+            values[match.group(1)] = int(match.group(2)) * 1024
+    return values
+
+
+def _parse_df(text: str) -> List[DiskInfo]:
+    disks = []
+    for line in text.splitlines()[1:]:
+        parts = line.split()
+        # POSIX 格式：文件系统 总块数 已用 可用 使用率 挂载点（挂载点可能含空格）
+        if len(parts) < 6 or not parts[1].isdigit():
+            continue
+        disks.append(DiskInfo(
+            filesystem=parts[0],
+            mount=" ".join(parts[5:]),
+            total_bytes=int(parts[1]) * 1024,
+            used_bytes=int(parts[2]) * 1024,
+            available_bytes=int(parts[3]) * 1024
+        ))
+    return disks
+
+
+def _parse_docker(text: str) -> Optional[str]:
+    text = text.strip()
+    if not text:
+        return None
+    match = re.search(r"version\s+([\w.\-+~]+)", text, re.IGNORECASE)
+    return match.group(1) if match else text.splitlines()[0]
+
+
+def _parse_ports(text: str) -> List[ListeningPort]:
+    ports = set()
+    for line in text.splitlines():
+        if "LISTEN" not in line:
+            continue
+        # 第一个 "地址:端口" 形式的列是本地地址（ss 和 netstat 相同）
+        for token in line.split():
+            address, sep, port = token.rpartition(":")
+            if sep and port.isdigit():
+                ports.add((address.strip("[]") or "*", int(port)))
+                break
+    return [ListeningPort(address, port) for address, port in sorted(ports, key=lambda item: (item[1], item[0]))]
+
+
+def parse_facts(host: str, port: int, results: Dict[str, dict]) -> HostFacts:
+    """
+    把各采集命令的结果解析为 HostFacts
+
+    Args:
+        host: 主机地址
+        port: SSH 端口
+        results: {采集项名称: 命令结果字典（stdout / stderr / exit_code）}
+    """
+    facts = HostFacts(host=host, port=port)
+
+    def output(name: str) -> Optional[str]:
+        result = results.get(name)
+        if result is None:
+            facts.errors[name] = "not run"
+            return None
+        if result.get("exit_code") != 0:
+            facts.errors[name] = (result.get("stderr") or "").strip() or f"exit code {result.get('exit_code')}"
+            return None
+        return result.get("stdout") or ""
+
+    text = output("os_release")
+    if text is not None:
+        release = _parse_os_release(text)
+        facts.os_name = release.get("NAME")
+        facts.os_version = release.get("VERSION_ID") or release.get("VERSION")
+        facts.os_id = release.get("ID")
+
+    text = output("uname")
+    if text is not None:
+        parts = text.split()
+        if len(parts) >= 3:
+            facts.system, facts.kernel, facts.arch = parts[0], parts[1], parts[2]
+
+    text = output("hostname")
+    if text is not None and text.strip():
+        facts.hostname = text.strip()
+
+    text = output("cpu_count")
+    if text is not None and text.strip().isdigit():
+        facts.cpu_count = int(text.strip())
+
+    text = output("meminfo")
+    if text is not None:
+        memory = _parse_meminfo(text)
+        facts.memory_total_bytes = memory.get("MemTotal")
+        facts.memory_available_bytes = memory.get("MemAvailable")
+
+    text = output("disks")
+    if text is not None:
+        facts.disks = _parse_df(text)
+
+    text = output("docker")
+    if text is not None:
+        facts.docker_version = _parse_docker(text)
+
+    text = output("ports")
+    if text is not None:
+        facts.listening_ports = _parse_ports(text)
+
+    return facts
+
+
+async def gather_facts(
+    host: str,
+    port: int,
+    run_pipeline: Callable[[List[str], int], Awaitable[List[dict]]],
+    timeout: int = 15
+) -> HostFacts:
+    """
+    一次往返采集主机信息
+
+    Args:
+        host: 主机地址
+        port: SSH 端口
+        run_pipeline: 在同一个远程 shell 中依次执行多条命令的函数，
+            返回与命令一一对应的结果字典（例如 SSHSession.execute_pipeline）
+        timeout: 整个采集脚本的超时（秒）
+    """
+    start = time.monotonic()
+    commands = [command for _, command in FACT_COMMANDS]
+    results = await run_pipeline(commands, timeout)
+    facts = parse_facts(
+        host, port,
+        {name: result for (name, _), result in zip(FACT_COMMANDS, results) if not result.get("skipped")}
+    )
+    facts.gather_ms = round((time.monotonic() - start) * 1000, 1)
+    return facts
+
+
+class FactStore:
+    """
+    主机信息缓存 - 按主机和端口保存，带有效期并持久化到磁盘
+
+    MCP 服务重启后仍可使用未过期的记录，避免每次连接都重新采集。
+    """
+
+    DEFAULT_PATH = Path.home() / ".ssh" / "mcp_host_facts.json"
+
+    _default: Optional["FactStore"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: Optional[Path] = None, ttl: Optional[float] = None):
+        self._path = Path(path) if path else self.DEFAULT_PATH
+        self._ttl = ttl if ttl is not None else default_ttl()
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+        self._entries: Dict[str, HostFacts] = self._load()
+
+    @classmethod
+    def default(cls) -> "FactStore":
+        """进程内共享的默认存储"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @staticmethod
+    def _key(host: str, port: int) -> str:
+        return f"{host}:{port}"
+
+    def _load(self) -> Dict[str, HostFacts]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        entries = {}
+        for key, value in (data.items() if isinstance(data, dict) else []):
+            try:
+                entries[key] = HostFacts.from_dict(value)
+            except (TypeError, ValueError):
+                self._logger.debug(f"Ignoring malformed host facts entry for {key}")
+        return entries
+
+    def _save(self) -> None:
+        """原子写入（需持有锁）"""
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({key: facts.to_dict() for key, facts in self._entries.items()}, f, indent=2)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            self._logger.warning(f"Failed to save host facts: {e}")
+
+    def get(self, host: str, port: int, max_age: Optional[float] = None) -> Optional[HostFacts]:
+        """
+        获取未过期的主机信息
+
+        Args:
+            max_age: 可接受的最大时长（秒），默认使用存储的 TTL
+
+        Returns:
+            Optional[HostFacts]: 无记录或已过期时返回 None
+        """
+        limit = self._ttl if max_age is None else max_age
+        with self._lock:
+            facts = self._entries.get(self._key(host, port))
+        if facts is None or facts.age() > limit:
+            return None
+        return facts
+
+    def put(self, facts: HostFacts) -> None:
+        with self._lock:
+            self._entries[self._key(facts.host, facts.port)] = facts
+            self._save()
+
+    def invalidate(self, host: str, port: int) -> bool:
+        """删除某个主机的记录，返回是否存在"""
+        with self._lock:
+            removed = self._entries.pop(self._key(host, port), None) is not None
+            if removed:
+                self._save()
+        return removed
+
+    def hosts(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
@@ -15,13 +15,15 @@ class SSHLogger:
     
     @classmethod
     def get_logger(cls, name: str = "ssh-licco") -> logging.Logger:
-        """获取日志实例（单例模式）"""
+        """获取日志实例（共用一个已配置的 ssh-licco 日志器，其他名称返回其子日志器）"""
         if cls._instance is None:
-            cls._instance = logging.getLogger(name)
+            cls._instance = logging.getLogger("ssh-licco")
             if not cls._initialized:
                 cls._setup_logger(cls._instance)
                 cls._initialized = True
-        return cls._instance
+        if name == cls._instance.name:
+            return cls._instance
+        return cls._instance.getChild(name)
     
     @classmethod
     def _setup_logger(cls, logger: logging.Logger) -> None:
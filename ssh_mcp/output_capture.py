@@ -0,0 +1,623 @@
+from __future__ import annotations
+
+import atexit
+import io
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+
+
+DEFAULT_HEAD_BYTES = 256 * 1024
+DEFAULT_TAIL_BYTES = 256 * 1024
+DEFAULT_PAGE_SIZE = 64 * 1024
+DEFAULT_MAX_SPILL_BYTES = 256 * 1024 * 1024
+
+
+def _utf8_tail_start(data: bytes) -> int:
+    """跳过开头被截断的 UTF-8 续字节，返回第一个完整字符的位置"""
+    index = 0
+    while index < min(len(data), 3) and 0x80 <= data[index] <= 0xBF:
+        index += 1
+    return index
+
+
+def _utf8_head_end(data: bytes) -> int:
+    """去掉末尾不完整的 UTF-8 多字节序列，返回可安全解码的长度"""
+    for back in range(1, min(len(data), 4) + 1):
+        byte = data[-back]
+        if byte < 0x80:
+            return len(data)
+        if byte >= 0xC0:
+            width = 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+            return len(data) if back >= width else len(data) - back
+    return len(data)
+
+
+@dataclass
+class CapturedOutput:
+    """有界捕获的结果"""
+    text: str
+    total_bytes: int
+    dropped_bytes: int = 0
+    handle: Optional[str] = None
+    # 溢出文件达到上限后停止写入，句柄中只有输出的前 spilled_bytes 字节
+    spill_truncated: bool = False
+    spilled_bytes: int = 0
+
+    @property
+    def truncated(self) -> bool:
+        """是否有输出因超出预算被省略"""
+        return self.dropped_bytes > 0
+
+
+@dataclass
+class OutputPage:
+    """保存输出的一页"""
+    handle: str
+    offset: int
+    next_offset: int
+    total_bytes: int
+    data: str
+    start_line: Optional[int] = None
+    end_line: Optional[int] = None
+    total_lines: Optional[int] = None
+
+    @property
+    def eof(self) -> bool:
+        """是否已读到末尾"""
+        return self.next_offset >= self.total_bytes
+
+
+@dataclass
+class OutputMatch:
+    """grep 命中的一行"""
+    line: int
+    text: str
+
+
+@dataclass
+class GrepResult:
+    """在保存的输出中搜索的结果"""
+    handle: str
+    pattern: str
+    matches: List[OutputMatch] = field(default_factory=list)
+    lines_scanned: int = 0
+    truncated: bool = False
+
+
+@dataclass
+class _OutputEntry:
+    owner: str
+    size: int = 0
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+    complete: bool = False
+    line_index: Optional[List[int]] = None
+    line_count: int = 0
+
+
+class OutputStore:
+    """
+    命令输出存储
+
+    每个句柄对应一份完整输出：较小的保存在内存中，溢出的保存在本地临时文件中。
+    支持按字节偏移或行号分页读取和正则搜索。
+    句柄按 LRU 淘汰：内存占用、磁盘占用或句柄数超过上限时，
+    最久未访问的句柄先被删除。句柄记录所属会话，会话关闭时一并清理。
+    溢出文件写入前先预留磁盘空间（reserve），磁盘占用在写入过程中就不会超过上限。
+    """
+
+    LINE_INDEX_STEP = 1000
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 2 * 1024 * 1024 * 1024,
+        max_entries: int = 256
+    ):
+        self._directory = directory
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, _OutputEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.RLock()
+        self._logger = logging.getLogger(__name__)
+
+    def _ensure_directory(self) -> str:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="ssh-mcp-output-")
+        return self._directory
+
+    @staticmethod
+    def _new_handle() -> str:
+        return f"out-{uuid.uuid4().hex[:12]}"
+
+    def open_spill(self, owner: str = "") -> Tuple[str, BinaryIO]:
+        """
+        创建溢出文件
+
+        Args:
+            owner: 所属会话 ID
+
+        Returns:
+            Tuple[str, BinaryIO]: 句柄和可写文件对象
+        """
+        handle = self._new_handle()
+        with self._lock:
+            path = os.path.join(self._ensure_directory(), handle)
+            self._entries[handle] = _OutputEntry(owner=owner, path=path)
+        return handle, open(path, "wb")
+
+    def reserve(self, handle: str, nbytes: int) -> bool:
+        """
+        为正在写入的溢出文件预留磁盘空间
+
+        超出磁盘上限时先淘汰最久未访问的已完成溢出文件；仍然不足（或句柄已被删除）
+        时返回 False，调用方应停止写入。
+        """
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return False
+            if self._disk_bytes + nbytes > self._max_disk_bytes:
+                # 正在写入的文件不能淘汰：即使淘汰全部已完成的文件也放不下时，不淘汰任何文件
+                evictable = sum(e.size for e in self._entries.values() if e.complete and e.path)
+                if self._disk_bytes - evictable + nbytes > self._max_disk_bytes:
+                    return False
+            while self._disk_bytes + nbytes > self._max_disk_bytes:
+                victim = next((h for h, e in self._entries.items() if e.complete and e.path), None)
+                if victim is None:
+                    return False
+                self._logger.debug(f"Evicting output {victim} to make room for {handle}")
+                self._drop(victim)
+            entry.size += nbytes
+            self._disk_bytes += nbytes
+            return True
+
+    def complete(self, handle: str, total_bytes: int) -> None:
+        """记录溢出文件写入完成后的大小（磁盘占用已在 reserve 时计入）"""
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return
+            self._disk_bytes += total_bytes - entry.size
+            entry.size = total_bytes
+            entry.complete = True
+            self._evict()
+
+    def put(self, data: bytes, owner: str = "") -> str:
+        """
+        保存一份输出，返回句柄
+
+        超过内存上限四分之一的输出直接写入临时文件。
+
+        Raises:
+            OSError: 磁盘上限内放不下这份输出
+        """
+        if len(data) > self._max_memory_bytes // 4:
+            handle, f = self.open_spill(owner)
+            with f:
+                reserved = self.reserve(handle, len(data))
+                if reserved:
+                    f.write(data)
+            if not reserved:
+                self.remove(handle)
+                raise OSError(f"Output store disk limit reached ({self._max_disk_bytes} bytes)")
+            self.complete(handle, len(data))
+            return handle
+
+        handle = self._new_handle()
+        with self._lock:
+            self._entries[handle] = _OutputEntry(owner=owner, size=len(data), data=data, complete=True)
+            self._memory_bytes += len(data)
+            self._evict()
+        return handle
+
+    def _evict(self) -> None:
+        """淘汰最久未访问的句柄（不淘汰最新的和尚未写完的）"""
+        while (
+            self._memory_bytes > self._max_memory_bytes
+            or self._disk_bytes > self._max_disk_bytes
+            or len(self._entries) > self._max_entries
+        ):
+            candidates = list(self._entries.items())[:-1]
+            victim = next((h for h, e in candidates if e.complete), None)
+            if victim is None:
+                return
+            self._logger.debug(f"Evicting output {victim}")
+            self._drop(victim)
+
+    def _drop(self, handle: str) -> Optional[_OutputEntry]:
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return None
+        if entry.data is not None:
+            self._memory_bytes -= entry.size
+        elif entry.path:
+            self._disk_bytes -= entry.size
+        if entry.path:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        return entry
+
+    def _get(self, handle: str) -> _OutputEntry:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None or not entry.complete:
+                raise KeyError(f"Output handle not found or expired: {handle}")
+            self._entries.move_to_end(handle)
+            return entry
+
+    @staticmethod
+    def _open(entry: _OutputEntry) -> BinaryIO:
+        if entry.data is not None:
+            return io.BytesIO(entry.data)
+        return open(entry.path, "rb")
+
+    def size(self, handle: str) -> int:
+        """保存输出的总字节数"""
+        return self._get(handle).size
+
+    def handles(self) -> List[str]:
+        """全部可读句柄，按最近访问排序"""
+        with self._lock:
+            return [h for h, e in reversed(self._entries.items()) if e.complete]
+
+    def stats(self) -> Dict[str, int]:
+        """存储占用统计"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "max_memory_bytes": self._max_memory_bytes,
+                "max_disk_bytes": self._max_disk_bytes,
+                "max_entries": self._max_entries,
+            }
+
+    def read(self, handle: str, offset: int = 0, length: int = DEFAULT_PAGE_SIZE) -> OutputPage:
+        """
+        按字节偏移读取一页
+
+        页尾不会切断多字节字符，next_offset 可直接作为下一页的 offset。
+
+        Args:
+            handle: 输出句柄
+            offset: 起始字节偏移
+            length: 最多读取的字节数
+
+        Returns:
+            OutputPage: 该页内容
+
+        Raises:
+            KeyError: 句柄不存在或已过期
+        """
+        entry = self._get(handle)
+        total = entry.size
+        offset = max(0, min(offset, total))
+        with self._open(entry) as f:
+            f.seek(offset)
+            raw = f.read(max(0, min(length, total - offset)))
+
+        if offset + len(raw) < total:
+            raw = raw[:_utf8_head_end(raw)] or raw
+        return OutputPage(
+            handle=handle,
+            offset=offset,
+            next_offset=offset + len(raw),
+            total_bytes=total,
+            data=raw.decode("utf-8", errors="replace")
+        )
+
+    def _line_index(self, entry: _OutputEntry) -> List[int]:
+        """稀疏行索引：每 LINE_INDEX_STEP 行记录一次起始偏移（首次使用时构建）"""
+        if entry.line_index is None:
+            index = [0]
+            offset = 0
+            count = 0
+            with self._open(entry) as f:
+                for line in f:
+                    offset += len(line)
+                    count += 1
+                    if count % self.LINE_INDEX_STEP == 0:
+                        index.append(offset)
+            entry.line_count = count
+            entry.line_index = index
+        return entry.line_index
+
+    def read_lines(
+        self,
+        handle: str,
+        start_line: int = 1,
+        line_count: int = 200,
+        max_bytes: int = 4 * DEFAULT_PAGE_SIZE
+    ) -> OutputPage:
+        """
+        按行号读取一页
+
+        Args:
+            handle: 输出句柄
+            start_line: 起始行号（从 1 开始）
+            line_count: 最多读取的行数
+            max_bytes: 单页最多字节数，超出时提前结束
+
+        Returns:
+            OutputPage: 该页内容，end_line 为最后一行的行号
+
+        Raises:
+            KeyError: 句柄不存在或已过期
+        """
+        entry = self._get(handle)
+        index = self._line_index(entry)
+        start_line = max(1, min(start_line, entry.line_count + 1))
+        block, skip = divmod(start_line - 1, self.LINE_INDEX_STEP)
+
+        lines: List[bytes] = []
+        size = 0
+        with self._open(entry) as f:
+            f.seek(index[block])
+            for _ in range(skip):
+                f.readline()
+            offset = f.tell()
+            while len(lines) < line_count:
+                line = f.readline()
+                if not line or (lines and size + len(line) > max_bytes):
+                    break
+                lines.append(line)
+                size += len(line)
+
+        return OutputPage(
+            handle=handle,
+            offset=offset,
+            next_offset=offset + size,
+            total_bytes=entry.size,
+            data=b"".join(lines).decode("utf-8", errors="replace"),
+            start_line=start_line,
+            end_line=start_line + len(lines) - 1,
+            total_lines=entry.line_count
+        )
+
+    def grep(
+        self,
+        handle: str,
+        pattern: str,
+        ignore_case: bool = False,
+        max_matches: int = 100
+    ) -> GrepResult:
+        """
+        在保存的输出中按正则搜索
+
+        Args:
+            handle: 输出句柄
+            pattern: 正则表达式
+            ignore_case: 忽略大小写
+            max_matches: 最多返回的命中行数
+
+        Returns:
+            GrepResult: 命中的行（带行号）
+
+        Raises:
+            KeyError: 句柄不存在或已过期
+            re.error: 正则表达式无效
+        """
+        regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        entry = self._get(handle)
+        result = GrepResult(handle=handle, pattern=pattern)
+        with self._open(entry) as f:
+            for number, raw in enumerate(f, 1):
+                result.lines_scanned = number
+                text = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+                if regex.search(text):
+                    if len(result.matches) >= max_matches:
+                        result.truncated = True
+                        break
+                    result.matches.append(OutputMatch(line=number, text=text))
+        return result
+
+    def remove(self, handle: str) -> bool:
+        """删除句柄及其数据"""
+        with self._lock:
+            return self._drop(handle) is not None
+
+    def remove_owner(self, owner: str) -> int:
+        """删除某个会话的全部句柄，返回删除数量"""
+        with self._lock:
+            handles = [h for h, e in self._entries.items() if e.owner == owner]
+            return sum(self._drop(handle) is not None for handle in handles)
+
+    def clear(self) -> None:
+        """删除全部句柄和临时目录"""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+            self._disk_bytes = 0
+            directory, self._directory = self._directory, None
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+class OutputCapture:
+    """
+    有界输出捕获
+
+    保留输出的前 head_bytes 和后 tail_bytes 字节（尾部为环形缓冲），
+    中间部分丢弃并计数。提供 store 时，输出首次超出预算才创建溢出文件，
+    此前缓存的内容先写入，之后的输出全部写入，因此文件中是完整输出。
+    溢出文件最多写入 max_spill_bytes 字节，或在 store 的磁盘上限用尽时提前停止；
+    此后文件中只保留输出的前缀（spill_truncated），首尾捕获不受影响。
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = DEFAULT_HEAD_BYTES,
+        tail_bytes: int = DEFAULT_TAIL_BYTES,
+        store: Optional[OutputStore] = None,
+        owner: str = "",
+        max_spill_bytes: int = DEFAULT_MAX_SPILL_BYTES
+    ):
+        self._head_limit = head_bytes
+        self._tail_limit = tail_bytes
+        self._store = store
+        self._owner = owner
+        self._max_spill_bytes = max_spill_bytes
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._total = 0
+        self._spill: Optional[BinaryIO] = None
+        self._handle: Optional[str] = None
+        self._spilled = 0
+        self._spill_truncated = False
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def feed(self, data: bytes) -> None:
+        """追加一段输出"""
+        if not data:
+            return
+        self._total += len(data)
+
+        if self._spill is not None:
+            self._write_spill(data)
+        elif (
+            self._store is not None
+            and not self._spill_truncated
+            and self._handle is None
+            and self._total > self._head_limit + self._tail_limit
+        ):
+            # 第一次超出预算：此时尚未丢弃任何数据，缓存内容即完整前缀
+            self._handle, self._spill = self._store.open_spill(self._owner)
+            for part in (self._head, self._tail, data):
+                if not self._write_spill(part):
+                    break
+
+        room = self._head_limit - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if not data or self._tail_limit <= 0:
+            return
+
+        self._tail += data
+        # 摊销裁剪：超过两倍容量才移动数据
+        if len(self._tail) > 2 * self._tail_limit:
+            del self._tail[:len(self._tail) - self._tail_limit]
+
+    def _write_spill(self, data) -> bool:
+        """写入溢出文件；超出单次上限或磁盘上限时写入能放下的部分并停止溢出，返回 False"""
+        if not data:
+            return True
+        chunk = data[:max(0, self._max_spill_bytes - self._spilled)]
+        if chunk and self._store.reserve(self._handle, len(chunk)):
+            self._spill.write(chunk)
+            self._spilled += len(chunk)
+            if len(chunk) == len(data):
+                return True
+        self._spill_truncated = True
+        self._close_spill()
+        return False
+
+    def _close_spill(self) -> None:
+        if self._spill is None:
+            return
+        self._spill.close()
+        self._spill = None
+        if self._spilled:
+            self._store.complete(self._handle, self._spilled)
+        else:
+            # 磁盘上限已满，一个字节都没有写入：不保留空句柄
+            self._store.remove(self._handle)
+            self._handle = None
+
+    def finish(self) -> CapturedOutput:
+        """结束捕获，返回保留的文本和统计"""
+        if len(self._tail) > self._tail_limit:
+            del self._tail[:len(self._tail) - self._tail_limit]
+        dropped = self._total - len(self._head) - len(self._tail)
+
+        self._close_spill()
+
+        if dropped <= 0:
+            text = bytes(self._head + self._tail).decode("utf-8", errors="replace")
+        else:
+            head = bytes(self._head[:_utf8_head_end(self._head)])
+            tail = bytes(self._tail[_utf8_tail_start(self._tail):])
+            text = (
+                head.decode("utf-8", errors="replace")
+                + f"\n... [{dropped} bytes omitted] ...\n"
+                + tail.decode("utf-8", errors="replace")
+            )
+        return CapturedOutput(
+            text=text,
+            total_bytes=self._total,
+            dropped_bytes=max(dropped, 0),
+            handle=self._handle,
+            spill_truncated=self._spill_truncated,
+            spilled_bytes=self._spilled
+        )
+
+    def abort(self) -> None:
+        """放弃捕获，删除已创建的溢出文件"""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        if self._handle is not None:
+            self._store.remove(self._handle)
+            self._handle = None
+
+
+def paginate_result(result: dict, page_size: int, store: Optional[OutputStore] = None) -> dict:
+    """
+    把超过一页的 stdout / stderr 替换为第一页，并附上输出句柄
+
+    已溢出到文件的输出直接使用溢出句柄（包含完整输出）；
+    其余超过一页的输出保存到 store 中。附加的键：
+    {stream}_handle、{stream}_next_offset、{stream}_stored_bytes。
+
+    Args:
+        result: SessionManager.execute_command 返回的结果
+        page_size: 每页字节数
+        store: 输出存储，默认使用全局 output_store
+
+    Returns:
+        dict: 修改后的结果
+    """
+    store = store or output_store
+    for stream in ("stdout", "stderr"):
+        text = result.get(stream) or ""
+        handle = result.get(f"{stream}_handle")
+        if handle is None:
+            encoded = text.encode("utf-8")
+            if len(encoded) <= page_size:
+                continue
+            try:
+                handle = store.put(encoded, owner=result.get("session_id", ""))
+            except OSError:
+                continue
+        try:
+            page = store.read(handle, 0, page_size)
+        except KeyError:
+            continue
+        result[stream] = page.data
+        result[f"{stream}_handle"] = handle
+        result[f"{stream}_next_offset"] = page.next_offset
+        result[f"{stream}_stored_bytes"] = page.total_bytes
+    return result
+
+
+output_store = OutputStore()
+atexit.register(output_store.clear)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .batch_executor import HostResult
+
+
+@dataclass
+class OutputGroup:
+    """输出完全相同（退出码、stdout、stderr、错误信息）的一组主机，输出只保存一份"""
+    digest: str
+    exit_code: int
+    success: bool
+    stdout: str
+    stderr: str
+    error_message: str
+    hosts: List[str] = field(default_factory=list)
+    min_latency_ms: float = 0.0
+    max_latency_ms: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.hosts)
+
+    @property
+    def output_bytes(self) -> int:
+        return len(self.stdout) + len(self.stderr) + len(self.error_message)
+
+
+def result_digest(result: HostResult) -> str:
+    """按退出码、错误信息、stdout 和 stderr 计算摘要（字段之间带长度前缀，避免拼接歧义）"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (str(result.return_code), result.error_message, result.stdout, result.stderr):
+        data = part.encode("utf-8", errors="surrogatepass")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResultAggregator:
+    """
+    批量执行结果聚合 - 相同输出只保存一份，按输出对主机分组
+
+    结果逐个加入（可直接消费 execute_stream），内存占用与不同输出的数量成正比，
+    而不是主机数量；人数最多的组视为多数结果，其余组可与之对比差异。
+
+    用法:
+        aggregator = ResultAggregator()
+        async for item in executor.execute_stream(command):
+            if isinstance(item, HostResult):
+                aggregator.add(item)
+        for group in aggregator.groups():
+            ...
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, OutputGroup] = {}
+        self._total_hosts = 0
+        self._total_bytes = 0
+
+    def add(self, result: HostResult, label: Optional[str] = None) -> OutputGroup:
+        """
+        加入一个主机结果
+
+        Args:
+            result: 主机结果
+            label: 主机显示名，默认 "主机:端口"
+
+        Returns:
+            OutputGroup: 结果所属的分组
+        """
+        label = sys.intern(label or f"{result.host}:{result.port}")
+        digest = result_digest(result)
+        group = self._groups.get(digest)
+        if group is None:
+            group = OutputGroup(
+                digest=digest,
+                exit_code=result.return_code,
+                success=result.success,
+                stdout=result.stdout,
+                stderr=result.stderr,
+                error_message=result.error_message,
+                min_latency_ms=result.latency_ms,
+                max_latency_ms=result.latency_ms
+            )
+            self._groups[digest] = group
+        else:
+            group.min_latency_ms = min(group.min_latency_ms, result.latency_ms)
+            group.max_latency_ms = max(group.max_latency_ms, result.latency_ms)
+        group.hosts.append(label)
+
+        self._total_hosts += 1
+        self._total_bytes += len(result.stdout) + len(result.stderr) + len(result.error_message)
+        return group
+
+    def extend(self, results: Iterable[HostResult]) -> "ResultAggregator":
+        for result in results:
+            self.add(result)
+        return self
+
+    def groups(self) -> List[OutputGroup]:
+        """按主机数从多到少排列的分组"""
+        return sorted(self._groups.values(), key=lambda group: -group.size)
+
+    def majority(self) -> Optional[OutputGroup]:
+        """主机数最多的分组（并列时取先出现的）"""
+        return max(self._groups.values(), key=lambda group: group.size, default=None)
+
+    def outliers(self) -> List[OutputGroup]:
+        """多数结果以外的分组"""
+        majority = self.majority()
+        return [group for group in self.groups() if group is not majority]
+
+    def diff(
+        self,
+        group: OutputGroup,
+        against: Optional[OutputGroup] = None,
+        context: int = 1,
+        max_lines: int = 40,
+        max_input_lines: int = 2000
+    ) -> str:
+        """
+        某个分组与多数结果（或指定分组）的输出差异
+
+        Args:
+            group: 要对比的分组
+            against: 对比基准，默认多数结果
+            context: 差异上下文行数
+            max_lines: 返回的最大差异行数
+            max_input_lines: 参与对比的最大输出行数（超出部分不对比，避免大输出耗时过长）
+
+        Returns:
+            str: unified diff 文本；与基准相同时为空字符串
+        """
+        base = against or self.majority()
+        if base is None or base is group:
+            return ""
+
+        lines: List[str] = []
+        for stream in ("stdout", "stderr", "error_message"):
+            old = getattr(base, stream).splitlines()[:max_input_lines]
+            new = getattr(group, stream).splitlines()[:max_input_lines]
+            if old == new:
+                continue
+            lines.extend(difflib.unified_diff(
+                old, new,
+                fromfile=f"{stream} ({base.size} hosts)",
+                tofile=f"{stream} ({group.size} hosts)",
+                lineterm="",
+                n=context
+            ))
+        if len(lines) > max_lines:
+            lines = lines[:max_lines] + [f"... (+{len(lines) - max_lines} diff lines)"]
+        return "\n".join(lines)
+
+    @property
+    def total_hosts(self) -> int:
+        return self._total_hosts
+
+    @property
+    def distinct_outputs(self) -> int:
+        return len(self._groups)
+
+    def stats(self) -> Dict[str, int]:
+        """主机数、不同输出数，以及输出总字节数与实际保存的字节数"""
+        return {
+            "hosts": self._total_hosts,
+            "distinct_outputs": len(self._groups),
+            "output_bytes": self._total_bytes,
+            "stored_bytes": sum(group.output_bytes for group in self._groups.values()),
+        }
+
+
+def aggregate_results(results: Iterable[HostResult]) -> ResultAggregator:
+    """聚合一组已收集的主机结果"""
+    return ResultAggregator().extend(results)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .security import CommandValidator, SecurityError
+
+
+CACHE_ENV = "SSH_CACHE_COMMANDS"
+CACHE_RULES_ENV = "SSH_CACHE_RULES"
+
+# 变量展开、命令替换、通配符、波浪号、命令组合和重定向：结果取决于远程 shell 的展开，
+# 引号写法不同时含义也不同，这类命令不缓存也不合并
+_SHELL_SYNTAX = re.compile(r"[$`*?\[~;|&<>\n\r]")
+
+
+@dataclass
+class CacheRule:
+    """一类可缓存命令：按命令前缀（拆分后的词）匹配，共用一个 TTL"""
+    name: str
+    ttl: float
+    prefixes: List[Tuple[str, ...]] = field(default_factory=list)
+
+    def matches(self, argv: List[str]) -> bool:
+        return any(tuple(argv[:len(prefix)]) == prefix for prefix in self.prefixes)
+
+
+DEFAULT_RULES: List[CacheRule] = [
+    CacheRule("system", 3600, [
+        ("uname",), ("hostname",), ("whoami",), ("nproc",), ("arch",),
+        ("cat", "/etc/os-release"), ("lsb_release",),
+    ]),
+    CacheRule("inventory", 30, [
+        ("docker", "images"), ("docker", "ps"), ("docker", "version"), ("docker", "info"),
+        ("which",), ("whereis",),
+    ]),
+    CacheRule("metrics", 10, [
+        ("df",), ("free",), ("uptime",), ("du",),
+    ]),
+    CacheRule("listing", 5, [
+        ("ls",), ("dir",),
+    ]),
+]
+
+# 只读但不缓存的命令：执行时不会使缓存失效
+READ_ONLY_PREFIXES: List[Tuple[str, ...]] = [
+    ("cat",), ("head",), ("tail",), ("less",), ("more",), ("grep",), ("find",),
+    ("cd",), ("pwd",), ("echo",), ("printf",), ("date",), ("cal",), ("ps",), ("top",),
+    ("wc",), ("sort",), ("uniq",), ("cut",), ("stat",), ("file",), ("id",),
+    ("ping",), ("netstat",), ("ss",), ("dig",), ("nslookup",),
+    ("journalctl",), ("systemctl", "status"), ("service", "--status-all"),
+    ("docker", "logs"), ("docker", "inspect"), ("docker", "stats"), ("docker", "top"),
+    ("docker", "port"), ("docker", "history"),
+]
+
+
+def parse_rules(spec: str) -> List[CacheRule]:
+    """
+    解析自定义缓存规则
+
+    格式："命令前缀=TTL秒,..."，例如 "lsblk=60,docker network ls=30"
+    """
+    rules = []
+    for item in spec.split(","):
+        prefix, _, ttl = item.partition("=")
+        prefix = prefix.strip()
+        if not prefix or not ttl.strip():
+            continue
+        argv = tuple(CommandValidator.split_command(prefix))
+        rules.append(CacheRule(name=prefix, ttl=float(ttl), prefixes=[argv]))
+    return rules
+
+
+def rules_from_env() -> List[CacheRule]:
+    """默认规则加上 SSH_CACHE_RULES 中的自定义规则（自定义规则优先）"""
+    extra = os.getenv(CACHE_RULES_ENV, "")
+    return (parse_rules(extra) if extra else []) + DEFAULT_RULES
+
+
+def literal_argv(command: str) -> Optional[List[str]]:
+    """不含 shell 展开和组合的单条命令返回拆分后的词，否则返回 None"""
+    if _SHELL_SYNTAX.search(command):
+        return None
+    try:
+        argv = CommandValidator.split_command(command)
+    except SecurityError:
+        return None
+    return argv or None
+
+
+def is_read_only_command(command: str, rules: Optional[List[CacheRule]] = None) -> bool:
+    """
+    命令是否为允许列表中的只读命令（缓存规则或只读前缀），且不含 shell 展开
+
+    Args:
+        command: 命令
+        rules: 缓存规则，默认为 rules_from_env()
+    """
+    argv = literal_argv(command)
+    if argv is None:
+        return False
+    rules = rules_from_env() if rules is None else rules
+    if any(rule.matches(argv) for rule in rules):
+        return True
+    return any(tuple(argv[:len(prefix)]) == prefix for prefix in READ_ONLY_PREFIXES)
+
+
+def caching_enabled() -> bool:
+    """环境变量 SSH_CACHE_COMMANDS 是否开启结果缓存"""
+    return os.getenv(CACHE_ENV, "false").lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class _CacheEntry:
+    result: dict
+    expires_at: float
+    stored_at: float
+    size: int
+    rule: str
+
+
+class ResultCache:
+    """
+    只读命令的结果缓存
+
+    - 只缓存允许列表中的单条命令（不含管道、重定向、变量展开、通配符等），按命令类别设置 TTL
+    - 键为主机、端口、用户和去掉首尾空白的原始命令（保留引号写法）
+    - 只缓存成功（退出码 0）且未截断的结果
+    - 按条目数和输出字节数做 LRU 淘汰
+    - 同一主机上执行了可能修改状态的命令（不在只读列表中）时，清除该主机的全部缓存
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[CacheRule]] = None,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024
+    ):
+        self._rules = rules if rules is not None else rules_from_env()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        # 每个主机的失效代数：执行期间发生失效的结果不再写入
+        self._generations: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+        self._logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def _argv(command: str) -> Optional[List[str]]:
+        if not CommandValidator.is_simple_command(command):
+            return None
+        try:
+            argv = CommandValidator.split_command(command)
+        except SecurityError:
+            return None
+        return argv or None
+
+    def classify(self, command: str) -> Optional[CacheRule]:
+        """返回命令所属的缓存规则；不可缓存时返回 None"""
+        argv = literal_argv(command)
+        if argv is None:
+            return None
+        return next((rule for rule in self._rules if rule.matches(argv)), None)
+
+    def is_mutating(self, command: str) -> bool:
+        """命令是否可能修改远程状态（复合命令一律视为可能修改）"""
+        argv = self._argv(command)
+        if argv is None:
+            return True
+        if any(rule.matches(argv) for rule in self._rules):
+            return False
+        return not any(tuple(argv[:len(prefix)]) == prefix for prefix in READ_ONLY_PREFIXES)
+
+    @staticmethod
+    def _host_key(host: str, port: int) -> Tuple[str, int]:
+        return (host, port)
+
+    def _key(self, host: str, port: int, username: str, command: str) -> tuple:
+        return (self._host_key(host, port), username, command.strip())
+
+    def get(self, host: str, port: int, username: str, command: str) -> Optional[dict]:
+        """
+        查询缓存
+
+        Returns:
+            Optional[dict]: 命中时返回结果副本（带 cached=True 和 cache_age_s），否则 None
+        """
+        if self.classify(command) is None:
+            return None
+        key = self._key(host, port, username, command)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._remove(key)
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return {**entry.result, "cached": True, "cache_age_s": round(now - entry.stored_at, 3)}
+
+    def generation(self, host: str, port: int) -> int:
+        """主机当前的失效代数，执行命令前取得，保存结果时传给 put"""
+        with self._lock:
+            return self._generations.get(self._host_key(host, port), 0)
+
+    def put(
+        self, host: str, port: int, username: str, command: str, result: dict,
+        generation: Optional[int] = None
+    ) -> bool:
+        """
+        保存结果（不可缓存的命令或结果被忽略），返回是否已保存
+
+        generation 与主机当前代数不一致时（执行期间该主机的缓存被清除过）不保存。
+        """
+        rule = self.classify(command)
+        if rule is None or result.get("exit_code") != 0:
+            return False
+        if result.get("stdout_dropped_bytes") or result.get("stderr_dropped_bytes"):
+            return False
+
+        size = len(result.get("stdout") or "") + len(result.get("stderr") or "")
+        if size > self._max_bytes // 4:
+            return False
+        key = self._key(host, port, username, command)
+        now = time.monotonic()
+        with self._lock:
+            if generation is not None and generation != self._generations.get(key[0], 0):
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(
+                result=dict(result), expires_at=now + rule.ttl, stored_at=now, size=size, rule=rule.name
+            )
+            self._bytes += size
+            self._stats["stores"] += 1
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+        return True
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate_host(self, host: str, port: int) -> int:
+        """清除某个主机的全部缓存，返回清除数量"""
+        host_key = self._host_key(host, port)
+        with self._lock:
+            self._generations[host_key] = self._generations.get(host_key, 0) + 1
+            keys = [key for key in self._entries if key[0] == host_key]
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._stats["invalidations"] += 1
+        if keys:
+            self._logger.debug(f"Invalidated {len(keys)} cached results for {host}:{port}")
+        return len(keys)
+
+    def observe(self, host: str, port: int, command: str) -> None:
+        """命令执行后调用：可能修改状态的命令使该主机的缓存失效"""
+        if self.is_mutating(command):
+            self.invalidate_host(host, port)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """命中 / 未命中等统计"""
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, List, Optional, Union
+
+from .adaptive_limiter import LimiterConfig
+from .batch_executor import (
+    AsyncBatchExecutor,
+    BatchResultStatus,
+    BatchSummary,
+    HostResultStore,
+    _batch_status,
+)
+from .connection_config import ConnectionConfig
+from .connection_pool import AsyncConnectionCache
+
+
+@dataclass
+class RolloutStrategy:
+    """
+    分批执行策略
+
+    - canary：先在前 canary 台主机上执行，通过后再执行其余主机
+    - wave_size / wave_percent：其余主机按固定台数或按总数的百分比分批；都不设置时一次执行完
+    - max_failure_rate：任一批的失败率超过该值时停止，后续批次不再执行（默认任何失败都停止）
+    """
+    canary: int = 0
+    wave_size: Optional[int] = None
+    wave_percent: Optional[float] = None
+    max_failure_rate: float = 0.0
+
+    def __post_init__(self):
+        if self.canary < 0:
+            raise ValueError("canary must be >= 0")
+        if self.wave_size is not None and self.wave_size < 1:
+            raise ValueError("wave_size must be >= 1")
+        if self.wave_percent is not None and not 0 < self.wave_percent <= 100:
+            raise ValueError("wave_percent must be in (0, 100]")
+        if not 0 <= self.max_failure_rate <= 1:
+            raise ValueError("max_failure_rate must be in [0, 1]")
+
+    @classmethod
+    def canary_first(
+        cls, canary: int = 1, wave_size: Optional[int] = None, max_failure_rate: float = 0.0
+    ) -> "RolloutStrategy":
+        return cls(canary=canary, wave_size=wave_size, max_failure_rate=max_failure_rate)
+
+    @classmethod
+    def fixed_waves(cls, wave_size: int, max_failure_rate: float = 0.0) -> "RolloutStrategy":
+        return cls(wave_size=wave_size, max_failure_rate=max_failure_rate)
+
+    @classmethod
+    def percentage_waves(cls, wave_percent: float, max_failure_rate: float = 0.0) -> "RolloutStrategy":
+        return cls(wave_percent=wave_percent, max_failure_rate=max_failure_rate)
+
+    def plan(self, total: int) -> List[int]:
+        """
+        各批的主机数
+
+        Args:
+            total: 主机总数
+
+        Returns:
+            List[int]: 依次执行的每批主机数，总和为 total
+        """
+        sizes: List[int] = []
+        remaining = total
+        if self.canary and remaining:
+            sizes.append(min(self.canary, remaining))
+            remaining -= sizes[0]
+        if self.wave_size is not None:
+            step = self.wave_size
+        elif self.wave_percent is not None:
+            step = max(1, math.ceil(total * self.wave_percent / 100))
+        else:
+            step = remaining
+        while remaining > 0:
+            sizes.append(min(step, remaining))
+            remaining -= sizes[-1]
+        return sizes
+
+
+@dataclass
+class WaveResult:
+    """一批主机的执行结果，在该批全部完成后产出"""
+    index: int
+    total_waves: int
+    canary: bool
+    summary: BatchSummary
+    results: HostResultStore
+    passed: bool
+
+    @property
+    def failure_rate(self) -> float:
+        return self.summary.failed_count / self.summary.total_hosts if self.summary.total_hosts else 0.0
+
+
+@dataclass
+class RolloutSummary:
+    """分批执行的汇总，作为 execute_stream 的最后一项产出"""
+    rollout_id: str
+    status: BatchResultStatus
+    total_hosts: int
+    waves_planned: int
+    waves_run: int = 0
+    success_count: int = 0
+    failed_count: int = 0
+    stopped: bool = False
+    stop_reason: str = ""
+    # 因提前停止而未执行的主机
+    skipped_hosts: List[ConnectionConfig] = field(default_factory=list)
+    total_time_ms: float = 0.0
+
+
+class RolloutExecutor:
+    """
+    分批（金丝雀 / 滚动）批量执行器
+
+    按 RolloutStrategy 把主机分成若干批，每批用 AsyncBatchExecutor 并发执行；
+    一批通过（失败率不超过阈值）后立即开始下一批，超过阈值时停止，其余主机不再执行。
+    所有批次共用一个连接缓存。
+
+    用法:
+        executor = RolloutExecutor(hosts, RolloutStrategy.canary_first(1, wave_size=10))
+        async for item in executor.execute_stream("systemctl restart app"):
+            if isinstance(item, WaveResult):
+                ...
+    """
+
+    def __init__(
+        self,
+        hosts: List[ConnectionConfig],
+        strategy: RolloutStrategy,
+        max_concurrent: int = 50,
+        timeout: int = 60,
+        connection_cache: Optional[AsyncConnectionCache] = None,
+        adaptive: Optional[bool] = None,
+        limiter_config: Optional[LimiterConfig] = None
+    ):
+        self._hosts = hosts
+        self._strategy = strategy
+        self._max_concurrent = max_concurrent
+        self._timeout = timeout
+        self._adaptive = adaptive
+        self._limiter_config = limiter_config
+
+        # 传入的缓存由调用方负责关闭
+        self._owns_connections = connection_cache is None
+        self._connections = connection_cache or AsyncConnectionCache()
+
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def strategy(self) -> RolloutStrategy:
+        return self._strategy
+
+    async def close(self) -> None:
+        """关闭执行器自己创建的连接缓存"""
+        if self._owns_connections:
+            await self._connections.close()
+
+    async def execute(self, command: str) -> RolloutSummary:
+        """执行全部批次，只返回汇总"""
+        summary: Optional[RolloutSummary] = None
+        async for item in self.execute_stream(command):
+            if isinstance(item, RolloutSummary):
+                summary = item
+        return summary
+
+    async def execute_stream(self, command: str) -> AsyncIterator[Union[WaveResult, RolloutSummary]]:
+        """
+        流式分批执行：每批完成后产出 WaveResult，最后产出 RolloutSummary
+
+        Args:
+            command: 要执行的命令
+        """
+        rollout_id = str(uuid.uuid4())
+        start_time = time.time()
+        sizes = self._strategy.plan(len(self._hosts))
+        summary = RolloutSummary(
+            rollout_id=rollout_id,
+            status=BatchResultStatus.SUCCESS,
+            total_hosts=len(self._hosts),
+            waves_planned=len(sizes)
+        )
+
+        self._logger.info(
+            f"Starting rollout: rollout_id={rollout_id}, hosts={len(self._hosts)}, "
+            f"waves={sizes}, command='{command}'"
+        )
+
+        offset = 0
+        for index, size in enumerate(sizes):
+            wave_hosts = self._hosts[offset:offset + size]
+            offset += size
+
+            executor = AsyncBatchExecutor(
+                wave_hosts,
+                max_concurrent=self._max_concurrent,
+                timeout=self._timeout,
+                connection_cache=self._connections,
+                adaptive=self._adaptive,
+                limiter_config=self._limiter_config
+            )
+            results = HostResultStore()
+            wave_summary: Optional[BatchSummary] = None
+            async for item in executor.execute_stream(command):
+                if isinstance(item, BatchSummary):
+                    wave_summary = item
+                else:
+                    results.append(item)
+
+            wave = WaveResult(
+                index=index,
+                total_waves=len(sizes),
+                canary=index == 0 and self._strategy.canary > 0,
+                summary=wave_summary,
+                results=results,
+                passed=True
+            )
+            wave.passed = wave.failure_rate <= self._strategy.max_failure_rate
+            summary.waves_run += 1
+            summary.success_count += wave_summary.success_count
+            summary.failed_count += wave_summary.failed_count
+
+            self._logger.info(
+                f"Rollout wave {index + 1}/{len(sizes)}: hosts={size}, "
+                f"failed={wave_summary.failed_count}, passed={wave.passed}"
+            )
+            yield wave
+
+            if not wave.passed and offset < len(self._hosts):
+                summary.stopped = True
+                summary.stop_reason = (
+                    f"wave {index + 1} failure rate {wave.failure_rate:.0%} "
+                    f"exceeds {self._strategy.max_failure_rate:.0%}"
+                )
+                summary.skipped_hosts = self._hosts[offset:]
+                self._logger.warning(
+                    f"Rollout stopped: rollout_id={rollout_id}, {summary.stop_reason}, "
+                    f"skipped={len(summary.skipped_hosts)}"
+                )
+                break
+
+        summary.status = _batch_status(summary.success_count, summary.failed_count + len(summary.skipped_hosts))
+        summary.total_time_ms = (time.time() - start_time) * 1000
+        yield summary
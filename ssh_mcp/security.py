@@ -6,7 +6,7 @@ SSH LICCO Security Module
 import re
 import shlex
 import os
-from typing import Set, Optional
+from typing import List, Set, Optional
 from pathlib import Path
 from enum import Enum
 
@@ -158,10 +158,7 @@ class CommandValidator:
             raise SecurityError("命令不能为空")
         
         # 分割命令获取基础命令
-        try:
-            cmd_parts = shlex.split(command)
-        except ValueError as e:
-            raise SecurityError(f"命令格式错误：{e}")
+        cmd_parts = self.split_command(command)
         
         if not cmd_parts:
             raise SecurityError("命令不能为空")
@@ -205,6 +202,24 @@ class CommandValidator:
         
         return True
     
+    @staticmethod
+    def split_command(command: str) -> List[str]:
+        """
+        按 shell 规则拆分命令
+        
+        Raises:
+            SecurityError: 命令格式错误（如引号不配对）
+        """
+        try:
+            return shlex.split(command)
+        except ValueError as e:
+            raise SecurityError(f"命令格式错误：{e}")
+    
+    @classmethod
+    def is_simple_command(cls, command: str) -> bool:
+        """是否为单条命令（不含管道、后台、命令分隔、命令替换和重定向）"""
+        return not any(re.search(pattern, command) for pattern in cls.DANGEROUS_PATTERNS_STRICT)
+    
     def _find_similar_commands(self, cmd: str) -> list:
         """查找相似的允许命令（用于友好提示）"""
         similar = []
@@ -14,6 +14,7 @@ from .connection_config import ConnectionConfig
 from .session_manager import SessionManager, SessionInfo
 from .key_manager import KeyManager
 from .config_manager import ConfigManager, SSHConfig, SSHHost
+from .connection_pool import AsyncConnectionCache
 
 try:
     __version__ = get_version("ssh-licco")
@@ -29,6 +30,8 @@ class SSHMCPServer:
         self.session_manager = SessionManager()
         self.key_manager = KeyManager()
         self.config_manager = ConfigManager()
+        # ssh_batch_execute 的连接在多次调用之间复用
+        self.batch_connections = AsyncConnectionCache()
         self._env_config = self._load_env_config()
         self._logger = logger
         self._setup_handlers()
@@ -113,11 +116,68 @@ class SSHMCPServer:
                             "session_id": {"type": "string", "description": "Session ID from ssh_connect"},
                             "command": {"type": "string", "description": "Command to execute"},
                             "timeout": {"type": "integer", "description": "Command timeout in seconds", "default": 30},
-                            "background": {"type": "boolean", "description": "Run in background (don't wait for completion, useful for services)", "default": False}
+                            "background": {"type": "boolean", "description": "Run in background (don't wait for completion, useful for services)", "default": False},
+                            "page_size": {"type": "integer", "description": "Max bytes of each output stream returned inline; longer output is returned as a first page plus a handle for ssh_output", "default": 32768},
+                            "mode": {"type": "string", "enum": ["exec", "shell"], "description": "exec: new channel per command; shell: reuse a persistent shell that keeps cwd and environment between calls (faster for many small commands)", "default": "exec"}
                         },
                         "required": ["session_id", "command"]
                     }
                 ),
+                Tool(
+                    name="ssh_output",
+                    description="Read more of a large command output by handle: a byte range, a line range, or lines matching a regex",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "handle": {"type": "string", "description": "Output handle returned by ssh_execute"},
+                            "offset": {"type": "integer", "description": "Byte offset to read from (use the next offset from the previous page)", "default": 0},
+                            "length": {"type": "integer", "description": "Max bytes to return", "default": 32768},
+                            "start_line": {"type": "integer", "description": "Read by line instead: first line number (1-based)"},
+                            "line_count": {"type": "integer", "description": "Number of lines to return with start_line", "default": 200},
+                            "pattern": {"type": "string", "description": "Regex to search for; returns matching lines with line numbers"},
+                            "ignore_case": {"type": "boolean", "description": "Case-insensitive pattern match", "default": False},
+                            "max_matches": {"type": "integer", "description": "Max matching lines to return", "default": 100},
+                            "release": {"type": "boolean", "description": "Delete the stored output and free its handle", "default": False}
+                        },
+                        "required": ["handle"]
+                    }
+                ),
+                Tool(
+                    name="ssh_host_facts",
+                    description="Get cached facts about a session's host (OS, kernel, CPUs, memory, disks, docker version, listening ports) without running individual commands",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "session_id": {"type": "string", "description": "Session ID"},
+                            "refresh": {"type": "boolean", "description": "Re-gather the facts instead of using the cached copy", "default": False},
+                            "format": {"type": "string", "enum": ["text", "json"], "description": "Output format", "default": "text"}
+                        },
+                        "required": ["session_id"]
+                    }
+                ),
+                Tool(
+                    name="ssh_batch_execute",
+                    description="Run one command on many configured hosts at once (selected by name, tag or host group from config/hosts.json) and return a compact per-host summary",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "command": {"type": "string", "description": "Command to execute on every selected host"},
+                            "hosts": {"type": "array", "items": {"type": "string"}, "description": "Host names from config/hosts.json"},
+                            "tags": {"type": "array", "items": {"type": "string"}, "description": "Select every host carrying one of these tags"},
+                            "groups": {"type": "array", "items": {"type": "string"}, "description": "Host groups from config/hosts.json ('all' selects every host)"},
+                            "timeout": {"type": "integer", "description": "Per-host command timeout in seconds", "default": 60},
+                            "max_concurrent": {"type": "integer", "description": "Max hosts running at the same time", "default": 20},
+                            "output_lines": {"type": "integer", "description": "Lines of output shown per distinct result", "default": 5},
+                            "show_diff": {"type": "boolean", "description": "Show a diff against the majority output for hosts that differ", "default": True},
+                            "adaptive": {"type": "boolean", "description": "Adapt concurrency to host latency and timeouts, up to max_concurrent (default: SSH_ADAPTIVE_CONCURRENCY)"},
+                            "canary": {"type": "integer", "description": "Run on this many hosts first and continue only if they pass"},
+                            "wave_size": {"type": "integer", "description": "Roll out in waves of this many hosts"},
+                            "wave_percent": {"type": "number", "description": "Roll out in waves of this percentage of the selected hosts"},
+                            "max_failure_rate": {"type": "number", "description": "Stop the rollout when a wave's failure rate exceeds this fraction (0-1)", "default": 0}
+                        },
+                        "required": ["command"]
+                    }
+                ),
                 Tool(
                     name="ssh_disconnect",
                     description="Close an SSH session",
@@ -152,18 +212,38 @@ class SSHMCPServer:
                 ),
                 Tool(
                     name="ssh_file_transfer",
-                    description="Transfer files via SFTP",
+                    description="Transfer files or directories via SFTP (directories with many files are streamed as a tar archive)",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "session_id": {"type": "string", "description": "Session ID"},
                             "local_path": {"type": "string", "description": "Local file path"},
                             "remote_path": {"type": "string", "description": "Remote file path"},
-                            "direction": {"type": "string", "enum": ["upload", "download"], "description": "Transfer direction"}
+                            "direction": {"type": "string", "enum": ["upload", "download"], "description": "Transfer direction"},
+                            "resume": {"type": "boolean", "description": "Resume a partial transfer after verifying the existing prefix (default: True)", "default": True},
+                            "mode": {"type": "string", "enum": ["auto", "sftp", "tar"], "description": "Directory transfer mode: auto picks a tar stream when the directory has many files (default: auto)", "default": "auto"},
+                            "compression": {"type": "string", "enum": ["none", "gzip", "zstd"], "description": "Compression for tar stream transfers (default: gzip)", "default": "gzip"}
                         },
                         "required": ["session_id", "local_path", "remote_path", "direction"]
                     }
                 ),
+                Tool(
+                    name="ssh_sync",
+                    description="Sync a local directory to a remote directory, sending only changed files or changed blocks (rsync-style)",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "session_id": {"type": "string", "description": "Session ID"},
+                            "local_dir": {"type": "string", "description": "Local source directory"},
+                            "remote_dir": {"type": "string", "description": "Remote target directory"},
+                            "delete": {"type": "boolean", "description": "Delete remote files that do not exist locally (default: False)", "default": False},
+                            "checksum": {"type": "boolean", "description": "Compare files by sha256 instead of size and mtime (default: False)", "default": False},
+                            "exclude": {"type": "array", "items": {"type": "string"}, "description": "Glob patterns to exclude (e.g. ['*.pyc', '.git/*'])"},
+                            "dry_run": {"type": "boolean", "description": "Only report what would change (default: False)", "default": False}
+                        },
+                        "required": ["session_id", "local_dir", "remote_dir"]
+                    }
+                ),
                 Tool(
                     name="ssh_background_task",
                     description="Execute long-running commands (like Docker build) in background with optional status polling. Use wait=True to wait for completion.",
@@ -256,7 +336,8 @@ class SSHMCPServer:
                             "port": {"type": "integer", "description": "SSH port", "default": 22},
                             "username": {"type": "string", "description": "SSH username", "default": "root"},
                             "password": {"type": "string", "description": "SSH password (optional)"},
-                            "timeout": {"type": "integer", "description": "Connection timeout", "default": 60}
+                            "timeout": {"type": "integer", "description": "Connection timeout", "default": 60},
+                            "tags": {"type": "array", "items": {"type": "string"}, "description": "Tags for selecting hosts in ssh_batch_execute (e.g. ['web', 'prod'])"}
                         },
                         "required": ["name", "host"]
                     }
@@ -285,6 +366,12 @@ class SSHMCPServer:
                     return await self._handle_connect(arguments)
                 elif name == "ssh_execute":
                     return await self._handle_execute(arguments)
+                elif name == "ssh_output":
+                    return await self._handle_output(arguments)
+                elif name == "ssh_host_facts":
+                    return await self._handle_host_facts(arguments)
+                elif name == "ssh_batch_execute":
+                    return await self._handle_batch_execute(arguments)
                 elif name == "ssh_disconnect":
                     return await self._handle_disconnect(arguments)
                 elif name == "ssh_list_sessions":
@@ -293,6 +380,8 @@ class SSHMCPServer:
                     return await self._handle_generate_key(arguments)
                 elif name == "ssh_file_transfer":
                     return await self._handle_file_transfer(arguments)
+                elif name == "ssh_sync":
+                    return await self._handle_sync(arguments)
                 elif name == "ssh_list_hosts":
                     return await self._handle_list_hosts(arguments)
                 elif name == "ssh_background_task":
@@ -649,25 +738,135 @@ class SSHMCPServer:
         
         timeout = args.get("timeout", 30)
         background = args.get("background", None)
+        page_size = args.get("page_size", 32768)
         
         # 🤖 自动判断是否需要后台执行
         if background is None:
             background = self._should_run_background(command)
             self._logger.info(f"Auto-detected background={background} for command: {command[:50]}...")
         
-        result = await session.execute_command(args["command"], timeout=timeout, background=background)
+        result = await self.session_manager.execute_command(
+            args["session_id"], args["command"], timeout=timeout, background=background,
+            page_size=page_size, mode=args.get("mode", "exec")
+        )
         
         if background:
             output = f"✅ Command started in background\n\n{result['stdout']}"
         else:
             output = f"Exit Code: {result['exit_code']}\n"
+            if "duration_ms" in result:
+                output += (
+                    f"Duration: {result['duration_ms']:.1f}ms "
+                    f"(channel open: {result['channel_latency_ms']:.1f}ms)\n"
+                )
+            if result.get("cwd"):
+                output += f"Working Directory: {result['cwd']}\n"
             if result["stdout"]:
                 output += f"\n--- STDOUT ---\n{result['stdout']}"
+                output += self._format_capture_note(result, "stdout")
             if result["stderr"]:
                 output += f"\n--- STDERR ---\n{result['stderr']}"
+                output += self._format_capture_note(result, "stderr")
         
         return [TextContent(type="text", text=output)]
     
+    @staticmethod
+    def _format_capture_note(result: dict, stream: str) -> str:
+        """说明省略的字节数，以及如何用 ssh_output 读取剩余输出"""
+        notes = []
+        dropped = result.get(f"{stream}_dropped_bytes", 0)
+        if dropped:
+            notes.append(f"{result[f'{stream}_bytes']} bytes total, {dropped} bytes omitted above")
+        handle = result.get(f"{stream}_handle")
+        if handle:
+            next_offset = result.get(f"{stream}_next_offset")
+            stored = result.get(f"{stream}_stored_bytes")
+            if next_offset is not None and stored is not None and next_offset < stored:
+                notes.append(
+                    f"showing bytes 0-{next_offset} of {stored}; "
+                    f"use ssh_output with handle={handle} offset={next_offset} for more, "
+                    f"or start_line / pattern to page by line or search"
+                )
+            elif dropped and not result.get(f"{stream}_spill_truncated"):
+                notes.append(f"full output available via ssh_output handle={handle}")
+            if result.get(f"{stream}_spill_truncated"):
+                notes.append(f"only the first {stored} bytes were saved to handle={handle} (spill limit reached)")
+        if not notes:
+            return ""
+        return f"\n[{stream}: " + "; ".join(notes) + "]\n"
+    
+    async def _handle_output(self, args: dict) -> list[TextContent]:
+        """读取保存的命令输出：字节范围、行范围或正则搜索"""
+        from .output_capture import output_store
+        
+        handle = args["handle"]
+        try:
+            if args.get("release"):
+                removed = output_store.remove(handle)
+                text = f"Released {handle}" if removed else f"Output handle not found or expired: {handle}"
+                return [TextContent(type="text", text=text)]
+            
+            if args.get("pattern"):
+                grep = output_store.grep(
+                    handle,
+                    args["pattern"],
+                    ignore_case=args.get("ignore_case", False),
+                    max_matches=args.get("max_matches", 100)
+                )
+                lines = [f"{m.line}: {m.text}" for m in grep.matches]
+                header = f"{len(grep.matches)} matching lines in {handle}"
+                if grep.truncated:
+                    header += f" (stopped at line {grep.lines_scanned}; raise max_matches for more)"
+                return [TextContent(type="text", text=header + "\n\n" + "\n".join(lines))]
+            
+            if args.get("start_line"):
+                page = output_store.read_lines(handle, args["start_line"], args.get("line_count", 200))
+                header = f"Lines {page.start_line}-{page.end_line} of {page.total_lines} ({handle})"
+            else:
+                page = output_store.read(handle, args.get("offset", 0), args.get("length", 32768))
+                header = f"Bytes {page.offset}-{page.next_offset} of {page.total_bytes} ({handle})"
+        except KeyError as e:
+            return [TextContent(type="text", text=str(e.args[0]))]
+        
+        footer = "\n[end of output]" if page.eof else f"\n[next offset: {page.next_offset}]"
+        return [TextContent(type="text", text=f"{header}\n\n{page.data}{footer}")]
+    
+    async def _handle_host_facts(self, args: dict) -> list[TextContent]:
+        """返回会话所在主机的基本信息（连接时采集并按主机缓存）"""
+        import json
+        
+        facts = await self.session_manager.get_host_facts(
+            args["session_id"], refresh=args.get("refresh", False)
+        )
+        if args.get("format") == "json":
+            return [TextContent(type="text", text=json.dumps(facts.to_dict(), indent=2))]
+        
+        def size(value) -> str:
+            return f"{value / 1024 ** 3:.1f} GiB" if value is not None else "unknown"
+        
+        output = f"🖥️ Host Facts: {facts.host}:{facts.port}\n\n"
+        output += f"Hostname: {facts.hostname or 'unknown'}\n"
+        output += f"OS: {' '.join(filter(None, [facts.os_name, facts.os_version])) or 'unknown'}\n"
+        output += f"Kernel: {' '.join(filter(None, [facts.system, facts.kernel, facts.arch])) or 'unknown'}\n"
+        output += f"CPUs: {facts.cpu_count or 'unknown'}\n"
+        output += f"Memory: {size(facts.memory_available_bytes)} available / {size(facts.memory_total_bytes)} total\n"
+        output += f"Docker: {facts.docker_version or 'not available'}\n"
+        
+        output += "\n--- Disks ---\n"
+        for disk in facts.disks:
+            output += f"{disk.mount}: {size(disk.used_bytes)} / {size(disk.total_bytes)} ({disk.use_percent}%) [{disk.filesystem}]\n"
+        
+        output += "\n--- Listening Ports ---\n"
+        output += ", ".join(f"{p.address}:{p.port}" for p in facts.listening_ports) or "none found"
+        output += "\n"
+        
+        if facts.errors:
+            output += "\n--- Not Available ---\n"
+            for name, error in facts.errors.items():
+                output += f"{name}: {error.splitlines()[0] if error else 'failed'}\n"
+        output += f"\nGathered {facts.age():.0f}s ago in {facts.gather_ms:.0f} ms\n"
+        return [TextContent(type="text", text=output)]
+    
     def _should_run_background(self, command: str) -> bool:
         """自动判断命令是否应该后台执行
         
@@ -898,6 +1097,126 @@ class SSHMCPServer:
         
         return False
 
+    async def _handle_batch_execute(self, args: dict) -> list[TextContent]:
+        """在多台配置的主机上并发执行同一命令（带安全验证），按相同输出分组汇总"""
+        from .batch_executor import AsyncBatchExecutor, BatchSummary
+        from .result_aggregation import ResultAggregator
+        from .rollout import RolloutExecutor, RolloutStrategy, RolloutSummary
+        from .security import SecurityError, command_validator
+        
+        command = args.get("command")
+        try:
+            command_validator.validate_command(command)
+        except SecurityError as e:
+            self._logger.error(f"Batch command blocked: {e}")
+            return [TextContent(type="text", text=f"🛑 命令被安全策略阻止: `{command}`\n原因：{str(e)}")]
+        
+        if not (args.get("hosts") or args.get("tags") or args.get("groups")):
+            return [TextContent(type="text", text="❌ 错误：需要指定 hosts、tags 或 groups 中的至少一项")]
+        strategy = None
+        if args.get("canary") or args.get("wave_size") or args.get("wave_percent"):
+            try:
+                strategy = RolloutStrategy(
+                    canary=args.get("canary") or 0,
+                    wave_size=args.get("wave_size"),
+                    wave_percent=args.get("wave_percent"),
+                    max_failure_rate=args.get("max_failure_rate", 0.0)
+                )
+            except ValueError as e:
+                return [TextContent(type="text", text=f"❌ 错误：{str(e)}")]
+        try:
+            selected = self.config_manager.resolve_hosts(
+                names=args.get("hosts"), tags=args.get("tags"), groups=args.get("groups")
+            )
+        except ValueError as e:
+            return [TextContent(type="text", text=f"❌ 错误：{str(e)}")]
+        if not selected:
+            return [TextContent(type="text", text="No hosts matched the given hosts/tags/groups")]
+        
+        configs = [
+            ConnectionConfig(
+                host=host.host,
+                port=host.port,
+                username=host.username,
+                password=host.password,
+                auth_method="password" if host.password else "private_key",
+                timeout=host.timeout
+            )
+            for host in selected
+        ]
+        names = {(h.host, h.port, h.username): h.name for h in selected}
+        aggregator = ResultAggregator()
+        summary = None
+        wave_lines = []
+        if strategy is None:
+            executor = AsyncBatchExecutor(
+                configs,
+                max_concurrent=args.get("max_concurrent", 20),
+                timeout=args.get("timeout", 60),
+                connection_cache=self.batch_connections,
+                adaptive=args.get("adaptive")
+            )
+            async for item in executor.execute_stream(command):
+                if isinstance(item, BatchSummary):
+                    summary = item
+                else:
+                    aggregator.add(item, label=names.get((item.host, item.port, item.username)))
+        else:
+            executor = RolloutExecutor(
+                configs,
+                strategy,
+                max_concurrent=args.get("max_concurrent", 20),
+                timeout=args.get("timeout", 60),
+                connection_cache=self.batch_connections,
+                adaptive=args.get("adaptive")
+            )
+            async for item in executor.execute_stream(command):
+                if isinstance(item, RolloutSummary):
+                    summary = item
+                    continue
+                for result in item.results:
+                    aggregator.add(result, label=names.get((result.host, result.port, result.username)))
+                wave = item.summary
+                kind = "canary" if item.canary else f"wave {item.index + 1}/{item.total_waves}"
+                icon = "✅" if item.passed else "🛑"
+                wave_lines.append(
+                    f"{icon} {kind}: {wave.total_hosts} host(s) | ✅ {wave.success_count} | ❌ {wave.failed_count} | {wave.total_time_ms:.0f} ms"
+                )
+        
+        output_lines = args.get("output_lines", 5)
+        majority = aggregator.majority()
+        
+        output = f"📡 Batch Execute: `{command}`\n"
+        output += f"Hosts: {summary.total_hosts} | ✅ {summary.success_count} | ❌ {summary.failed_count} | {summary.total_time_ms:.0f} ms\n"
+        if strategy is not None:
+            output += "\n".join(wave_lines) + "\n"
+            if summary.stopped:
+                output += f"🛑 Rollout stopped: {summary.stop_reason}; {len(summary.skipped_hosts)} host(s) not run\n"
+        elif summary.concurrency_limit is not None:
+            changes = sum(1 for change in summary.concurrency_history if change.limit != change.previous)
+            output += f"Concurrency: limit {summary.concurrency_limit} (adaptive, {changes} adjustments)\n"
+        output += f"Distinct results: {aggregator.distinct_outputs}\n\n"
+        for group in aggregator.groups():
+            icon = "✅" if group.success else "❌"
+            hosts = ", ".join(group.hosts[:20]) + (f", ... (+{group.size - 20})" if group.size > 20 else "")
+            output += f"{icon} {group.size} host(s) exit={group.exit_code} {group.min_latency_ms:.0f}-{group.max_latency_ms:.0f}ms: {hosts}\n"
+            # 只对比都执行了命令的分组；连接失败等错误直接显示错误信息
+            comparable = group is not majority and not group.error_message and not majority.error_message
+            diff = aggregator.diff(group) if args.get("show_diff", True) and comparable else ""
+            if diff:
+                output += "   diff vs majority:\n"
+                text = diff
+                limit = max(output_lines, 20)
+            else:
+                text = group.stdout if group.success else (group.error_message or group.stderr or group.stdout)
+                limit = output_lines
+            lines = text.rstrip("\n").splitlines()
+            for line in lines[:limit]:
+                output += f"   {line}\n"
+            if len(lines) > limit:
+                output += f"   ... (+{len(lines) - limit} lines)\n"
+        return [TextContent(type="text", text=output)]
+
     async def _handle_disconnect(self, args: dict) -> list[TextContent]:
         session_id = args["session_id"]
         await self.session_manager.close_session(session_id)
@@ -918,6 +1237,12 @@ class SSHMCPServer:
             output += f"  Connected: {session.connected_at.isoformat()}\n"
             output += f"  Last Activity: {session.last_activity.isoformat()}\n"
             output += f"  Last Keepalive: {session.last_keepalive.isoformat()}\n"
+            output += f"  Commands: {session.command_count}\n"
+            output += f"  Channels: {session.active_channels}/{session.channel_limit}\n"
+            output += f"  SFTP Opens: {session.sftp_open_count}\n"
+            if session.facts:
+                facts = session.facts
+                output += f"  OS: {facts.os_name or 'unknown'} {facts.os_version or ''} ({facts.arch or '?'}), {facts.cpu_count or '?'} CPUs\n"
         
         return [TextContent(type="text", text=output)]
 
@@ -953,10 +1278,17 @@ class SSHMCPServer:
         local_path = args.get("local_path", "")
         remote_path = args.get("remote_path", "")
         
+        options = {
+            "resume": args.get("resume", True),
+            "mode": args.get("mode", "auto"),
+            "compression": args.get("compression", "gzip"),
+        }
+        
         if direction == "upload":
-            result = await session.upload_file(local_path, remote_path)
+            result = await session.upload_file(local_path, remote_path, **options)
+            self.session_manager.invalidate_cache(session)
         elif direction == "download":
-            result = await session.download_file(remote_path, local_path)
+            result = await session.download_file(remote_path, local_path, **options)
         elif direction == "list":
             result = await session.list_directory(remote_path or ".")
         else:
@@ -964,6 +1296,16 @@ class SSHMCPServer:
         
         if result.get("success"):
             output = f"✅ {result.get('message', 'Success')}"
+            if "bytes_transferred" in result:
+                output += (
+                    f"\nBytes: {result['bytes_transferred']}"
+                    f" | Duration: {result['duration_ms']:.2f} ms"
+                    f" | Throughput: {result['throughput_mb_per_sec']:.2f} MB/s"
+                )
+                if result.get("files_transferred", 1) > 1 or result.get("transfer_mode") == "tar":
+                    output += f"\nFiles: {result['files_transferred']} | Bytes on wire: {result['bytes_on_wire']}"
+                if result.get("resumed_from"):
+                    output += f"\nResumed from byte {result['resumed_from']}"
             if "files" in result:
                 output = f"📁 Files in {result.get('path', '.')}:\n"
                 for f in result["files"]:
@@ -973,6 +1315,42 @@ class SSHMCPServer:
         
         return [TextContent(type="text", text=output)]
 
+    async def _handle_sync(self, args: dict) -> list[TextContent]:
+        session = await self.session_manager.get_session(args["session_id"])
+        if not session:
+            return [TextContent(type="text", text=f"Session not found: {args['session_id']}")]
+        
+        result = await session.sync_directory(
+            args["local_dir"],
+            args["remote_dir"],
+            delete=args.get("delete", False),
+            checksum=args.get("checksum", False),
+            exclude=args.get("exclude"),
+            dry_run=args.get("dry_run", False)
+        )
+        if not args.get("dry_run", False):
+            self.session_manager.invalidate_cache(session)
+        if not result.get("success"):
+            return [TextContent(type="text", text=f"❌ {result.get('message', 'Failed')}")]
+        
+        output = f"✅ {result['message']}\n"
+        output += f"Files: {result['files_total']} total, {result['files_unchanged']} unchanged\n"
+        output += (
+            f"Bytes: {result['bytes_sent']} sent of {result['bytes_total']}"
+            f" ({result['bytes_saved']} saved vs full copy)"
+            f" | Duration: {result['duration_ms']:.2f} ms\n"
+        )
+        for label, key in (("Copied", "files_copied"), ("Patched", "files_patched"), ("Deleted", "files_deleted")):
+            files = result[key]
+            if files:
+                output += f"\n{label} ({len(files)}):\n"
+                for path in files[:50]:
+                    output += f"  - {path}\n"
+                if len(files) > 50:
+                    output += f"  ... and {len(files) - 50} more\n"
+        
+        return [TextContent(type="text", text=output)]
+
     async def _handle_list_hosts(self, args: dict) -> list[TextContent]:
         hosts = self.config_manager.list_hosts()
         
@@ -1018,10 +1396,18 @@ class SSHMCPServer:
                 output += f"     用户：{host.username}\n"
                 output += f"     密码：{'***' if host.password else '未设置'}\n"
                 output += f"     超时：{host.timeout}s\n"
+                if host.tags:
+                    output += f"     标签：{', '.join(host.tags)}\n"
         else:
             output += "  (空)\n"
             output += "  💡 提示：使用 '添加 SSH 服务器' 命令来添加新服务器\n"
         
+        groups = self.config_manager.list_groups()
+        if groups:
+            output += "\n🔹 主机组 (host_groups)\n"
+            for group, members in groups.items():
+                output += f"  {group}: {', '.join(members)}\n"
+        
         return [TextContent(type="text", text=output)]
 
     async def _handle_background_task(self, args: dict) -> list[TextContent]:
@@ -1250,21 +1636,19 @@ ssh_execute(session_id="{session_id}", command="cat {log_file}")
         log_file = "/tmp/background_task.log"
         
         try:
-            # Check if process is still running
+            # Process state, recent log output and exit info in one round trip
             check_pid_cmd = f"if [ -f {pid_file} ]; then PID=$(cat {pid_file}); if ps -p $PID > /dev/null 2>&1; then echo 'RUNNING'; else echo 'COMPLETED'; fi; else echo 'NOT_FOUND'; fi"
-            result = await self.session_manager.execute_command(session_id, check_pid_cmd, timeout=10)
-            status = result.get("stdout", "").strip()
-            
-            # Get recent log output
             log_cmd = f"if [ -f {log_file} ]; then tail -20 {log_file}; else echo 'No log file yet'; fi"
-            log_result = await self.session_manager.execute_command(session_id, log_cmd, timeout=10)
+            exit_cmd = f"if [ -f {log_file} ]; then echo 'Exit code: 0 (check log for actual)'; else echo 'N/A'; fi"
+            result, log_result, exit_result = await self.session_manager.execute_pipeline(
+                session_id, [check_pid_cmd, log_cmd, exit_cmd], timeout=10
+            )
+            status = result.get("stdout", "").strip()
             log_output = log_result.get("stdout", "")
             
             # Get exit code if completed
             exit_code = None
             if status == "COMPLETED":
-                exit_cmd = f"if [ -f {log_file} ]; then echo 'Exit code: 0 (check log for actual)'; else echo 'N/A'; fi"
-                exit_result = await self.session_manager.execute_command(session_id, exit_cmd, timeout=10)
                 exit_code = exit_result.get("stdout", "")
             
             output = f"""📊 Task Status: {task_id}
@@ -1321,9 +1705,15 @@ Use this command to check again:
             return [TextContent(type="text", text="Error: session_id is required")]
         
         try:
-            # Check running containers
+            # Containers, images (if requested) and build logs in one round trip
             containers_cmd = "docker ps --format 'table {{.ID}}\t{{.Image}}\t{{.Status}}\t{{.Names}}'"
-            containers_result = await self.session_manager.execute_command(session_id, containers_cmd, timeout=10)
+            log_files_cmd = "ls -la /tmp/docker_build_*.log 2>/dev/null | tail -5 || echo 'No build logs found'"
+            commands = [containers_cmd, log_files_cmd]
+            if image_name:
+                images_cmd = f"docker images {image_name} --format 'table {{.Repository}}\t{{.Tag}}\t{{.Size}}\t{{.CreatedAt}}'"
+                commands.append(images_cmd)
+            results = await self.session_manager.execute_pipeline(session_id, commands, timeout=10)
+            containers_result, log_result = results[0], results[1]
             
             output = "🐳 Docker Status\n\n"
             output += "--- Running Containers ---\n"
@@ -1331,14 +1721,11 @@ Use this command to check again:
             
             # Check images if requested
             if image_name:
-                images_cmd = f"docker images {image_name} --format 'table {{.Repository}}\t{{.Tag}}\t{{.Size}}\t{{.CreatedAt}}'"
-                images_result = await self.session_manager.execute_command(session_id, images_cmd, timeout=10)
+                images_result = results[2]
                 output += "\n--- Docker Images ---\n"
                 output += images_result.get("stdout", f"No images found matching {image_name}\n")
             
             # Check Docker build logs if exists
-            log_files_cmd = "ls -la /tmp/docker_build_*.log 2>/dev/null | tail -5 || echo 'No build logs found'"
-            log_result = await self.session_manager.execute_command(session_id, log_files_cmd, timeout=10)
             output += "\n--- Recent Build Logs ---\n"
             output += log_result.get("stdout", "")
             
@@ -1408,7 +1795,11 @@ Use this command to check again:
                 logs_cmd += f" --since {since}s"
             logs_cmd += " 2>&1"
             
-            result = await self.session_manager.execute_command(session_id, logs_cmd, timeout=30)
+            # Logs and container status in one round trip
+            status_cmd = f"docker ps -a --filter \"name={container_name}\" --format '{{{{.Status}}}}'"
+            result, status_result = await self.session_manager.execute_pipeline(
+                session_id, [logs_cmd, status_cmd], timeout=30
+            )
             
             output = f"""📋 Container Logs: {container_name}
 
@@ -1426,8 +1817,6 @@ Use this command to check again:
 """
             
             # Also get container status
-            status_cmd = f"docker ps -a --filter \"name={container_name}\" --format '{{{{.Status}}}}'"
-            status_result = await self.session_manager.execute_command(session_id, status_cmd, timeout=10)
             status = status_result.get('stdout', '').strip()
             
             if status:
@@ -1450,6 +1839,7 @@ Use this command to check again:
         username = args.get("username", "root")
         password = args.get("password", "")
         timeout = args.get("timeout", 60)
+        tags = args.get("tags", [])
         
         if not name or not host:
             return [TextContent(type="text", text="❌ 错误：name 和 host 是必填参数")]
@@ -1463,7 +1853,8 @@ Use this command to check again:
             password=password,
             timeout=timeout,
             keepalive_interval=30,
-            session_timeout=7200
+            session_timeout=7200,
+            tags=tags
         )
         
         # Add to config
@@ -1475,7 +1866,8 @@ Use this command to check again:
                  f"名称：{name}\n"
                  f"主机：{host}:{port}\n"
                  f"用户：{username}\n"
-                 f"超时：{timeout}s\n\n"
+                 f"超时：{timeout}s\n"
+                 f"标签：{', '.join(tags) or '无'}\n\n"
                  f"💡 使用 '连接 SSH' 命令时指定 name='{name}' 来连接此服务器"
         )]
 
@@ -1528,6 +1920,7 @@ Use this command to check again:
                 pass
             finally:
                 await self.session_manager.close_all_sessions()
+                await self.batch_connections.close()
 
 
 async def main():
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, AsyncIterator
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -11,6 +17,18 @@ import paramiko
 from paramiko import SSHClient, AutoAddPolicy, SFTPClient
 
 from .connection_config import ConnectionConfig
+from .sftp_manager import SFTPChannelCache
+from .transfer_engine import SFTPTransferEngine, TransferConfig
+from .delta_sync import DeltaSync
+from .tar_stream import DirectoryTransfer, TarStreamer, is_remote_directory
+from .channel_stream import DEFAULT_CHUNK_SIZE, DEFAULT_MAX_QUEUED_CHUNKS, iter_channel, stream_channel
+from .output_capture import CapturedOutput, OutputCapture, output_store, paginate_result
+from .shell_executor import PersistentShell
+from .command_framing import FrameSplitter, frame_script, new_marker
+from .single_flight import SingleFlight, can_coalesce, coalescing_enabled, command_key
+from .result_cache import ResultCache, caching_enabled
+from .host_facts import FactStore, HostFacts, gather_facts, gathering_enabled
+from .clients.interface import StreamChunk
 
 
 class SessionState(Enum):
@@ -35,6 +53,10 @@ class SessionInfo:
     command_count: int = 0
     error_message: Optional[str] = None
     last_keepalive: datetime = field(default_factory=datetime.now)
+    active_channels: int = 0
+    channel_limit: int = 0
+    sftp_open_count: int = 0
+    facts: Optional[HostFacts] = None
 
 
 class SSHSession:
@@ -48,6 +70,44 @@ class SSHSession:
         self._last_keepalive: datetime = datetime.now()
         self._keepalive_task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
+        self._logger = logging.getLogger(__name__)
+        
+        # Channel multiplexing: each command gets its own channel on the shared transport.
+        # Every channel the session opens (commands, streams, SFTP, tar, the persistent
+        # shell) holds one slot until it is closed, so together they stay within max_channels.
+        self._channel_limit = config.max_channels
+        self._active_channels = 0
+        self._channel_cond = threading.Condition()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._command_count = 0
+        self.facts: Optional[HostFacts] = None
+        self._sftp = SFTPChannelCache(
+            lambda: self.client, name=config.host, sftp_factory=self._open_sftp
+        )
+        self._transfer = SFTPTransferEngine(
+            self._sftp,
+            lambda: self._open_sftp(wait=False),
+            TransferConfig(max_channels=min(TransferConfig.max_channels, config.max_channels)),
+            command_runner=self._run_transfer_command,
+            identity=f"{config.username}@{config.host}:{config.port}"
+        )
+        self._delta_sync = DeltaSync(self._sftp, self._transfer, self._run_transfer_command)
+        self._directories = DirectoryTransfer(
+            self._transfer,
+            TarStreamer(lambda: self._open_slot_channel()[0], idle_timeout=self.config.timeout),
+            self._run_transfer_command
+        )
+        self._shell = PersistentShell(
+            lambda: self._open_slot_channel()[0],
+            max_output_bytes=config.shell_max_output_bytes
+        )
+        self._channel_stats = {
+            "opened": 0,
+            "rejected": 0,
+            "total_open_ms": 0.0,
+            "max_open_ms": 0.0,
+            "last_open_ms": 0.0,
+        }
 
     @property
     def state(self) -> SessionState:
@@ -55,9 +115,12 @@ class SSHSession:
 
     @property
     def is_connected(self) -> bool:
-        return self._state == SessionState.CONNECTED and self.client is not None
+        return (
+            self._state in (SessionState.CONNECTED, SessionState.EXECUTING)
+            and self.client is not None
+        )
 
-    async def connect(self) -> SessionInfo:
+    async def connect(self, executor: Optional[ThreadPoolExecutor] = None) -> SessionInfo:
         async with self._lock:
             if self.is_connected:
                 return self._get_session_info()
@@ -66,7 +129,7 @@ class SSHSession:
             
             try:
                 await asyncio.get_event_loop().run_in_executor(
-                    None, self._connect_sync
+                    executor, self._connect_sync
                 )
                 self._connected_at = datetime.now()
                 self._state = SessionState.CONNECTED
@@ -130,31 +193,196 @@ class SSHSession:
         
         self._keepalive_task = asyncio.create_task(keepalive_loop())
 
-    async def execute_command(self, command: str, timeout: int = 30, background: bool = False) -> dict:
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Per-session worker threads, one per allowed channel."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.max_channels,
+                thread_name_prefix=f"ssh-{self.config.host}"
+            )
+        return self._executor
+
+    def _acquire_channel_slot(self, timeout: Optional[float]) -> None:
+        """Reserve one of the session's channel slots, waiting up to timeout seconds (0: don't wait)."""
+        with self._channel_cond:
+            if not self._channel_cond.wait_for(
+                lambda: self._active_channels < self._channel_limit, timeout
+            ):
+                raise ConnectionError(
+                    f"No free channel on {self.config.host} "
+                    f"({self._active_channels}/{self._channel_limit} in use)"
+                )
+            self._active_channels += 1
+            self._state = SessionState.EXECUTING
+
+    def _release_channel_slot(self) -> None:
+        with self._channel_cond:
+            self._active_channels -= 1
+            if self._active_channels == 0 and self._state == SessionState.EXECUTING:
+                self._state = SessionState.CONNECTED
+            self._channel_cond.notify_all()
+
+    @contextlib.contextmanager
+    def _channel_slot(self, timeout: Optional[float]):
+        """Hold a channel slot for the duration of a command."""
+        self._acquire_channel_slot(timeout)
+        try:
+            yield
+        finally:
+            self._release_channel_slot()
+
+    def _open_slot_channel(
+        self, window_size: Optional[int] = None, wait: bool = True
+    ) -> tuple[paramiko.Channel, float]:
+        """Open a channel that keeps its slot until it is closed (streams, tar, SFTP, shell)."""
+        self._acquire_channel_slot(self.config.timeout if wait else 0)
+        try:
+            channel, latency_ms = self._open_channel(self.config.timeout, window_size)
+        except BaseException:
+            self._release_channel_slot()
+            raise
+        
+        close = channel.close
+        released = threading.Event()
+        
+        def close_and_release() -> None:
+            try:
+                close()
+            finally:
+                if not released.is_set():
+                    released.set()
+                    self._release_channel_slot()
+        
+        # paramiko's own close paths (SFTPClient.close, Channel.__del__) go through channel.close too
+        channel.close = close_and_release
+        return channel, latency_ms
+
+    def _open_sftp(self, wait: bool = True) -> SFTPClient:
+        """Open an SFTP subsystem on a slot-holding channel."""
+        channel, _ = self._open_slot_channel(wait=wait)
+        try:
+            channel.invoke_subsystem("sftp")
+            return SFTPClient(channel)
+        except BaseException:
+            channel.close()
+            raise
+
+    def _shrink_channel_limit(self) -> None:
+        """The server refused a channel (MaxSessions reached): cap the limit at what it accepted."""
+        new_limit = max(1, self._active_channels - 1)
+        if new_limit < self._channel_limit:
+            self._logger.warning(
+                f"Server rejected channel open, lowering channel limit "
+                f"{self._channel_limit} -> {new_limit}"
+            )
+            self._channel_limit = new_limit
+        self._channel_stats["rejected"] += 1
+
+    def _record_channel_open(self, latency_ms: float) -> None:
+        stats = self._channel_stats
+        stats["opened"] += 1
+        stats["total_open_ms"] += latency_ms
+        stats["max_open_ms"] = max(stats["max_open_ms"], latency_ms)
+        stats["last_open_ms"] = latency_ms
+
+    def get_channel_stats(self) -> dict:
+        """Channel multiplexing statistics for this session."""
+        stats = dict(self._channel_stats)
+        stats["avg_open_ms"] = (
+            stats["total_open_ms"] / stats["opened"] if stats["opened"] else 0.0
+        )
+        stats["active"] = self._active_channels
+        stats["limit"] = self._channel_limit
+        stats["multiplexed"] = self.config.multiplex_channels
+        return stats
+
+    async def execute_command(
+        self, command: str, timeout: int = 30, background: bool = False, mode: str = "exec"
+    ) -> dict:
+        """Run a command on a fresh exec channel, or in the session's persistent shell when mode="shell"."""
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        async with self._lock:
-            self._state = SessionState.EXECUTING
-            self._last_activity = datetime.now()
+        self._last_activity = datetime.now()
+        self._command_count += 1
+        loop = asyncio.get_event_loop()
+        
+        if mode == "shell" and not background:
+            # The shell serializes its own commands; keep its waiters off the channel executor
+            if not self.config.multiplex_channels:
+                async with self._lock:
+                    return await loop.run_in_executor(None, self._execute_shell_sync, command, timeout)
+            return await loop.run_in_executor(None, self._execute_shell_sync, command, timeout)
+        
+        if not self.config.multiplex_channels:
+            async with self._lock:
+                self._state = SessionState.EXECUTING
+                try:
+                    return await loop.run_in_executor(
+                        None, self._execute_command_sync, command, timeout, background
+                    )
+                finally:
+                    self._state = SessionState.CONNECTED
+        
+        last_error: Optional[Exception] = None
+        for _ in range(3):
             try:
-                result = await asyncio.get_event_loop().run_in_executor(
-                    None, self._execute_command_sync, command, timeout, background
+                return await loop.run_in_executor(
+                    self._get_executor(), self._execute_command_sync,
+                    command, timeout, background
                 )
-                return result
-            finally:
-                self._state = SessionState.CONNECTED
+            except paramiko.ChannelException as e:
+                last_error = e
+        raise ConnectionError(f"Failed to open channel on {self.config.host}: {last_error}")
+
+    def _open_channel(self, timeout: int, window_size: Optional[int] = None) -> tuple[paramiko.Channel, float]:
+        """Open a new session channel on the existing transport, returning it with its open latency."""
+        assert self.client is not None
+        transport = self.client.get_transport()
+        if transport is None or not transport.is_active():
+            raise ConnectionError("SSH transport is not active")
+        
+        start = time.monotonic()
+        try:
+            channel = transport.open_session(window_size=window_size, timeout=timeout)
+        except paramiko.ChannelException:
+            self._shrink_channel_limit()
+            raise
+        latency_ms = (time.monotonic() - start) * 1000
+        self._record_channel_open(latency_ms)
+        channel.settimeout(timeout)
+        return channel, latency_ms
 
-    def _execute_command_sync(self, command: str, timeout: int, background: bool = False) -> dict:
+    def _exec_channel(self, command: str, timeout: int) -> tuple[paramiko.Channel, float]:
+        """Open a channel and start the command on it, closing the channel if the exec fails."""
+        channel, channel_latency_ms = self._open_channel(timeout)
+        try:
+            channel.exec_command(command)
+        except BaseException:
+            channel.close()
+            raise
+        return channel, channel_latency_ms
+
+    def _execute_command_sync(
+        self, command: str, timeout: int, background: bool = False,
+        max_output_bytes: Optional[int] = None
+    ) -> dict:
         assert self.client is not None
         
-        stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
+        start = time.monotonic()
+        with self._channel_slot(timeout):
+            return self._run_command_on_channel(command, timeout, background, max_output_bytes, start)
+
+    def _run_command_on_channel(
+        self, command: str, timeout: int, background: bool, max_output_bytes: Optional[int], start: float
+    ) -> dict:
+        channel, channel_latency_ms = self._exec_channel(command, timeout)
         
         if background:
-            # 后台执行：不等待命令完成，立即返回
+            # 后台执行：不等待命令完成，立即返回（通道保持打开，命令继续运行）
             # 注意：不是所有 paramiko 版本都支持 channel.pid
             try:
-                pid = stdout.channel.pid
+                pid = channel.pid
                 pid_msg = f"PID: {pid}"
             except AttributeError:
                 pid_msg = "background mode"
@@ -163,45 +391,201 @@ class SSHSession:
                 "exit_code": 0,
                 "stdout": f"Command started in {pid_msg}",
                 "stderr": "",
-                "session_id": self.session_id
+                "session_id": self.session_id,
+                "channel_latency_ms": channel_latency_ms
             }
         
-        # 前台执行：等待命令完成
-        exit_code = stdout.channel.recv_exit_status()
-        stdout_data = stdout.read().decode('utf-8', errors='replace')
-        stderr_data = stderr.read().decode('utf-8', errors='replace')
+        # 前台执行：边读边捕获，超出预算时只保留首尾，完整输出可选写入本地临时文件
+        captures = {
+            stream: self._new_capture(max_output_bytes)
+            for stream in ("stdout", "stderr")
+        }
+        try:
+            for stream, data in iter_channel(
+                channel, idle_timeout=timeout, max_duration=self.config.max_command_seconds
+            ):
+                captures[stream].feed(data)
+            exit_code = channel.recv_exit_status()
+        except BaseException:
+            for capture in captures.values():
+                capture.abort()
+            raise
+        finally:
+            # Close explicitly so failed or timed-out commands don't hold a MaxSessions slot
+            channel.close()
         
         return {
             "exit_code": exit_code,
-            "stdout": stdout_data,
-            "stderr": stderr_data,
-            "session_id": self.session_id
+            **self._captured_fields(captures["stdout"].finish(), captures["stderr"].finish()),
+            "session_id": self.session_id,
+            "channel_latency_ms": channel_latency_ms,
+            "duration_ms": (time.monotonic() - start) * 1000
         }
 
-    async def execute_command_stream(
-        self, command: str
-    ) -> AsyncIterator[str]:
+    async def execute_pipeline(
+        self, commands: list[str], timeout: int = 30, stop_on_error: bool = False
+    ) -> list[dict]:
+        """Run several commands as one framed script on a single channel (one round trip).
+
+        Returns one result dict per command, in order. Commands skipped because an
+        earlier one failed (stop_on_error) are marked with "skipped": True.
+        """
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         
-        async with self._lock:
-            self._state = SessionState.EXECUTING
-            self._last_activity = datetime.now()
-            try:
-                async for line in asyncio.get_event_loop().run_in_executor(
-                    None, self._execute_command_stream_sync, command
-                ):
-                    yield line
-            finally:
-                self._state = SessionState.CONNECTED
+        self._last_activity = datetime.now()
+        self._command_count += 1
+        loop = asyncio.get_event_loop()
+        
+        if not self.config.multiplex_channels:
+            async with self._lock:
+                return await loop.run_in_executor(
+                    None, self._execute_pipeline_sync, commands, timeout, stop_on_error
+                )
+        return await loop.run_in_executor(
+            self._get_executor(), self._execute_pipeline_sync, commands, timeout, stop_on_error
+        )
 
-    def _execute_command_stream_sync(self, command: str) -> AsyncIterator[str]:
-        assert self.client is not None
+    def _execute_pipeline_sync(self, commands: list[str], timeout: int, stop_on_error: bool) -> list[dict]:
+        with self._channel_slot(timeout):
+            return self._run_pipeline_on_channel(commands, timeout, stop_on_error)
+
+    def _run_pipeline_on_channel(self, commands: list[str], timeout: int, stop_on_error: bool) -> list[dict]:
+        marker = new_marker()
+        channel, _ = self._exec_channel(frame_script(commands, marker, stop_on_error), timeout)
+        # Split the stream while reading so each command gets its own head/tail/spill budget
+        splitters = {
+            "stdout": FrameSplitter(marker, lambda index: self._new_capture(), with_status=True),
+            "stderr": FrameSplitter(marker, lambda index: self._new_capture()),
+        }
+        try:
+            for stream, data in iter_channel(
+                channel, idle_timeout=timeout, max_duration=self.config.max_command_seconds
+            ):
+                splitters[stream].feed(data)
+            script_exit_code = channel.recv_exit_status()
+        except BaseException:
+            for splitter in splitters.values():
+                for capture in splitter.sinks.values():
+                    capture.abort()
+            raise
+        finally:
+            channel.close()
+        for splitter in splitters.values():
+            splitter.close()
+        
+        out, err = splitters["stdout"], splitters["stderr"]
+        results = []
+        for index, command in enumerate(commands):
+            if index not in out.sinks:
+                results.append({"command": command, "exit_code": None, "stdout": "", "stderr": "", "skipped": True})
+                continue
+            exit_code, cwd = out.ended.get(index, (None, None))
+            if exit_code is None:
+                # The script ended inside this command (e.g. it ran exit): use the channel status
+                exit_code = script_exit_code if index == max(out.sinks) else -1
+            stderr = err.sinks[index] if index in err.sinks else self._new_capture()
+            results.append({
+                "command": command,
+                "exit_code": exit_code,
+                **self._captured_fields(out.sinks[index].finish(), stderr.finish()),
+                "cwd": cwd,
+                "skipped": False
+            })
+        return results
+
+    def _execute_shell_sync(self, command: str, timeout: int) -> dict:
+        start = time.monotonic()
+        reopened = not self._shell.is_open
+        result = self._shell.run(command, timeout)
+        return {
+            "exit_code": result.exit_code,
+            "stdout": result.stdout,
+            "stderr": result.stderr,
+            "cwd": result.cwd,
+            "mode": "shell",
+            "session_id": self.session_id,
+            "channel_latency_ms": self._channel_stats["last_open_ms"] if reopened else 0.0,
+            "duration_ms": (time.monotonic() - start) * 1000
+        }
+
+    def _new_capture(self, max_output_bytes: Optional[int] = None) -> OutputCapture:
+        if max_output_bytes is not None:
+            # Keep the output whole up to a hard cap (callers parse it), never spill
+            return OutputCapture(head_bytes=max_output_bytes, tail_bytes=0)
+        return OutputCapture(
+            head_bytes=self.config.output_head_bytes,
+            tail_bytes=self.config.output_tail_bytes,
+            store=output_store if self.config.spill_output else None,
+            owner=self.session_id,
+            max_spill_bytes=self.config.spill_max_bytes
+        )
+
+    @staticmethod
+    def _captured_fields(stdout: CapturedOutput, stderr: CapturedOutput) -> dict:
+        return {
+            "stdout": stdout.text,
+            "stderr": stderr.text,
+            "stdout_bytes": stdout.total_bytes,
+            "stderr_bytes": stderr.total_bytes,
+            "stdout_dropped_bytes": stdout.dropped_bytes,
+            "stderr_dropped_bytes": stderr.dropped_bytes,
+            "stdout_handle": stdout.handle,
+            "stderr_handle": stderr.handle,
+            "stdout_spill_truncated": stdout.spill_truncated,
+            "stderr_spill_truncated": stderr.spill_truncated,
+        }
+
+    def _run_transfer_command(self, command: str, timeout: int) -> str:
+        """Run a helper command for the transfer engine (e.g. remote checksums)."""
+        limit = self.config.helper_max_output_bytes
+        result = self._execute_command_sync(command, timeout, max_output_bytes=limit)
+        if result["exit_code"] != 0:
+            raise RuntimeError(f"Transfer helper command failed: {result['stderr'].strip()}")
+        if result["stdout_dropped_bytes"]:
+            raise RuntimeError(
+                f"Transfer helper output exceeded {limit} bytes ({result['stdout_bytes']} bytes)"
+            )
+        return result["stdout"]
+
+    async def execute_command_stream(
+        self,
+        command: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_queued_chunks: int = DEFAULT_MAX_QUEUED_CHUNKS
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream stdout/stderr chunks as they arrive, ending with an "exit" chunk.
+
+        Memory stays bounded by the channel window plus the chunk queue; stopping
+        the iteration early closes the channel.
+        """
+        if not self.is_connected:
+            raise ConnectionError("Not connected to SSH server")
         
-        stdin, stdout, stderr = self.client.exec_command(command)
+        self._last_activity = datetime.now()
+        self._command_count += 1
+        loop = asyncio.get_event_loop()
         
-        for line in stdout:
-            yield line.decode('utf-8', errors='replace')
+        if self.config.multiplex_channels:
+            guard, executor = contextlib.nullcontext(), self._get_executor()
+        else:
+            guard, executor = self._lock, None
+        
+        # The stream's channel holds its slot until stream_channel closes it
+        async with guard:
+            channel = await loop.run_in_executor(executor, self._open_stream_channel, command)
+            async for chunk in stream_channel(channel, chunk_size, max_queued_chunks, executor):
+                self._last_activity = datetime.now()
+                yield chunk
+
+    def _open_stream_channel(self, command: str) -> paramiko.Channel:
+        channel, _ = self._open_slot_channel(window_size=self.config.stream_window_size)
+        try:
+            channel.exec_command(command)
+        except BaseException:
+            channel.close()
+            raise
+        return channel
 
     async def open_shell(self, term: str = "xterm", width: int = 80, height: int = 24) -> paramiko.Channel:
         if not self.is_connected:
@@ -216,44 +600,149 @@ class SSHSession:
         assert self.client is not None
         return self.client.invoke_shell(term=term, width=width, height=height)
 
-    async def upload_file(self, local_path: str, remote_path: str) -> dict:
+    async def upload_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         async with self._lock:
             self._last_activity = datetime.now()
             return await asyncio.get_event_loop().run_in_executor(
-                None, self._upload_file_sync, local_path, remote_path
+                None, self._upload_file_sync, local_path, remote_path, resume, mode, compression
             )
 
-    def _upload_file_sync(self, local_path: str, remote_path: str) -> dict:
+    def _upload_file_sync(
+        self,
+        local_path: str,
+        remote_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         assert self.client is not None
         try:
-            sftp = self.client.open_sftp()
-            sftp.put(local_path, remote_path)
-            sftp.close()
-            return {"success": True, "message": f"File uploaded: {local_path} -> {remote_path}", "session_id": self.session_id}
+            if os.path.isdir(local_path):
+                used_mode, stats = self._directories.upload(local_path, remote_path, mode=mode, compression=compression)
+                message = f"Directory uploaded ({used_mode}): {local_path} -> {remote_path}"
+            else:
+                used_mode = "sftp"
+                stats = self._transfer.upload(local_path, remote_path, resume=resume)
+                message = f"File uploaded: {local_path} -> {remote_path}"
+            return {
+                "success": True,
+                "message": message,
+                "session_id": self.session_id,
+                "bytes_transferred": stats.bytes_transferred,
+                "duration_ms": stats.duration_ms,
+                "throughput_mb_per_sec": stats.throughput_mb_per_sec,
+                "resumed_from": stats.resumed_from,
+                "files_transferred": stats.files,
+                "bytes_on_wire": stats.bytes_on_wire,
+                "transfer_mode": used_mode,
+            }
         except Exception as e:
             return {"success": False, "message": f"Upload failed: {str(e)}", "session_id": self.session_id}
 
-    async def download_file(self, remote_path: str, local_path: str) -> dict:
+    async def download_file(
+        self,
+        remote_path: str,
+        local_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
         async with self._lock:
             self._last_activity = datetime.now()
             return await asyncio.get_event_loop().run_in_executor(
-                None, self._download_file_sync, remote_path, local_path
+                None, self._download_file_sync, remote_path, local_path, resume, mode, compression
             )
 
-    def _download_file_sync(self, remote_path: str, local_path: str) -> dict:
+    def _download_file_sync(
+        self,
+        remote_path: str,
+        local_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         assert self.client is not None
         try:
-            sftp = self.client.open_sftp()
-            sftp.get(remote_path, local_path)
-            sftp.close()
-            return {"success": True, "message": f"File downloaded: {remote_path} -> {local_path}", "session_id": self.session_id}
+            if self._sftp.run(lambda sftp: is_remote_directory(sftp, remote_path)):
+                used_mode, stats = self._directories.download(remote_path, local_path, mode=mode, compression=compression)
+                message = f"Directory downloaded ({used_mode}): {remote_path} -> {local_path}"
+            else:
+                used_mode = "sftp"
+                stats = self._transfer.download(remote_path, local_path, resume=resume)
+                message = f"File downloaded: {remote_path} -> {local_path}"
+            return {
+                "success": True,
+                "message": message,
+                "session_id": self.session_id,
+                "bytes_transferred": stats.bytes_transferred,
+                "duration_ms": stats.duration_ms,
+                "throughput_mb_per_sec": stats.throughput_mb_per_sec,
+                "resumed_from": stats.resumed_from,
+                "files_transferred": stats.files,
+                "bytes_on_wire": stats.bytes_on_wire,
+                "transfer_mode": used_mode,
+            }
         except Exception as e:
             return {"success": False, "message": f"Download failed: {str(e)}", "session_id": self.session_id}
 
+    async def sync_directory(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        delete: bool = False,
+        checksum: bool = False,
+        exclude: Optional[list[str]] = None,
+        dry_run: bool = False
+    ) -> dict:
+        if not self.is_connected:
+            raise ConnectionError("Not connected to SSH server")
+        async with self._lock:
+            self._last_activity = datetime.now()
+            return await asyncio.get_event_loop().run_in_executor(
+                None, self._sync_directory_sync, local_dir, remote_dir, delete, checksum, exclude, dry_run
+            )
+
+    def _sync_directory_sync(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        delete: bool,
+        checksum: bool,
+        exclude: Optional[list[str]],
+        dry_run: bool
+    ) -> dict:
+        assert self.client is not None
+        try:
+            result = self._delta_sync.sync(local_dir, remote_dir, delete, checksum, exclude, dry_run)
+        except Exception as e:
+            return {"success": False, "message": f"Sync failed: {str(e)}", "session_id": self.session_id}
+        return {
+            "success": result.success,
+            "message": result.message,
+            "session_id": self.session_id,
+            "files_total": result.files_total,
+            "files_unchanged": result.files_unchanged,
+            "files_copied": result.files_copied,
+            "files_patched": result.files_patched,
+            "files_deleted": result.files_deleted,
+            "bytes_total": result.bytes_total,
+            "bytes_sent": result.bytes_sent,
+            "bytes_saved": result.bytes_saved,
+            "duration_ms": result.duration_ms,
+            "dry_run": result.dry_run,
+        }
+
     async def list_directory(self, remote_path: str = ".") -> dict:
         if not self.is_connected:
             raise ConnectionError("Not connected to SSH server")
@@ -266,9 +755,7 @@ class SSHSession:
     def _list_directory_sync(self, remote_path: str) -> dict:
         assert self.client is not None
         try:
-            sftp = self.client.open_sftp()
-            files = sftp.listdir(remote_path)
-            sftp.close()
+            files = self._sftp.run(lambda sftp: sftp.listdir(remote_path))
             return {"success": True, "files": files, "path": remote_path, "session_id": self.session_id}
         except Exception as e:
             return {"success": False, "message": f"List failed: {str(e)}", "session_id": self.session_id}
@@ -278,9 +765,14 @@ class SSHSession:
             if self._keepalive_task:
                 self._keepalive_task.cancel()
                 self._keepalive_task = None
+            self._sftp.close()
+            self._shell.reset()
             if self.client:
                 self.client.close()
                 self.client = None
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
             self._state = SessionState.DISCONNECTED
 
     def _get_session_info(self) -> SessionInfo:
@@ -292,21 +784,141 @@ class SSHSession:
             state=self._state,
             connected_at=self._connected_at or datetime.now(),
             last_activity=self._last_activity,
-            last_keepalive=self._last_keepalive
+            command_count=self._command_count,
+            last_keepalive=self._last_keepalive,
+            active_channels=self._active_channels,
+            channel_limit=self._channel_limit,
+            sftp_open_count=self._sftp.open_count,
+            facts=self.facts
         )
 
 
 class SessionManager:
-    def __init__(self):
+    def __init__(
+        self,
+        max_parallel_connects: int = 32,
+        coalesce_commands: Optional[bool] = None,
+        cache_results: Optional[bool] = None,
+        gather_host_facts: Optional[bool] = None,
+        fact_store: Optional[FactStore] = None
+    ):
         self._sessions: dict[str, SSHSession] = {}
         self._lock = asyncio.Lock()
+        # Handshakes run outside the registry lock; identical requests share one in-flight connect
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self._connect_executor = ThreadPoolExecutor(
+            max_workers=max_parallel_connects,
+            thread_name_prefix="ssh-connect"
+        )
+        # Opt-in: identical concurrent commands for the same host and user share one execution
+        if coalesce_commands is None:
+            coalesce_commands = coalescing_enabled()
+        self._command_flights: Optional[SingleFlight] = (
+            SingleFlight(share=lambda result: {**result, "coalesced": True}) if coalesce_commands else None
+        )
+        # Opt-in: TTL cache for allowlisted read-only commands, invalidated by mutating ones
+        if cache_results is None:
+            cache_results = caching_enabled()
+        self._result_cache: Optional[ResultCache] = ResultCache() if cache_results else None
+        # Host facts are gathered in the background after connect and shared per host via the store
+        if gather_host_facts is None:
+            gather_host_facts = gathering_enabled()
+        self._gather_host_facts = gather_host_facts
+        self._fact_store = fact_store
+        self._fact_tasks: dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _connect_key(config: ConnectionConfig) -> tuple:
+        """Identity of a connect request: same target, user and credentials."""
+        return (
+            config.host,
+            config.port,
+            config.username,
+            config.auth_method,
+            config.password,
+            str(config.private_key_path or ""),
+            config.client_type,
+        )
 
     async def create_session(self, config: ConnectionConfig) -> SessionInfo:
+        key = self._connect_key(config)
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._connect_session(config))
+            self._inflight[key] = inflight
+            
+            def _forget(done: asyncio.Future) -> None:
+                if self._inflight.get(key) is done:
+                    del self._inflight[key]
+            
+            inflight.add_done_callback(_forget)
+        
+        # Shield so a cancelled caller does not abort the handshake other callers are waiting on
+        return await asyncio.shield(inflight)
+
+    async def _connect_session(self, config: ConnectionConfig) -> SessionInfo:
+        session = SSHSession(config)
+        session_info = await session.connect(executor=self._connect_executor)
         async with self._lock:
-            session = SSHSession(config)
-            session_info = await session.connect()
             self._sessions[session.session_id] = session
-            return session_info
+        if self._gather_host_facts:
+            facts = self._get_fact_store().get(config.host, config.port)
+            if facts is not None:
+                session.facts = session_info.facts = facts
+            else:
+                self._start_fact_gathering(session)
+        return session_info
+
+    def _get_fact_store(self) -> FactStore:
+        if self._fact_store is None:
+            self._fact_store = FactStore.default()
+        return self._fact_store
+
+    def _start_fact_gathering(self, session: SSHSession) -> asyncio.Task:
+        task = self._fact_tasks.get(session.session_id)
+        if task is None or task.done():
+            task = asyncio.ensure_future(self._gather_facts(session))
+            self._fact_tasks[session.session_id] = task
+            
+            def _finished(done: asyncio.Task) -> None:
+                if self._fact_tasks.get(session.session_id) is done:
+                    del self._fact_tasks[session.session_id]
+                if not done.cancelled():
+                    done.exception()  # failures are logged; callers of get_host_facts see them
+            
+            task.add_done_callback(_finished)
+        return task
+
+    async def _gather_facts(self, session: SSHSession) -> HostFacts:
+        config = session.config
+        try:
+            facts = await gather_facts(config.host, config.port, session.execute_pipeline)
+        except Exception as e:
+            session._logger.debug(f"Host facts gathering failed: {e}")
+            raise
+        session.facts = facts
+        self._get_fact_store().put(facts)
+        return facts
+
+    async def get_host_facts(self, session_id: str, refresh: bool = False) -> HostFacts:
+        """Facts about the session's host: OS, kernel, CPUs, memory, disks, docker, listening ports.
+        
+        Uses the facts gathered at connect time (or a fresh cached copy for the same host);
+        refresh=True re-runs the gathering script.
+        """
+        session = await self.get_session(session_id)
+        if not session:
+            raise ConnectionError(f"Session {session_id} not found")
+        config = session.config
+        if not refresh:
+            task = self._fact_tasks.get(session_id)
+            if task is not None:
+                return await asyncio.shield(task)
+            facts = session.facts or self._get_fact_store().get(config.host, config.port)
+            if facts is not None:
+                session.facts = facts
+                return facts
+        return await self._start_fact_gathering(session)
 
     async def get_session(self, session_id: str) -> Optional[SSHSession]:
         return self._sessions.get(session_id)
@@ -314,14 +926,26 @@ class SessionManager:
     async def close_session(self, session_id: str) -> None:
         async with self._lock:
             session = self._sessions.pop(session_id, None)
-            if session:
-                await session.disconnect()
+        task = self._fact_tasks.pop(session_id, None)
+        if task is not None:
+            task.cancel()
+        if session:
+            await session.disconnect()
+            output_store.remove_owner(session_id)
 
     async def close_all_sessions(self) -> None:
         async with self._lock:
-            for session in list(self._sessions.values()):
-                await session.disconnect()
+            sessions = list(self._sessions.values())
             self._sessions.clear()
+        for task in list(self._fact_tasks.values()):
+            task.cancel()
+        self._fact_tasks.clear()
+        await asyncio.gather(
+            *(session.disconnect() for session in sessions),
+            return_exceptions=True
+        )
+        for session in sessions:
+            output_store.remove_owner(session.session_id)
 
     def list_sessions(self) -> list[SessionInfo]:
         return [
@@ -329,7 +953,15 @@ class SessionManager:
             for session in self._sessions.values()
         ]
 
-    async def execute_command(self, session_id: str, command: str, timeout: int = 30, background: bool = False) -> dict:
+    async def execute_command(
+        self,
+        session_id: str,
+        command: str,
+        timeout: int = 30,
+        background: bool = False,
+        page_size: Optional[int] = None,
+        mode: str = "exec"
+    ) -> dict:
         """Execute command on specified session
         
         Args:
@@ -337,25 +969,111 @@ class SessionManager:
             command: Command to execute
             timeout: Timeout in seconds
             background: Whether to run in background mode (default: False)
+            page_size: If set, outputs longer than this many bytes are replaced by
+                their first page plus an output handle for fetching the rest
+            mode: "exec" runs each command on a new channel; "shell" reuses the session's
+                persistent shell, keeping cwd and environment between calls
         """
         session = await self.get_session(session_id)
         if not session:
             raise ConnectionError(f"Session {session_id} not found")
-        return await session.execute_command(command, timeout, background)
+        config = session.config
+        cache = self._result_cache
+        cacheable = cache is not None and not background and mode == "exec"
+        
+        result = cache.get(config.host, config.port, config.username, command) if cacheable else None
+        if result is None:
+            if cache is not None:
+                cache.observe(config.host, config.port, command)
+                generation = cache.generation(config.host, config.port)
+            if (
+                self._command_flights is not None and not background and mode == "exec"
+                and can_coalesce(command)
+            ):
+                result = await self._command_flights.do(
+                    command_key(config.host, config.port, config.username, command),
+                    lambda: session.execute_command(command, timeout, background, mode)
+                )
+            else:
+                result = await session.execute_command(command, timeout, background, mode)
+            if cache is not None:
+                cache.observe(config.host, config.port, command)
+                if cacheable:
+                    cache.put(config.host, config.port, config.username, command, result, generation)
+        if page_size and not background:
+            result = paginate_result(result, page_size)
+        return result
+
+    def get_cache_stats(self) -> Optional[dict]:
+        """Hit/miss counters of the result cache (None when caching is off)."""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.stats()
 
-    async def upload_file(self, session_id: str, local_path: str, remote_path: str) -> dict:
+    def invalidate_cache(self, session: SSHSession) -> None:
+        """Drop cached results for the session's host (after uploads, syncs, etc.)."""
+        if self._result_cache is not None:
+            self._result_cache.invalidate_host(session.config.host, session.config.port)
+
+    def get_coalescing_stats(self) -> Optional[dict]:
+        """Counters of the command single-flight layer (None when coalescing is off)."""
+        if self._command_flights is None:
+            return None
+        return self._command_flights.stats()
+
+    async def execute_pipeline(
+        self, session_id: str, commands: list[str], timeout: int = 30, stop_on_error: bool = False
+    ) -> list[dict]:
+        """Execute several commands in one round trip on the specified session
+        
+        Args:
+            session_id: Session ID
+            commands: Commands to run in order, in the same remote shell
+            timeout: Timeout in seconds for the whole pipeline
+            stop_on_error: Skip the remaining commands after the first failure
+        """
+        session = await self.get_session(session_id)
+        if not session:
+            raise ConnectionError(f"Session {session_id} not found")
+        try:
+            return await session.execute_pipeline(commands, timeout, stop_on_error)
+        finally:
+            if self._result_cache is not None:
+                for command in commands:
+                    self._result_cache.observe(session.config.host, session.config.port, command)
+
+    async def upload_file(
+        self,
+        session_id: str,
+        local_path: str,
+        remote_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         """Upload file to specified session"""
         session = await self.get_session(session_id)
         if not session:
             raise ConnectionError(f"Session {session_id} not found")
-        return await session.upload_file(local_path, remote_path)
+        try:
+            return await session.upload_file(local_path, remote_path, resume=resume, mode=mode, compression=compression)
+        finally:
+            self.invalidate_cache(session)
 
-    async def download_file(self, session_id: str, remote_path: str, local_path: str) -> dict:
+    async def download_file(
+        self,
+        session_id: str,
+        remote_path: str,
+        local_path: str,
+        resume: bool = True,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> dict:
         """Download file from specified session"""
         session = await self.get_session(session_id)
         if not session:
             raise ConnectionError(f"Session {session_id} not found")
-        return await session.download_file(remote_path, local_path)
+        return await session.download_file(remote_path, local_path, resume=resume, mode=mode, compression=compression)
 
     async def list_directory(self, session_id: str, remote_path: str = ".") -> dict:
         """List directory on specified session"""
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from paramiko import SSHClient, SFTPClient
+
+
+
+T = TypeVar("T")
+
+
+class SFTPChannelCache:
+    """
+    持久 SFTP 子系统 - 每个 SSH 连接复用一个 SFTP 通道
+
+    特性：
+    - 首次使用时才打开 SFTP 子系统（懒加载）
+    - 通道失效时自动重新打开并重试一次
+    - 线程安全：同一时刻只有一个操作使用该通道
+    - 统计打开次数，便于确认子系统被复用
+    """
+
+    def __init__(
+        self,
+        client_provider: Callable[[], Optional[SSHClient]],
+        name: str = "",
+        sftp_factory: Optional[Callable[[], SFTPClient]] = None
+    ):
+        self._client_provider = client_provider
+        self._sftp_factory = sftp_factory
+        self._sftp: Optional[SFTPClient] = None
+        self._lock = threading.RLock()
+        self._open_count = 0
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def open_count(self) -> int:
+        """SFTP 子系统累计打开次数"""
+        return self._open_count
+
+    @staticmethod
+    def _is_alive(sftp: Optional[SFTPClient]) -> bool:
+        """检查 SFTP 通道是否仍可用"""
+        if sftp is None:
+            return False
+        channel = sftp.get_channel()
+        if channel is None or channel.closed:
+            return False
+        transport = channel.get_transport()
+        return transport is not None and transport.is_active()
+
+    def _ensure(self) -> SFTPClient:
+        """返回可用的 SFTP 客户端，必要时重新打开（需持有锁）"""
+        if self._is_alive(self._sftp):
+            return self._sftp
+
+        self._discard()
+        client = self._client_provider()
+        if client is None:
+            raise ConnectionError("Not connected to SSH server")
+
+        self._sftp = self._sftp_factory() if self._sftp_factory else client.open_sftp()
+        self._open_count += 1
+        self._logger.debug(f"Opened SFTP subsystem (open count: {self._open_count})")
+        return self._sftp
+
+    def _discard(self) -> None:
+        """关闭并丢弃当前 SFTP 客户端（需持有锁）"""
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            except Exception as e:
+                self._logger.debug(f"Error closing SFTP subsystem: {e}")
+            self._sftp = None
+
+    @contextmanager
+    def acquire(self) -> Iterator[SFTPClient]:
+        """独占使用 SFTP 客户端"""
+        with self._lock:
+            yield self._ensure()
+
+    def run(self, operation: Callable[[SFTPClient], T]) -> T:
+        """
+        在持久 SFTP 通道上执行操作
+
+        若操作失败且通道已失效，重新打开子系统后重试一次；
+        通道仍然可用时（如文件不存在）直接抛出原始异常。
+
+        Args:
+            operation: 接收 SFTPClient 的操作
+
+        Returns:
+            操作的返回值
+        """
+        with self._lock:
+            sftp = self._ensure()
+            try:
+                return operation(sftp)
+            except Exception:
+                if self._is_alive(sftp):
+                    raise
+                self._logger.warning("SFTP channel lost, reopening subsystem")
+
+            return operation(self._ensure())
+
+    def close(self) -> None:
+        """关闭 SFTP 子系统"""
+        with self._lock:
+            self._discard()
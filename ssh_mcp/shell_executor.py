@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import select
+import shlex
+import threading
+import time
+from typing import Callable, Optional
+
+import paramiko
+
+from .command_framing import FramedResult, end_seen, frame_command, new_marker, parse_frames
+
+
+class ShellLostError(RuntimeError):
+    """持久 shell 在命令完成前失去同步（超时、输出超限或 shell 退出）"""
+
+
+class PersistentShell:
+    """
+    持久 shell 执行器
+
+    每个会话保持一个 shell 通道（不分配 pty，没有提示符和回显），
+    命令以带唯一起止标记的脚本片段写入，按标记切分出每条命令的
+    stdout / stderr、退出码和执行后的工作目录。
+    工作目录、环境变量和 shell 函数在多次调用之间保留，
+    省去每条命令打开 exec 通道和启动远程 shell 的开销。
+
+    结束标记丢失时（超时、shell 退出、输出超限）关闭通道，
+    下次调用重新打开 shell 并切换回最后已知的工作目录；环境变量无法恢复。
+    """
+
+    def __init__(
+        self,
+        open_channel: Callable[[], paramiko.Channel],
+        max_output_bytes: int = 16 * 1024 * 1024,
+        chunk_size: int = 32768
+    ):
+        self._open_channel = open_channel
+        self._max_output_bytes = max_output_bytes
+        self._chunk_size = chunk_size
+        self._channel: Optional[paramiko.Channel] = None
+        self._cwd: Optional[str] = None
+        self._lock = threading.Lock()
+        self._commands = 0
+        self._resets = 0
+        self._logger = logging.getLogger(__name__)
+
+    @property
+    def is_open(self) -> bool:
+        return self._channel is not None and not self._channel.closed
+
+    @property
+    def cwd(self) -> Optional[str]:
+        """最后一条命令结束时的工作目录"""
+        return self._cwd
+
+    def stats(self) -> dict:
+        return {
+            "open": self.is_open,
+            "commands": self._commands,
+            "resets": self._resets,
+            "cwd": self._cwd,
+        }
+
+    def _ensure_channel(self) -> paramiko.Channel:
+        if self.is_open:
+            return self._channel
+        if self._channel is not None:
+            # 远程已关闭的旧通道也要关闭，释放它占用的资源
+            try:
+                self._channel.close()
+            except Exception:
+                pass
+        channel = self._open_channel()
+        channel.invoke_shell()
+        prelude = "unset HISTFILE\n"
+        if self._cwd:
+            prelude += f"cd -- {shlex.quote(self._cwd)} 2>/dev/null\n"
+        channel.sendall(prelude.encode())
+        self._channel = channel
+        return channel
+
+    def reset(self) -> None:
+        """关闭当前 shell，下次调用时重新打开"""
+        if self._channel is not None:
+            try:
+                self._channel.close()
+            except Exception:
+                pass
+            self._channel = None
+            self._resets += 1
+
+    def close(self) -> None:
+        with self._lock:
+            self.reset()
+
+    def run(self, command: str, timeout: float) -> FramedResult:
+        """
+        在持久 shell 中执行一条命令
+
+        Args:
+            command: 要执行的命令
+            timeout: 等待结束标记的最长时间（秒）
+
+        Returns:
+            FramedResult: 命令输出、退出码和工作目录
+
+        Raises:
+            ShellLostError: 超时或输出超限，shell 已被重置
+        """
+        with self._lock:
+            channel = self._ensure_channel()
+            marker = new_marker()
+            channel.sendall(frame_command(command, marker).encode())
+            self._commands += 1
+
+            stdout = bytearray()
+            stderr = bytearray()
+            deadline = time.monotonic() + timeout
+            while not end_seen(stdout, stderr, marker):
+                if channel.recv_ready():
+                    stdout += channel.recv(self._chunk_size)
+                elif channel.recv_stderr_ready():
+                    stderr += channel.recv_stderr(self._chunk_size)
+                elif channel.closed or channel.eof_received:
+                    # shell 已退出（例如命令中执行了 exit）：返回已有输出
+                    return self._finish_lost(channel, command, marker, stdout, stderr)
+                elif time.monotonic() > deadline:
+                    self.reset()
+                    raise ShellLostError(f"Command timed out after {timeout}s; shell was reset")
+                else:
+                    select.select([channel], [], [], 0.5)
+
+                if len(stdout) + len(stderr) > self._max_output_bytes:
+                    self.reset()
+                    raise ShellLostError(
+                        f"Output exceeded {self._max_output_bytes} bytes in shell mode; "
+                        f"shell was reset (use exec mode for large outputs)"
+                    )
+
+            results = parse_frames(
+                stdout.decode("utf-8", errors="replace"),
+                stderr.decode("utf-8", errors="replace"),
+                marker,
+                [command]
+            )
+            if not results:
+                self.reset()
+                raise ShellLostError("Start marker not found in shell output; shell was reset")
+            result = results[0]
+            if result.cwd:
+                self._cwd = result.cwd
+            return result
+
+    def _finish_lost(
+        self, channel: paramiko.Channel, command: str, marker: str, stdout: bytearray, stderr: bytearray
+    ) -> FramedResult:
+        channel.status_event.wait(1.0)
+        while channel.recv_ready() or channel.recv_stderr_ready():
+            if channel.recv_ready():
+                stdout += channel.recv(self._chunk_size)
+            else:
+                stderr += channel.recv_stderr(self._chunk_size)
+        exit_code = channel.recv_exit_status() if channel.exit_status_ready() else -1
+        results = parse_frames(
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+            marker,
+            [command]
+        )
+        self._logger.info(f"Shell exited during command (exit status {exit_code}); it will be reopened")
+        self.reset()
+        if results:
+            results[0].exit_code = exit_code
+            return results[0]
+        return FramedResult(index=0, command=command, stdout="", stderr="", exit_code=exit_code, cwd=self._cwd)
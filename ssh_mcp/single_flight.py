@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import copy
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from .result_cache import is_read_only_command
+
+T = TypeVar("T")
+
+COALESCE_ENV = "SSH_COALESCE_COMMANDS"
+
+
+def coalescing_enabled() -> bool:
+    """环境变量 SSH_COALESCE_COMMANDS 是否开启命令合并"""
+    return os.getenv(COALESCE_ENV, "false").lower() in ("1", "true", "yes", "on")
+
+
+def can_coalesce(command: str) -> bool:
+    """
+    命令是否可以合并
+
+    只合并只读命令（与结果缓存相同的允许列表，且不含变量、通配符等 shell 展开）；
+    修改状态的命令每个调用方都要各自执行。
+    """
+    return is_read_only_command(command)
+
+
+def command_key(host: str, port: int, username: str, command: str) -> Tuple[Any, ...]:
+    """合并键：主机、端口、用户和去掉首尾空白的原始命令（引号写法不同即视为不同命令）"""
+    return (host, port, username, command.strip())
+
+
+class _FlightStats:
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    def as_dict(self, in_flight: int) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": in_flight,
+        }
+
+
+class SingleFlight:
+    """
+    异步单飞（single-flight）
+
+    同一个键同时只执行一次：执行期间到达的相同请求等待同一个结果，
+    而不是各自执行。执行在独立任务中进行，某个调用方被取消不会影响其他等待者。
+    等待者得到结果的副本（share 函数），避免调用方修改共享对象。
+    """
+
+    def __init__(self, share: Callable[[Any], Any] = copy.copy):
+        self._share = share
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._stats = _FlightStats()
+        self._logger = logging.getLogger(__name__)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 fn，或加入同一键上正在进行的执行
+
+        Args:
+            key: 合并键
+            fn: 返回协程的函数，只有首个调用方会执行
+
+        Returns:
+            执行结果；合并的调用方得到副本
+        """
+        self._stats.calls += 1
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._stats.coalesced += 1
+            self._logger.debug(f"Coalesced call for {key!r}")
+            return self._share(await asyncio.shield(flight))
+
+        self._stats.executions += 1
+        flight = asyncio.ensure_future(fn())
+        self._flights[key] = flight
+        flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        return await asyncio.shield(flight)
+
+    @property
+    def coalesced_calls(self) -> int:
+        """被合并（未单独执行）的调用次数"""
+        return self._stats.coalesced
+
+    def stats(self) -> Dict[str, int]:
+        return self._stats.as_dict(len(self._flights))
+
+
+class SyncSingleFlight:
+    """
+    线程版单飞，用于在线程池中执行的同步调用
+
+    首个调用方在自己的线程中执行，其余相同键的调用方阻塞等待同一个结果。
+    """
+
+    def __init__(self, share: Callable[[Any], Any] = copy.copy):
+        self._share = share
+        self._flights: Dict[Hashable, concurrent.futures.Future] = {}
+        self._stats = _FlightStats()
+        self._lock = threading.Lock()
+        self._logger = logging.getLogger(__name__)
+
+    def do(self, key: Hashable, fn: Callable[[], T], timeout: Optional[float] = None) -> T:
+        """
+        执行 fn，或等待同一键上正在进行的执行
+
+        Args:
+            key: 合并键
+            fn: 只有首个调用方会执行的函数
+            timeout: 等待者最长等待时间（秒）
+
+        Returns:
+            执行结果；合并的调用方得到副本
+        """
+        with self._lock:
+            self._stats.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = concurrent.futures.Future()
+                self._flights[key] = flight
+                self._stats.executions += 1
+            else:
+                self._stats.coalesced += 1
+
+        if not leader:
+            self._logger.debug(f"Coalesced call for {key!r}")
+            return self._share(flight.result(timeout=timeout))
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key)
+            flight.set_exception(e)
+            raise
+        self._land(key)
+        flight.set_result(result)
+        return result
+
+    def _land(self, key: Hashable) -> None:
+        # 先移除再发布结果，之后到达的调用方会重新执行而不是拿到旧结果
+        with self._lock:
+            self._flights.pop(key, None)
+
+    @property
+    def coalesced_calls(self) -> int:
+        """被合并（未单独执行）的调用次数"""
+        return self._stats.coalesced
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return self._stats.as_dict(len(self._flights))
+
+
+# 批量执行器之间共享，不同执行器对同一主机的相同命令也会合并
+shared_sync_flight = SyncSingleFlight()
@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import gzip
+import logging
+import os
+import posixpath
+import shlex
+import socket
+import stat
+import tarfile
+import time
+from typing import BinaryIO, Callable, Iterator, List, Tuple
+
+import paramiko
+
+from .exceptions import FileTransferException
+from .transfer_engine import CommandRunner, SFTPTransferEngine, TransferStats
+
+
+COMPRESSIONS = ("none", "gzip", "zstd")
+TRANSFER_MODES = ("auto", "sftp", "tar")
+
+
+# 通道读写的等待间隔（秒）：等待期间读取 stderr，避免远程因 stderr 写满窗口而阻塞
+_POLL_INTERVAL = 0.05
+
+
+class _IdleTimer:
+    """记录最近一次有字节收发的时间，超过 limit 秒没有进展时抛出 TimeoutError"""
+
+    def __init__(self, limit: float):
+        self._limit = limit
+        self._last_progress = time.monotonic()
+
+    def progress(self) -> None:
+        self._last_progress = time.monotonic()
+
+    def check(self, waiting_for: str) -> None:
+        if time.monotonic() - self._last_progress > self._limit:
+            raise TimeoutError(f"Remote tar made no progress for {self._limit}s while {waiting_for}")
+
+
+class _StderrBuffer:
+    """
+    边传输边读取远程 stderr，只保留开头 limit 字节
+
+    未读取的 stderr 会占用通道窗口；远程 tar 输出大量警告时，不及时读取会使双方互相等待。
+    """
+
+    def __init__(self, channel: paramiko.Channel, timer: _IdleTimer, limit: int = 8 * 1024):
+        self._channel = channel
+        self._timer = timer
+        self._limit = limit
+        self._data = bytearray()
+        self.dropped_bytes = 0
+
+    def _keep(self, data: bytes) -> None:
+        self._timer.progress()
+        room = max(0, self._limit - len(self._data))
+        self._data += data[:room]
+        self.dropped_bytes += max(0, len(data) - room)
+
+    def drain(self) -> None:
+        """读取已到达的 stderr（不阻塞）"""
+        while self._channel.recv_stderr_ready():
+            data = self._channel.recv_stderr(65536)
+            if not data:
+                break
+            self._keep(data)
+
+    def read_to_end(self) -> None:
+        """读取剩余的 stderr 直到远程关闭"""
+        while True:
+            try:
+                data = self._channel.recv_stderr(65536)
+            except socket.timeout:
+                self._timer.check("waiting for the remote command to finish")
+                continue
+            if not data:
+                break
+            self._keep(data)
+
+    def text(self) -> str:
+        text = self._data.decode("utf-8", errors="replace").strip()
+        if self.dropped_bytes:
+            text += f"\n... ({self.dropped_bytes} more bytes of stderr)"
+        return text
+
+
+class _ChannelWriter:
+    """把写入转发到 SSH 通道的 stdin，统计线上字节数；发送窗口已满时继续读取 stderr"""
+
+    def __init__(self, channel: paramiko.Channel, stderr: _StderrBuffer, timer: _IdleTimer):
+        self._channel = channel
+        self._stderr = stderr
+        self._timer = timer
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast("B")
+        while view:
+            self._stderr.drain()
+            try:
+                sent = self._channel.send(bytes(view[:65536]))
+            except socket.timeout:
+                self._timer.check("sending the archive")
+                continue
+            if sent == 0:
+                raise FileTransferException("Remote tar closed the channel before the archive was sent")
+            self._timer.progress()
+            view = view[sent:]
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+class _ChannelReader:
+    """从 SSH 通道的 stdout 读取，统计线上字节数；等待数据时继续读取 stderr"""
+
+    def __init__(self, channel: paramiko.Channel, stderr: _StderrBuffer, timer: _IdleTimer):
+        self._channel = channel
+        self._stderr = stderr
+        self._timer = timer
+        self.bytes_read = 0
+
+    def _recv(self, size: int) -> bytes:
+        while True:
+            self._stderr.drain()
+            try:
+                data = self._channel.recv(size)
+            except socket.timeout:
+                self._timer.check("receiving the archive")
+                continue
+            self._timer.progress()
+            return data
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                data = self._recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+            data = b"".join(chunks)
+        else:
+            data = self._recv(size) if size else b""
+        self.bytes_read += len(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+
+def _zstandard():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        raise ImportError("zstandard is not installed. Install with: pip install zstandard")
+
+
+def _safe_members(tar: tarfile.TarFile, dest: str) -> Iterator[tarfile.TarInfo]:
+    """过滤归档成员，拒绝逃逸出目标目录的路径和链接"""
+    root = os.path.realpath(dest)
+
+    def inside(path: str) -> bool:
+        return os.path.commonpath([root, os.path.realpath(path)]) == root
+
+    for member in tar:
+        target = os.path.join(root, member.name)
+        if os.path.isabs(member.name) or not inside(target):
+            raise FileTransferException(f"Unsafe path in archive: {member.name}")
+        if member.issym() and not inside(os.path.join(os.path.dirname(target), member.linkname)):
+            raise FileTransferException(f"Unsafe symlink in archive: {member.name} -> {member.linkname}")
+        if member.islnk() and not inside(os.path.join(root, member.linkname)):
+            raise FileTransferException(f"Unsafe hard link in archive: {member.name} -> {member.linkname}")
+        if member.isdev():
+            continue
+        yield member
+
+
+class TarStreamer:
+    """
+    tar 流式目录传输 - 通过单个 exec 通道传输整个目录
+
+    特性：
+    - 本地边打包边发送 / 边接收边解包，不在磁盘上暂存归档
+    - 可选 gzip 或 zstd 压缩（zstd 需要本地 zstandard 包和远程 zstd 命令）
+    - 解包时校验路径和链接，防止写出目标目录
+    - 超过 idle_timeout 秒没有任何字节收发时抛出 TimeoutError 并关闭通道
+    """
+
+    def __init__(
+        self,
+        channel_factory: Callable[[], paramiko.Channel],
+        compress_level: int = 6,
+        idle_timeout: float = 60
+    ):
+        self._channel_factory = channel_factory
+        self._compress_level = compress_level
+        self._idle_timeout = idle_timeout
+        self._logger = logging.getLogger(__name__)
+
+    def upload(self, local_dir: str, remote_dir: str, compression: str = "gzip") -> TransferStats:
+        """
+        打包本地目录并在远程解包
+
+        Args:
+            local_dir: 本地源目录
+            remote_dir: 远程目标目录（不存在时创建）
+            compression: none / gzip / zstd
+
+        Returns:
+            TransferStats: 传输统计（bytes_on_wire 为压缩后的字节数）
+        """
+        self._check_compression(compression)
+        start_time = time.monotonic()
+        dest = shlex.quote(remote_dir)
+        extract = {
+            "none": f"tar -xf - -C {dest}",
+            "gzip": f"tar -xzf - -C {dest}",
+            "zstd": f"zstd -dcq | tar -xf - -C {dest}",
+        }[compression]
+
+        channel = self._channel_factory()
+        try:
+            channel.exec_command(f"mkdir -p -- {dest} && {extract}")
+            channel.settimeout(_POLL_INTERVAL)
+            timer = _IdleTimer(self._idle_timeout)
+            stderr = _StderrBuffer(channel, timer)
+            writer = _ChannelWriter(channel, stderr, timer)
+            sink, finish = self._compressor(writer, compression)
+
+            files = 0
+            raw_bytes = 0
+            with tarfile.open(fileobj=sink, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                for full_path, arcname in self._walk(local_dir):
+                    tar.add(full_path, arcname=arcname, recursive=False)
+                    if os.path.isfile(full_path) and not os.path.islink(full_path):
+                        files += 1
+                        raw_bytes += os.path.getsize(full_path)
+            finish()
+            channel.shutdown_write()
+            self._check_exit(channel, stderr, timer, "extract")
+        finally:
+            channel.close()
+
+        stats = TransferStats(
+            bytes_transferred=raw_bytes,
+            duration_ms=(time.monotonic() - start_time) * 1000,
+            files=files,
+            bytes_on_wire=writer.bytes_written
+        )
+        self._log_stats("Uploaded", local_dir, remote_dir, compression, stats)
+        return stats
+
+    def download(self, remote_dir: str, local_dir: str, compression: str = "gzip") -> TransferStats:
+        """
+        在远程打包目录并在本地解包
+
+        Args:
+            remote_dir: 远程源目录
+            local_dir: 本地目标目录（不存在时创建）
+            compression: none / gzip / zstd
+
+        Returns:
+            TransferStats: 传输统计（bytes_on_wire 为压缩后的字节数）
+        """
+        self._check_compression(compression)
+        start_time = time.monotonic()
+        src = shlex.quote(remote_dir)
+        create = {
+            "none": f"tar -cf - -C {src} .",
+            "gzip": f"tar -czf - -C {src} .",
+            "zstd": f"tar -cf - -C {src} . | zstd -cq",
+        }[compression]
+
+        os.makedirs(local_dir, exist_ok=True)
+        channel = self._channel_factory()
+        try:
+            channel.exec_command(create)
+            channel.settimeout(_POLL_INTERVAL)
+            timer = _IdleTimer(self._idle_timeout)
+            stderr = _StderrBuffer(channel, timer)
+            reader = _ChannelReader(channel, stderr, timer)
+            source = self._decompressor(reader, compression)
+
+            files = 0
+            raw_bytes = 0
+            with tarfile.open(fileobj=source, mode="r|") as tar:
+                for member in _safe_members(tar, local_dir):
+                    if hasattr(tarfile, "data_filter"):
+                        tar.extract(member, local_dir, filter="data")
+                    else:
+                        tar.extract(member, local_dir)
+                    if member.isfile():
+                        files += 1
+                        raw_bytes += member.size
+            self._check_exit(channel, stderr, timer, "archive")
+        finally:
+            channel.close()
+
+        stats = TransferStats(
+            bytes_transferred=raw_bytes,
+            duration_ms=(time.monotonic() - start_time) * 1000,
+            files=files,
+            bytes_on_wire=reader.bytes_read
+        )
+        self._log_stats("Downloaded", remote_dir, local_dir, compression, stats)
+        return stats
+
+    @staticmethod
+    def _check_compression(compression: str) -> None:
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+
+    @staticmethod
+    def _walk(local_dir: str) -> Iterator[Tuple[str, str]]:
+        """按目录顺序列出 (本地路径, 归档名)，目录先于其内容"""
+        for root, dirs, files in os.walk(local_dir):
+            dirs.sort()
+            rel_root = os.path.relpath(root, local_dir)
+            arc_root = "." if rel_root == "." else rel_root.replace(os.sep, "/")
+            if arc_root != ".":
+                yield root, arc_root
+            for name in sorted(files):
+                yield os.path.join(root, name), posixpath.join(arc_root, name) if arc_root != "." else name
+            # Symlinked directories are archived as links, not followed
+            for name in [d for d in dirs if os.path.islink(os.path.join(root, d))]:
+                dirs.remove(name)
+                yield os.path.join(root, name), posixpath.join(arc_root, name) if arc_root != "." else name
+
+    def _compressor(self, writer: _ChannelWriter, compression: str) -> Tuple[BinaryIO, Callable[[], None]]:
+        """返回 (写入端, 结束函数)"""
+        if compression == "gzip":
+            stream = gzip.GzipFile(fileobj=writer, mode="wb", compresslevel=self._compress_level)
+            return stream, stream.close
+        if compression == "zstd":
+            stream = _zstandard().ZstdCompressor(level=self._compress_level).stream_writer(
+                writer, closefd=False
+            )
+            return stream, stream.close
+        return writer, lambda: None
+
+    @staticmethod
+    def _decompressor(reader: _ChannelReader, compression: str) -> BinaryIO:
+        if compression == "gzip":
+            return gzip.GzipFile(fileobj=reader, mode="rb")
+        if compression == "zstd":
+            return _zstandard().ZstdDecompressor().stream_reader(reader)
+        return reader
+
+    @staticmethod
+    def _check_exit(channel: paramiko.Channel, stderr: _StderrBuffer, timer: _IdleTimer, action: str) -> None:
+        stderr.read_to_end()
+        while not channel.status_event.wait(_POLL_INTERVAL):
+            timer.check("waiting for the exit status")
+        exit_code = channel.recv_exit_status()
+        if exit_code != 0:
+            raise FileTransferException(f"Remote tar {action} failed (exit {exit_code}): {stderr.text()}")
+
+    def _log_stats(self, action: str, source: str, destination: str, compression: str, stats: TransferStats) -> None:
+        self._logger.info(
+            f"{action} {source} -> {destination} via tar stream ({compression}): "
+            f"{stats.files} files, {stats.bytes_transferred} bytes "
+            f"({stats.bytes_on_wire} on wire), {stats.duration_ms:.2f}ms"
+        )
+
+
+class DirectoryTransfer:
+    """
+    目录传输 - 按文件数量自动选择传输方式
+
+    文件数不少于 tar_threshold 时使用 tar 流（单通道、无逐文件往返），
+    否则通过 SFTP 传输引擎逐个传输文件。
+    """
+
+    def __init__(
+        self,
+        transfer_engine: SFTPTransferEngine,
+        tar_streamer: TarStreamer,
+        command_runner: CommandRunner,
+        tar_threshold: int = 64,
+        command_timeout: int = 600
+    ):
+        self._transfer = transfer_engine
+        self._tar = tar_streamer
+        self._run = command_runner
+        self._tar_threshold = tar_threshold
+        self._command_timeout = command_timeout
+
+    def _pick_mode(self, mode: str, file_count: int) -> str:
+        if mode not in TRANSFER_MODES:
+            raise ValueError(f"Unknown transfer mode: {mode} (expected one of {', '.join(TRANSFER_MODES)})")
+        if mode == "auto":
+            return "tar" if file_count >= self._tar_threshold else "sftp"
+        return mode
+
+    def upload(
+        self,
+        local_dir: str,
+        remote_dir: str,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> Tuple[str, TransferStats]:
+        """
+        上传目录
+
+        Returns:
+            (实际使用的方式, 传输统计)
+        """
+        files = [
+            (full_path, arcname) for full_path, arcname in TarStreamer._walk(local_dir)
+            if os.path.isfile(full_path) and not os.path.islink(full_path)
+        ]
+        mode = self._pick_mode(mode, len(files))
+        if mode == "tar":
+            return mode, self._tar.upload(local_dir, remote_dir, compression)
+
+        start_time = time.monotonic()
+        dirs = sorted({posixpath.dirname(posixpath.join(remote_dir, arcname)) for _, arcname in files} | {remote_dir})
+        self._run("mkdir -p -- " + " ".join(shlex.quote(d) for d in dirs), self._command_timeout)
+
+        total = TransferStats(files=0)
+        for full_path, arcname in files:
+            stats = self._transfer.upload(full_path, posixpath.join(remote_dir, arcname), resume=False)
+            total.bytes_transferred += stats.bytes_transferred
+            total.files += 1
+        total.bytes_on_wire = total.bytes_transferred
+        total.duration_ms = (time.monotonic() - start_time) * 1000
+        return mode, total
+
+    def download(
+        self,
+        remote_dir: str,
+        local_dir: str,
+        mode: str = "auto",
+        compression: str = "gzip"
+    ) -> Tuple[str, TransferStats]:
+        """
+        下载目录
+
+        Returns:
+            (实际使用的方式, 传输统计)
+        """
+        files: List[str] = []
+        if mode != "tar":
+            output = self._run(
+                f"cd -- {shlex.quote(remote_dir)} && find . -type f -printf '%P\\0'",
+                self._command_timeout
+            )
+            files = [path for path in output.split("\0") if path]
+        mode = self._pick_mode(mode, len(files))
+        if mode == "tar":
+            return mode, self._tar.download(remote_dir, local_dir, compression)
+
+        start_time = time.monotonic()
+        total = TransferStats(files=0)
+        for path in files:
+            local_path = os.path.join(local_dir, *path.split("/"))
+            stats = self._transfer.download(posixpath.join(remote_dir, path), local_path, resume=False)
+            total.bytes_transferred += stats.bytes_transferred
+            total.files += 1
+        total.bytes_on_wire = total.bytes_transferred
+        total.duration_ms = (time.monotonic() - start_time) * 1000
+        return mode, total
+
+
+def is_remote_directory(sftp: paramiko.SFTPClient, remote_path: str) -> bool:
+    """远程路径是否为目录（不存在时返回 False）"""
+    try:
+        return stat.S_ISDIR(sftp.stat(remote_path).st_mode)
+    except FileNotFoundError:
+        return False
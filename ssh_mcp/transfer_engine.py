@@ -0,0 +1,541 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shlex
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from paramiko import SFTPClient
+
+from .exceptions import FileTransferException
+from .sftp_manager import SFTPChannelCache
+
+
+# (offset, length)
+# 下载中的临时文件后缀：完成后才替换目标文件
+PART_SUFFIX = ".part"
+
+ByteRange = Tuple[int, int]
+
+# (command, timeout) -> stdout；命令失败时抛出异常
+CommandRunner = Callable[[str, int], str]
+
+
+@dataclass
+class TransferConfig:
+    """传输引擎配置"""
+    chunk_size: int = 32768
+    range_size: int = 8 * 1024 * 1024
+    max_requests: int = 64
+    max_channels: int = 4
+    parallel_threshold: int = 16 * 1024 * 1024
+    use_mmap: bool = True
+    checksum_timeout: int = 600
+
+
+@dataclass
+class TransferStats:
+    """单次传输统计"""
+    bytes_transferred: int = 0
+    duration_ms: float = 0.0
+    ranges: int = 0
+    channels: int = 1
+    resumed_from: int = 0
+    files: int = 1
+    bytes_on_wire: int = 0
+
+    @property
+    def throughput_mb_per_sec(self) -> float:
+        """吞吐量（MB/s）"""
+        if self.duration_ms <= 0:
+            return 0.0
+        return self.bytes_transferred / (1024 * 1024) / (self.duration_ms / 1000)
+
+
+class TransferJournal:
+    """
+    传输进度日志 - 持久化每个传输已完成的连续前缀
+
+    MCP 服务重启后，中断的传输可以从日志记录的位置续传；
+    源文件的大小或修改时间变化时，记录作废。
+    """
+
+    DEFAULT_PATH = Path.home() / ".ssh" / "mcp_transfers.json"
+
+    _default: Optional["TransferJournal"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: Optional[Path] = None):
+        self._path = Path(path) if path else self.DEFAULT_PATH
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = self._load()
+        self._logger = logging.getLogger(__name__)
+
+    @classmethod
+    def default(cls) -> "TransferJournal":
+        """进程内共享的默认日志"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def _load(self) -> Dict[str, dict]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        """原子写入（需持有锁）"""
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            self._logger.warning(f"Failed to save transfer journal: {e}")
+
+    def get(self, key: str, signature: Sequence) -> Optional[int]:
+        """
+        获取已完成的前缀长度
+
+        Args:
+            key: 传输标识
+            signature: 源文件签名（大小、修改时间）
+
+        Returns:
+            已完成字节数；无记录或源文件已变化时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.get("signature") != list(signature):
+                del self._entries[key]
+                self._save()
+                return None
+            return entry.get("committed", 0)
+
+    def record(self, key: str, signature: Sequence, committed: int) -> None:
+        """记录已完成的连续前缀"""
+        with self._lock:
+            self._entries[key] = {
+                "signature": list(signature),
+                "committed": committed,
+                "updated_at": time.time()
+            }
+            self._save()
+
+    def remove(self, key: str) -> None:
+        """传输完成后删除记录"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._save()
+
+
+class _PrefixTracker:
+    """跟踪乱序完成的区间，推进连续已完成前缀"""
+
+    def __init__(self, start: int, on_advance: Callable[[int], None]):
+        self._committed = start
+        self._done: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._on_advance = on_advance
+
+    def complete(self, offset: int, length: int) -> None:
+        with self._lock:
+            self._done[offset] = length
+            advanced = False
+            while self._committed in self._done:
+                self._committed += self._done.pop(self._committed)
+                advanced = True
+            if advanced:
+                self._on_advance(self._committed)
+
+
+class SFTPTransferEngine:
+    """
+    SFTP 传输引擎 - 流水线化、分块并行传输
+
+    特性：
+    - 流水线读写：每个通道同时保持多个未确认的 SFTP 读/写请求
+    - 大文件按区间切分，通过多个 SFTP 通道并行传输
+    - 本地文件通过 mmap 读写，避免额外拷贝
+    - 小文件复用会话的持久 SFTP 通道
+    - 断点续传：按区间校验已有前缀（远程端计算 sha256），只传输缺失部分
+
+    用法:
+        engine = SFTPTransferEngine(sftp_cache, client.open_sftp, command_runner=run)
+        stats = engine.upload("build.tar", "/tmp/build.tar")
+    """
+
+    def __init__(
+        self,
+        sftp_cache: SFTPChannelCache,
+        channel_factory: Callable[[], SFTPClient],
+        config: Optional[TransferConfig] = None,
+        command_runner: Optional[CommandRunner] = None,
+        identity: str = "",
+        journal: Optional[TransferJournal] = None
+    ):
+        self._sftp_cache = sftp_cache
+        self._channel_factory = channel_factory
+        self._config = config or TransferConfig()
+        self._command_runner = command_runner
+        self._identity = identity
+        self._journal = journal or TransferJournal.default()
+        self._logger = logging.getLogger(__name__)
+
+    def _journal_key(self, direction: str, local_path: str, remote_path: str) -> str:
+        return f"{direction}|{self._identity}|{os.path.abspath(local_path)}|{remote_path}"
+
+    def _remote_stat(self, remote_path: str):
+        """远程文件属性；不存在时返回 None"""
+        def stat(sftp: SFTPClient):
+            try:
+                return sftp.stat(remote_path)
+            except FileNotFoundError:
+                return None
+        return self._sftp_cache.run(stat)
+
+    def _remote_range_digests(self, remote_path: str, ranges: List[ByteRange]) -> Optional[List[str]]:
+        """在远程端计算每个区间的 sha256；无法计算时返回 None"""
+        if self._command_runner is None:
+            return None
+
+        path = shlex.quote(remote_path)
+        script = "; ".join(
+            f"tail -c +{offset + 1} {path} | head -c {length} | sha256sum"
+            for offset, length in ranges
+        )
+        try:
+            output = self._command_runner(script, self._config.checksum_timeout)
+        except Exception as e:
+            self._logger.warning(f"Remote checksum failed for {remote_path}: {e}")
+            return None
+
+        digests = [line.split()[0] for line in output.splitlines() if line.strip()]
+        if len(digests) != len(ranges):
+            self._logger.warning(f"Unexpected checksum output for {remote_path}")
+            return None
+        return digests
+
+    def _verified_prefix(
+        self,
+        key: str,
+        signature: Sequence,
+        candidate: int,
+        local_view: memoryview,
+        remote_path: str
+    ) -> int:
+        """
+        确定可续传的位置
+
+        候选前缀先被日志记录的已完成位置截断，再逐区间比较本地与远程
+        的 sha256，返回第一个不一致区间的起点。
+
+        Args:
+            key: 日志标识
+            signature: 源文件签名
+            candidate: 目标端已有的字节数
+            local_view: 本地文件内容（至少 candidate 字节）
+            remote_path: 远程文件路径
+
+        Returns:
+            续传起点（0 表示从头传输）
+        """
+        committed = self._journal.get(key, signature)
+        if committed is not None:
+            candidate = min(candidate, committed)
+        if candidate <= 0:
+            return 0
+
+        ranges = self._split_ranges(0, candidate)
+        remote_digests = self._remote_range_digests(remote_path, ranges)
+        if remote_digests is None:
+            return 0
+
+        for (offset, length), remote_digest in zip(ranges, remote_digests):
+            if hashlib.sha256(local_view[offset:offset + length]).hexdigest() != remote_digest:
+                return offset
+        return candidate
+
+    def _tracker(self, key: str, signature: Sequence, start: int) -> _PrefixTracker:
+        return _PrefixTracker(start, lambda committed: self._journal.record(key, signature, committed))
+
+    def _split_ranges(self, start: int, size: int) -> List[ByteRange]:
+        """把 [start, size) 切分为若干传输区间"""
+        range_size = max(self._config.range_size, self._config.chunk_size)
+        return [
+            (offset, min(range_size, size - offset))
+            for offset in range(start, size, range_size)
+        ]
+
+    def _channel_count(self, size: int, ranges: List[ByteRange]) -> int:
+        """大文件才使用多个通道"""
+        if size < self._config.parallel_threshold:
+            return 1
+        return max(1, min(self._config.max_channels, len(ranges)))
+
+    def _run_ranges(
+        self,
+        ranges: List[ByteRange],
+        channels: int,
+        worker: Callable[[SFTPClient, List[ByteRange]], None]
+    ) -> None:
+        """
+        在一个或多个 SFTP 通道上处理所有区间
+
+        额外的通道打不开时（例如会话的通道已用满）少用几个通道；
+        一个都打不开时，剩余区间在持久 SFTP 通道上处理。
+        """
+        if channels <= 1:
+            self._sftp_cache.run(lambda sftp: worker(sftp, ranges))
+            return
+
+        pending = list(reversed(ranges))
+        pending_lock = threading.Lock()
+
+        def next_range() -> Optional[ByteRange]:
+            with pending_lock:
+                return pending.pop() if pending else None
+
+        def channel_worker() -> None:
+            try:
+                sftp = self._channel_factory()
+            except Exception as e:
+                self._logger.debug(f"Transfer channel not opened, continuing with fewer channels: {e}")
+                return
+            try:
+                while True:
+                    byte_range = next_range()
+                    if byte_range is None:
+                        return
+                    worker(sftp, [byte_range])
+            finally:
+                sftp.close()
+
+        with ThreadPoolExecutor(max_workers=channels, thread_name_prefix="sftp-transfer") as pool:
+            futures = [pool.submit(channel_worker) for _ in range(channels)]
+            for future in futures:
+                future.result()
+
+        if pending:
+            remaining = list(reversed(pending))
+            self._sftp_cache.run(lambda sftp: worker(sftp, remaining))
+
+    def upload(self, local_path: str, remote_path: str, resume: bool = True) -> TransferStats:
+        """
+        上传文件
+
+        Args:
+            local_path: 本地文件路径
+            remote_path: 远程目标路径
+            resume: 远程已有部分文件时是否续传
+
+        Returns:
+            TransferStats: 传输统计
+
+        Raises:
+            FileTransferException: 传输失败
+        """
+        start_time = time.monotonic()
+        local_stat = os.stat(local_path)
+        size = local_stat.st_size
+        key = self._journal_key("upload", local_path, remote_path)
+        signature = [size, local_stat.st_mtime_ns]
+
+        with open(local_path, "rb") as local_file:
+            if size == 0:
+                self._sftp_cache.run(lambda sftp: sftp.open(remote_path, "wb").close())
+                return TransferStats(duration_ms=(time.monotonic() - start_time) * 1000)
+
+            source = self._map_for_read(local_file)
+            view = memoryview(source)
+            try:
+                resumed_from = 0
+                if resume:
+                    remote_stat = self._remote_stat(remote_path)
+                    if remote_stat is not None and 0 < remote_stat.st_size <= size:
+                        resumed_from = self._verified_prefix(
+                            key, signature, remote_stat.st_size, view, remote_path
+                        )
+
+                if resumed_from == 0:
+                    self._sftp_cache.run(lambda sftp: sftp.open(remote_path, "wb").close())
+                else:
+                    self._logger.info(f"Resuming upload of {local_path} at byte {resumed_from}")
+
+                ranges = self._split_ranges(resumed_from, size)
+                channels = self._channel_count(size - resumed_from, ranges)
+                tracker = self._tracker(key, signature, resumed_from)
+
+                def write_ranges(sftp: SFTPClient, byte_ranges: List[ByteRange]) -> None:
+                    for offset, length in byte_ranges:
+                        # Closing the handle waits for every pipelined write to be acknowledged
+                        with sftp.open(remote_path, "r+b") as remote_file:
+                            remote_file.set_pipelined(True)
+                            remote_file.seek(offset)
+                            remote_file.write(view[offset:offset + length])
+                        tracker.complete(offset, length)
+
+                self._run_ranges(ranges, channels, write_ranges)
+            finally:
+                view.release()
+                if isinstance(source, mmap.mmap):
+                    source.close()
+
+        remote_size = self._sftp_cache.run(lambda sftp: sftp.stat(remote_path).st_size)
+        if remote_size != size:
+            raise FileTransferException(
+                f"Size mismatch after upload: local {size} bytes, remote {remote_size} bytes"
+            )
+        self._journal.remove(key)
+
+        stats = TransferStats(
+            bytes_transferred=size - resumed_from,
+            duration_ms=(time.monotonic() - start_time) * 1000,
+            ranges=len(ranges),
+            channels=channels,
+            resumed_from=resumed_from
+        )
+        self._log_stats("Uploaded", local_path, remote_path, stats)
+        return stats
+
+    def download(self, remote_path: str, local_path: str, resume: bool = True) -> TransferStats:
+        """
+        下载文件
+
+        数据先写入同目录下的 local_path + ".part"，完成后再替换目标文件；
+        失败或中断时目标文件保持不变，.part 文件保留用于续传。
+
+        Args:
+            remote_path: 远程文件路径
+            local_path: 本地目标路径
+            resume: 本地已有 .part 文件时是否续传
+
+        Returns:
+            TransferStats: 传输统计
+
+        Raises:
+            FileTransferException: 传输失败
+        """
+        start_time = time.monotonic()
+        remote_stat = self._remote_stat(remote_path)
+        if remote_stat is None:
+            raise FileTransferException(f"Remote file not found: {remote_path}")
+        size = remote_stat.st_size
+        key = self._journal_key("download", local_path, remote_path)
+        signature = [size, remote_stat.st_mtime]
+
+        Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+        part_path = local_path + PART_SUFFIX
+        existing = os.path.getsize(part_path) if resume and os.path.isfile(part_path) else 0
+        with open(part_path, "r+b" if existing else "w+b") as local_file:
+            if existing > size:
+                local_file.truncate(0)
+                existing = 0
+            local_file.truncate(size)
+            if size == 0:
+                local_file.close()
+                os.replace(part_path, local_path)
+                return TransferStats(duration_ms=(time.monotonic() - start_time) * 1000)
+
+            target = self._map_for_write(local_file)
+            write_lock = threading.Lock()
+
+            resumed_from = 0
+            if existing:
+                if isinstance(target, mmap.mmap):
+                    prefix = memoryview(target)
+                else:
+                    local_file.seek(0)
+                    prefix = memoryview(local_file.read(existing))
+                try:
+                    resumed_from = self._verified_prefix(key, signature, existing, prefix, remote_path)
+                finally:
+                    prefix.release()
+                if resumed_from:
+                    self._logger.info(f"Resuming download of {remote_path} at byte {resumed_from}")
+
+            ranges = self._split_ranges(resumed_from, size)
+            channels = self._channel_count(size - resumed_from, ranges)
+            tracker = self._tracker(key, signature, resumed_from)
+
+            def store(offset: int, data: bytes) -> None:
+                if isinstance(target, mmap.mmap):
+                    target[offset:offset + len(data)] = data
+                else:
+                    with write_lock:
+                        target.seek(offset)
+                        target.write(data)
+
+            def read_ranges(sftp: SFTPClient, byte_ranges: List[ByteRange]) -> None:
+                with sftp.open(remote_path, "rb") as remote_file:
+                    for range_offset, range_length in byte_ranges:
+                        chunks = [
+                            (offset, min(self._config.chunk_size, range_offset + range_length - offset))
+                            for offset in range(range_offset, range_offset + range_length, self._config.chunk_size)
+                        ]
+                        blocks = remote_file.readv(
+                            chunks,
+                            max_concurrent_prefetch_requests=self._config.max_requests
+                        )
+                        for (offset, length), data in zip(chunks, blocks):
+                            if len(data) != length:
+                                raise FileTransferException(
+                                    f"Short read at offset {offset}: expected {length} bytes, got {len(data)}"
+                                )
+                            store(offset, data)
+                        tracker.complete(range_offset, range_length)
+
+            try:
+                self._run_ranges(ranges, channels, read_ranges)
+            finally:
+                if isinstance(target, mmap.mmap):
+                    target.flush()
+                    target.close()
+        os.replace(part_path, local_path)
+        self._journal.remove(key)
+
+        stats = TransferStats(
+            bytes_transferred=size - resumed_from,
+            duration_ms=(time.monotonic() - start_time) * 1000,
+            ranges=len(ranges),
+            channels=channels,
+            resumed_from=resumed_from
+        )
+        self._log_stats("Downloaded", remote_path, local_path, stats)
+        return stats
+
+    def _map_for_read(self, local_file):
+        """只读映射本地文件；禁用 mmap 时读入内存"""
+        if self._config.use_mmap:
+            return mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return local_file.read()
+
+    def _map_for_write(self, local_file):
+        """可写映射本地文件；禁用 mmap 时直接写文件"""
+        if self._config.use_mmap:
+            return mmap.mmap(local_file.fileno(), 0, access=mmap.ACCESS_WRITE)
+        return local_file
+
+    def _log_stats(self, action: str, source: str, destination: str, stats: TransferStats) -> None:
+        self._logger.info(
+            f"{action} {source} -> {destination} "
+            f"({stats.bytes_transferred} bytes, {stats.duration_ms:.2f}ms, "
+            f"{stats.throughput_mb_per_sec:.2f}MB/s, "
+            f"{stats.ranges} ranges over {stats.channels} channels, "
+            f"resumed from byte {stats.resumed_from})"
+        )
@@ -0,0 +1,32 @@
+from ssh_mcp.result_cache import ResultCache, is_read_only_command
+
+
+HOST = ("10.0.0.1", 22, "root")
+
+
+def _ok(stdout: str) -> dict:
+    return {"exit_code": 0, "stdout": stdout, "stderr": ""}
+
+
+def test_quoted_forms_do_not_share_entries():
+    cache = ResultCache()
+    assert cache.put(*HOST, "ls 'a b'", _ok("a b\n"))
+    assert cache.get(*HOST, "ls 'a b'")["stdout"] == "a b\n"
+    assert cache.get(*HOST, 'ls "a b"') is None
+    assert cache.get(*HOST, "ls a b") is None
+
+
+def test_shell_expansion_is_not_cacheable():
+    cache = ResultCache()
+    for command in ("ls $HOME", "ls '$HOME'", 'ls "$HOME"', "ls *", "ls '*'", "ls ~",
+                    "ls [ab]", "ls a?", "ls; id", "ls | wc", "ls > f", "ls `pwd`"):
+        assert cache.classify(command) is None, command
+        assert not cache.put(*HOST, command, _ok("x\n")), command
+        assert cache.get(*HOST, command) is None, command
+        assert not is_read_only_command(command), command
+
+
+def test_whitespace_around_command_is_ignored():
+    cache = ResultCache()
+    assert cache.put(*HOST, "df -h", _ok("fs\n"))
+    assert cache.get(*HOST, "  df -h ")["cached"] is True